@@ -38,3 +38,12 @@ model = to_solver_based_model(cobra_model, solver_interface='glpk')
 cplex_model_setup = read_sbml_model + """
 model = to_solver_based_model(cobra_model, solver_interface='cplex')
 """
+
+# E. coli core model
+ECOLI_CORE_DIR = os.path.join(BENCHMARKS_DIR, "../tests/data/EcoliCore.xml")
+
+ecoli_core_setup = """
+from cameo import load_model
+model = load_model('%s')
+model.solver = 'glpk'
+""" % ECOLI_CORE_DIR
@@ -0,0 +1,61 @@
+# Copyright 2015 Novo Nordisk Foundation Center for Biosustainability, DTU.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from datetime import datetime
+from vbench.benchmark import Benchmark
+from common import *
+
+
+###############################################
+# Succinate production with up to 3 knockouts #
+###############################################
+
+strain_design_setup = """
+BIOMASS = 'Biomass_Ecoli_core_N_lp_w_fsh_GAM_rp__Nmet2'
+TARGET = 'EX_succ_lp_e_rp_'
+SUBSTRATE = 'EX_glc_lp_e_rp_'
+"""
+
+# OptKnock (a single MILP per solution)
+optknock_setup = strain_design_setup + """
+from cameo.strain_design.deterministic import OptKnock
+"""
+
+optknock_statement = """
+OptKnock(model, fraction_of_optimum=0.1).run(target=TARGET, max_knockouts=3, max_results=1)
+"""
+
+optknock_benchmark = Benchmark(optknock_statement,
+                               ecoli_core_setup + optknock_setup,
+                               ncalls=1, repeat=1,
+                               start_date=datetime(2015, 11, 1))
+
+# Heuristic optimization of the same problem (biomass-product coupled yield)
+reaction_knockout_setup = strain_design_setup + """
+from cameo import fba
+from cameo.parallel import SequentialView
+from cameo.strain_design.heuristic import ReactionKnockoutOptimization
+from cameo.strain_design.heuristic.objective_functions import biomass_product_coupled_yield
+"""
+
+reaction_knockout_statement = """
+ReactionKnockoutOptimization(model=model, simulation_method=fba, max_size=3, seed=1234,
+                             objective_function=biomass_product_coupled_yield(BIOMASS, TARGET, SUBSTRATE)).run(
+    max_evaluations=2000, pop_size=50, view=SequentialView())
+"""
+
+reaction_knockout_benchmark = Benchmark(reaction_knockout_statement,
+                                        ecoli_core_setup + reaction_knockout_setup,
+                                        ncalls=1, repeat=1,
+                                        start_date=datetime(2015, 11, 1))
@@ -17,7 +17,7 @@ from datetime import datetime
 
 import os
 
-modules = ['model', 'flux_analysis']
+modules = ['model', 'flux_analysis', 'strain_design']
 
 by_module = {}
 benchmarks = []
@@ -0,0 +1,280 @@
+# Copyright 2015 Novo Nordisk Foundation Center for Biosustainability, DTU.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compiled gene-protein-reaction (GPR) associations.
+
+Rules are parsed once and converted into disjunctive normal form (DNF), with every conjunction
+encoded as an integer bit mask over gene indices. A reaction is knocked out by a set of genes
+if every clause of its rule contains at least one of them, i.e. if all(clause & knockouts).
+"""
+
+from __future__ import absolute_import, print_function
+
+__all__ = ['GPRIndex', 'parse_gpr']
+
+import re
+
+import six
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+_TOKENS = re.compile(r"\(|\)|[^\s()]+")
+
+# Rules that expand into more clauses are evaluated as expression trees instead.
+MAX_CLAUSES = 4096
+
+
+def parse_gpr(rule):
+    """Parse a gene_reaction_rule into an expression tree.
+
+    'and' binds stronger than 'or' (as in Python, which cobrapy uses to evaluate rules).
+
+    Parameters
+    ----------
+    rule : str
+        e.g. "b0001 and (b0002 or b0003)"
+
+    Returns
+    -------
+    tuple or str or None
+        A gene id, ('and', [...]) or ('or', [...]), or None for an empty rule.
+    """
+    tokens = _TOKENS.findall(rule)
+    if len(tokens) == 0:
+        return None
+    position = [0]
+
+    def peek():
+        if position[0] < len(tokens):
+            return tokens[position[0]]
+        return None
+
+    def take():
+        token = peek()
+        if token is None:
+            raise ValueError("Unexpected end of gene_reaction_rule '%s'" % rule)
+        position[0] += 1
+        return token
+
+    def parse_operation(operator, parse_operand):
+        operands = [parse_operand()]
+        while peek() is not None and peek().lower() == operator:
+            take()
+            operands.append(parse_operand())
+        if len(operands) == 1:
+            return operands[0]
+        return operator, operands
+
+    def parse_expression():
+        return parse_operation('or', parse_term)
+
+    def parse_term():
+        return parse_operation('and', parse_factor)
+
+    def parse_factor():
+        token = take()
+        if token == '(':
+            expression = parse_expression()
+            if take() != ')':
+                raise ValueError("Unbalanced parentheses in gene_reaction_rule '%s'" % rule)
+            return expression
+        if token == ')' or token.lower() in ('and', 'or'):
+            raise ValueError("Unexpected '%s' in gene_reaction_rule '%s'" % (token, rule))
+        return token
+
+    tree = parse_expression()
+    if peek() is not None:
+        raise ValueError("Unexpected '%s' in gene_reaction_rule '%s'" % (peek(), rule))
+    return tree
+
+
+def _minimize(clauses):
+    """Remove duplicate clauses and clauses that are supersets of others (absorption)."""
+    minimal = []
+    for clause in sorted(set(clauses), key=lambda c: bin(c).count('1')):
+        if not any(other & clause == other for other in minimal):
+            minimal.append(clause)
+    return minimal
+
+
+class GPRIndex(object):
+    """Gene-protein-reaction rules of a model compiled to bit masks.
+
+    The index only stores identifiers, so it remains valid for copies of the model. It must be rebuilt
+    if reactions or gene_reaction_rules change (SolverBasedModel.gpr_index takes care of added and
+    removed reactions).
+
+    Parameters
+    ----------
+    model : cobra.Model
+
+    Attributes
+    ----------
+    genes : list
+        Gene ids; the position of a gene is its bit in masks.
+    clauses : dict
+        {reaction_id: [mask, ...]} DNF of every reaction with a (not too complex) rule.
+    gene_reactions : dict
+        {gene_id: [reaction_id, ...]} reactions whose rule contains a gene.
+    """
+
+    def __init__(self, model):
+        self.genes = [gene.id for gene in model.genes]
+        self._gene_index = dict((gene_id, i) for i, gene_id in enumerate(self.genes))
+        self._reaction_index = dict((reaction.id, i) for i, reaction in enumerate(model.reactions))
+        self.clauses = {}
+        self._trees = {}
+        gene_reactions = dict((gene_id, []) for gene_id in self.genes)
+        for reaction in model.reactions:
+            tree = parse_gpr(reaction.gene_reaction_rule)
+            if tree is None:
+                continue
+            clauses = self._to_dnf(tree)
+            if clauses is None:
+                logger.debug("Rule of %s is too complex for DNF, keeping expression tree" % reaction.id)
+                self._trees[reaction.id] = self._compile_tree(tree)
+                mask = self._tree_mask(self._trees[reaction.id])
+            else:
+                self.clauses[reaction.id] = clauses
+                mask = 0
+                for clause in clauses:
+                    mask |= clause
+            for i in self._bits(mask):
+                gene_reactions.setdefault(self.genes[i], []).append(reaction.id)
+        self.gene_reactions = gene_reactions
+
+    def _gene_bit(self, gene_id):
+        try:
+            return 1 << self._gene_index[gene_id]
+        except KeyError:
+            # genes used in rules but missing from model.genes
+            self._gene_index[gene_id] = len(self.genes)
+            self.genes.append(gene_id)
+            return 1 << self._gene_index[gene_id]
+
+    def _to_dnf(self, tree):
+        if isinstance(tree, six.string_types):
+            return [self._gene_bit(tree)]
+        operator, operands = tree
+        operand_clauses = [self._to_dnf(operand) for operand in operands]
+        if any(clauses is None for clauses in operand_clauses):
+            return None
+        if operator == 'or':
+            return _minimize([clause for clauses in operand_clauses for clause in clauses])
+        result = [0]
+        for clauses in operand_clauses:
+            if len(result) * len(clauses) > MAX_CLAUSES:
+                return None
+            result = _minimize([a | b for a in result for b in clauses])
+        return result
+
+    def _compile_tree(self, tree):
+        if isinstance(tree, six.string_types):
+            return self._gene_bit(tree)
+        operator, operands = tree
+        return operator, [self._compile_tree(operand) for operand in operands]
+
+    def _tree_mask(self, tree):
+        if isinstance(tree, six.integer_types):
+            return tree
+        mask = 0
+        for operand in tree[1]:
+            mask |= self._tree_mask(operand)
+        return mask
+
+    def _tree_is_active(self, tree, knockouts):
+        if isinstance(tree, six.integer_types):
+            return not tree & knockouts
+        if tree[0] == 'and':
+            return all(self._tree_is_active(operand, knockouts) for operand in tree[1])
+        return any(self._tree_is_active(operand, knockouts) for operand in tree[1])
+
+    @staticmethod
+    def _bits(mask):
+        while mask:
+            lowest = mask & -mask
+            yield lowest.bit_length() - 1
+            mask ^= lowest
+
+    def gene_mask(self, genes):
+        """Bit mask of genes (ids or cobra.Gene objects)."""
+        mask = 0
+        for gene in genes:
+            gene_id = getattr(gene, 'id', gene)
+            mask |= 1 << self._gene_index[gene_id]
+        return mask
+
+    def is_knocked_out(self, reaction_id, knockouts):
+        """True if reaction_id cannot be catalyzed without the genes in the knockouts mask."""
+        try:
+            clauses = self.clauses[reaction_id]
+        except KeyError:
+            tree = self._trees.get(reaction_id)
+            return tree is not None and not self._tree_is_active(tree, knockouts)
+        for clause in clauses:
+            if not clause & knockouts:
+                return False
+        return True
+
+    def knockout_reaction_ids(self, genes):
+        """Ids of the reactions knocked out by knocking out genes (ids or cobra.Gene objects), in model order.
+
+        Equivalent to cobra.manipulation.delete.find_gene_knockout_reactions.
+        """
+        genes = [getattr(gene, 'id', gene) for gene in genes]
+        knockouts = self.gene_mask(genes)
+        candidates = set()
+        for gene_id in genes:
+            candidates.update(self.gene_reactions.get(gene_id, ()))
+        knocked_out = [reaction_id for reaction_id in candidates if self.is_knocked_out(reaction_id, knockouts)]
+        return sorted(knocked_out, key=self._reaction_index.__getitem__)
+
+    def equivalent_genes(self, genes=None):
+        """Group genes that have the same effect when knocked out (alone or together with any other genes).
+
+        Genes are equivalent if they are part of exactly the same clauses (e.g. several subunits of a complex
+        that only occurs in one rule, or genes of reactions that are always knocked out together). Genes that
+        are not part of any rule are omitted, since knocking them out has no effect.
+
+        Parameters
+        ----------
+        genes : iterable, optional
+            Gene ids or cobra.Gene objects to group (default: all genes).
+
+        Returns
+        -------
+        list
+            Lists of equivalent gene ids (sorted, and ordered by their first gene).
+        """
+        if genes is None:
+            genes = self.genes
+        signatures = {}
+        for gene_id in sorted(getattr(gene, 'id', gene) for gene in genes):
+            bit = 1 << self._gene_index[gene_id]
+            signature = []
+            for reaction_id in self.gene_reactions.get(gene_id, ()):
+                if reaction_id in self.clauses:
+                    signature.extend((reaction_id, i) for i, clause in enumerate(self.clauses[reaction_id])
+                                     if clause & bit)
+                else:
+                    signature.append((reaction_id, gene_id))
+            if len(signature) > 0:
+                signatures.setdefault(frozenset(signature), []).append(gene_id)
+        return sorted(signatures.values())
+
+    def knockout_reactions(self, model, genes):
+        """Reactions of model knocked out by knocking out genes (see knockout_reaction_ids)."""
+        return [model.reactions.get_by_id(reaction_id) for reaction_id in self.knockout_reaction_ids(genes)]
@@ -43,6 +43,7 @@ from cameo import config
 from cameo import exceptions
 from cameo.exceptions import SolveError, Infeasible, UndefinedSolution
 from .reaction import Reaction
+from .gpr import GPRIndex
 from .solution import LazySolution, Solution
 
 import logging
@@ -102,6 +103,7 @@ class SolverBasedModel(cobra.core.Model):
         self._populate_solver(self.reactions)
         self._timestamp_last_optimization = None
         self.solution = LazySolution(self)
+        self._gpr_index = None
 
     def __copy__(self):
         return self.__deepcopy__()
@@ -266,6 +268,16 @@ class SolverBasedModel(cobra.core.Model):
             self.solver.objective.variables  # TODO: remove this weird hack. Looks like some weird issue with lazy objective expressions in CPLEX and GLPK interface in optlang.
             self.solver.objective += objective_expression
 
+    @property
+    def gpr_index(self):
+        """Gene-protein-reaction rules compiled for fast gene knockout evaluation (see cameo.core.gpr.GPRIndex).
+
+        The index is built on first access and rebuilt after reactions have been added or removed.
+        """
+        if getattr(self, '_gpr_index', None) is None:
+            self._gpr_index = GPRIndex(self)
+        return self._gpr_index
+
     @doc_inherit
     def add_reactions(self, reaction_list):
         cloned_reaction_list = list()
@@ -279,6 +291,7 @@ class SolverBasedModel(cobra.core.Model):
         super(SolverBasedModel, self).add_reactions(cloned_reaction_list)
 
         self._populate_solver(cloned_reaction_list)
+        self._gpr_index = None
 
     @doc_inherit
     def remove_reactions(self, the_reactions, delete=True, remove_orphans=False):
@@ -286,6 +299,7 @@ class SolverBasedModel(cobra.core.Model):
             self.solver.remove(reaction.forward_variable)
             self.solver.remove(reaction.reverse_variable)
         super(SolverBasedModel, self).remove_reactions(the_reactions, delete=delete, remove_orphans=remove_orphans)
+        self._gpr_index = None
 
     def add_demand(self, metabolite, prefix="DM_", time_machine=None):
         """Add a demand reaction for a metabolite (metabolite --> Ø)
@@ -487,7 +501,7 @@ class SolverBasedModel(cobra.core.Model):
             if abs(flux) > 0:
                 genes_to_check.update(self.reactions.get_by_id(reaction_id).genes)
         for gene in genes_to_check:
-            reactions = cobra.manipulation.delete.find_gene_knockout_reactions(self, [gene])
+            reactions = self.gpr_index.knockout_reactions(self, [gene])
             with TimeMachine() as tm:
                 for reaction in reactions:
                     reaction.knock_out(time_machine=tm)
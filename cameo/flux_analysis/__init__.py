@@ -14,6 +14,7 @@
 
 from .simulation import *
 from .analysis import *
+from .flux_coupling import *
 from .util import *
 
 
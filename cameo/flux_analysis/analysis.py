@@ -14,7 +14,7 @@
 
 from __future__ import absolute_import, print_function
 
-__all__ = ['find_blocked_reactions', 'flux_variability_analysis', 'phenotypic_phase_plane',
+__all__ = ['find_blocked_reactions', 'flux_variability_analysis', 'effective_bounds', 'phenotypic_phase_plane',
            'flux_balance_impact_degree']
 
 from cobra.core import Reaction, Metabolite
@@ -33,7 +33,7 @@ import pandas
 import cameo
 from cameo import config
 from cameo.exceptions import Infeasible, Unbounded, SolveError
-from cameo.util import TimeMachine, partition
+from cameo.util import TimeMachine, partition, model_fingerprint
 from cameo.parallel import SequentialView
 from cameo.core.result import Result
 from cameo.ui import notice
@@ -117,6 +117,62 @@ def flux_variability_analysis(model, reactions=None, fraction_of_optimum=0., rem
     return FluxVariabilityResult(solution)
 
 
+def effective_bounds(model, reactions=None, view=None):
+    """Effective flux ranges of reactions (determined with flux variability analysis).
+
+    The flux ranges are cached on the model and reused as long as the reactions, the objective and the
+    variables and constraints of the solver (including their bounds) do not change. Knockouts only shrink
+    flux ranges, so ranges computed for the wild-type remain valid (if less tight) bounds for its mutants.
+
+    Parameters
+    ----------
+    model: SolverBasedModel
+    reactions: None or iterable
+        The reactions whose flux ranges should be determined. If `None`, all reactions in `model` will be assessed.
+    view: SequentialView or MultiprocessingView or ipython.cluster.DirectView
+        A parallelization view.
+
+    Returns
+    -------
+    dict
+        {reaction_id: (lower_bound, upper_bound)}
+
+    """
+    if reactions is None:
+        reactions = model.reactions
+    else:
+        reactions = model._ids_to_reactions(reactions)
+
+    state = _solver_state(model)
+    cache = model.__dict__.setdefault('_effective_bounds_cache', OrderedDict())
+    flux_ranges = cache.pop(state, {})
+    cache[state] = flux_ranges
+    while len(cache) > _EFFECTIVE_BOUNDS_CACHE_SIZE:
+        cache.popitem(last=False)
+
+    missing = [reaction for reaction in reactions if reaction.id not in flux_ranges]
+    if len(missing) > 0:
+        logger.debug("Determining effective bounds for %d reactions." % len(missing))
+        fva_result = flux_variability_analysis(model, reactions=missing, view=view)
+        for reaction_id, row in fva_result.data_frame.iterrows():
+            flux_ranges[reaction_id] = (row['lower_bound'], row['upper_bound'])
+
+    return dict((reaction.id, flux_ranges[reaction.id]) for reaction in reactions)
+
+
+_EFFECTIVE_BOUNDS_CACHE_SIZE = 8
+
+
+def _solver_state(model):
+    """A key for results that depend on the model and any other variables and constraints of its solver."""
+    metabolite_ids = set(metabolite.id for metabolite in model.metabolites)
+    constraints = tuple((constraint.name, constraint.lb, constraint.ub,
+                         None if constraint.name in metabolite_ids else str(constraint.expression))
+                        for constraint in model.solver.constraints)
+    variables = tuple((variable.name, variable.lb, variable.ub) for variable in model.solver.variables)
+    return hash((model_fingerprint(model), constraints, variables))
+
+
 def phenotypic_phase_plane(model, variables=[], objective=None, points=20, view=None):
     """Phenotypic phase plane analysis.
 
@@ -0,0 +1,200 @@
+# Copyright 2015 Novo Nordisk Foundation Center for Biosustainability, DTU.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import, print_function
+
+__all__ = ['flux_coupling_analysis', 'stoichiometric_matrix', 'FluxCouplingResult']
+
+import six
+
+import numpy
+import pandas
+
+from cameo import config
+from cameo.core.result import Result
+from cameo.flux_analysis.analysis import effective_bounds
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def stoichiometric_matrix(model, reactions=None):
+    """The stoichiometric matrix of model.
+
+    Parameters
+    ----------
+    model: cobra.Model
+    reactions: None or iterable
+        The reactions (columns) to include. If `None`, all reactions in `model` are used.
+
+    Returns
+    -------
+    numpy.ndarray
+        A (metabolites x reactions) array; rows are in the order of model.metabolites.
+    """
+    if reactions is None:
+        reactions = model.reactions
+    metabolite_index = dict((metabolite.id, i) for i, metabolite in enumerate(model.metabolites))
+    matrix = numpy.zeros((len(metabolite_index), len(reactions)))
+    for j, reaction in enumerate(reactions):
+        for metabolite, coefficient in six.iteritems(reaction.metabolites):
+            matrix[metabolite_index[metabolite.id], j] = coefficient
+    return matrix
+
+
+def _null_space(matrix, tolerance=1e-10):
+    if matrix.shape[0] == 0:
+        return numpy.eye(matrix.shape[1])
+    u, s, vh = numpy.linalg.svd(matrix)
+    rank = int((s > tolerance * max(1., s.max())).sum())
+    return vh[rank:].T
+
+
+def flux_coupling_analysis(model, view=None, tolerance=1e-10, coupling_tolerance=1e-8):
+    """Determine blocked and fully coupled reactions.
+
+    Follows the reduction steps of F2C2 (Larhlimi et al. 2012, BMC Bioinformatics 13:57): blocked reactions
+    are determined first (with flux variability analysis under the current bounds, see effective_bounds)
+    and removed from the network. Two of the remaining reactions i and j are fully coupled, v_i = ratio * v_j
+    for every steady-state flux distribution, if their rows in a basis of the null space of the reduced
+    stoichiometric matrix are proportional. Reactions whose null space row vanishes cannot carry steady-state
+    flux at all and are also reported as blocked.
+
+    Blocked reactions therefore depend on the medium: unlike find_blocked_reactions, which opens all exchange
+    reactions first, a reaction is blocked here if it cannot carry flux under the model's current bounds.
+
+    Directional and partial coupling are not determined.
+
+    Parameters
+    ----------
+    model: SolverBasedModel
+    view: SequentialView or MultiprocessingView or ipython.cluster.DirectView
+        A parallelization view (used for flux variability analysis).
+    tolerance: float
+        Relative tolerance for the rank of the stoichiometric matrix.
+    coupling_tolerance: float
+        Null space rows (normalized to unit length) are proportional if no entry differs by more than
+        coupling_tolerance.
+
+    Returns
+    -------
+    FluxCouplingResult
+    """
+    bounds = effective_bounds(model, view=view)
+    threshold = config.non_zero_flux_threshold
+    blocked = [reaction.id for reaction in model.reactions
+               if max(abs(bounds[reaction.id][0]), abs(bounds[reaction.id][1])) < threshold]
+    blocked_ids = set(blocked)
+    unblocked = [reaction for reaction in model.reactions if reaction.id not in blocked_ids]
+    logger.debug("%i of %i reactions are blocked" % (len(blocked), len(model.reactions)))
+
+    kernel = _null_space(stoichiometric_matrix(model, unblocked), tolerance=tolerance)
+    norms = numpy.sqrt((kernel ** 2).sum(axis=1))
+    representatives = {}
+    ratios = {}
+    groups = []
+    # normalized rows of the first reaction of every group
+    group_rows = numpy.zeros((len(unblocked), kernel.shape[1]))
+    for reaction, row, norm in zip(unblocked, kernel, norms):
+        if norm < threshold:
+            blocked.append(reaction.id)
+            continue
+        # rows are normalized to unit length with a positive first (significant) entry
+        sign = numpy.sign(row[numpy.flatnonzero(numpy.abs(row) > threshold * norm)[0]])
+        normalized = row / (sign * norm)
+        matches = []
+        if len(groups) > 0:
+            deviations = numpy.abs(group_rows[:len(groups)] - normalized).max(axis=1)
+            matches = numpy.flatnonzero(deviations <= coupling_tolerance)
+        if len(matches) == 0:
+            group_rows[len(groups)] = normalized
+            groups.append([])
+            group = groups[-1]
+            representatives[reaction.id] = reaction.id
+            ratios[reaction.id] = 1.
+        else:
+            group = groups[matches[0]]
+            first = group[0]
+            representatives[reaction.id] = first[0]
+            ratios[reaction.id] = float((sign * norm) / (first[1] * first[2]))
+        group.append((reaction.id, sign, norm))
+
+    coupled_sets = [[reaction_id for reaction_id, _, _ in group] for group in groups if len(group) > 1]
+    coupled_sets.sort(key=lambda coupled_set: model.reactions.index(coupled_set[0]))
+    return FluxCouplingResult(blocked, coupled_sets, representatives, ratios)
+
+
+class FluxCouplingResult(Result):
+    """Blocked and fully coupled reactions (see flux_coupling_analysis).
+
+    Attributes
+    ----------
+    blocked: list
+        Ids of reactions that cannot carry flux.
+    coupled_sets: list
+        Lists of ids of fully coupled reactions (sets with more than one reaction only).
+    """
+
+    def __init__(self, blocked, coupled_sets, representatives, ratios, *args, **kwargs):
+        super(FluxCouplingResult, self).__init__(*args, **kwargs)
+        self.blocked = blocked
+        self.coupled_sets = coupled_sets
+        self._representatives = representatives
+        self._ratios = ratios
+
+    @property
+    def data_frame(self):
+        index = list(self._representatives) + self.blocked
+        return pandas.DataFrame({
+            'blocked': [self.is_blocked(reaction_id) for reaction_id in index],
+            'coupled_set': [self._representatives.get(reaction_id) for reaction_id in index],
+            'ratio': [self._ratios.get(reaction_id, 0.) for reaction_id in index]
+        }, index=index, columns=['blocked', 'coupled_set', 'ratio'])
+
+    def plot(self, grid=None, width=None, height=None, title=None):
+        raise NotImplementedError('Plotting of flux coupling results has not been implemented yet.')
+
+    def is_blocked(self, reaction_id):
+        return reaction_id not in self._representatives
+
+    def representative(self, reaction_id):
+        """The first reaction of the coupled set of reaction_id (None if reaction_id is blocked)."""
+        return self._representatives.get(reaction_id)
+
+    def ratio(self, reaction_id):
+        """The flux of reaction_id relative to the flux of its representative."""
+        return self._ratios.get(reaction_id, 0.)
+
+    def equivalent_reactions(self, reactions):
+        """Group reactions with the same effect when knocked out.
+
+        Fully coupled reactions are grouped together and blocked reactions are omitted, since knocking them
+        out has no effect.
+
+        Parameters
+        ----------
+        reactions: iterable
+            Reaction ids or cobra.Reaction objects.
+
+        Returns
+        -------
+        list
+            Lists of reaction ids (sorted, and ordered by their first reaction).
+        """
+        groups = {}
+        for reaction_id in sorted(getattr(reaction, 'id', reaction) for reaction in reactions):
+            if not self.is_blocked(reaction_id):
+                groups.setdefault(self._representatives[reaction_id], []).append(reaction_id)
+        return sorted(groups.values())
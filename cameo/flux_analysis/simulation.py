@@ -210,7 +210,7 @@ def lmoma(model, reference=None, cache=None, *args, **kwargs):
             cache.reset()
 
 
-def room(model, reference=None, cache=None, delta=0.03, epsilon=0.001, *args, **kwargs):
+def room(model, reference=None, cache=None, delta=0.03, epsilon=0.001, flux_ranges=None, *args, **kwargs):
     """Regulatory On/Off Minimization [1].
 
     Parameters
@@ -218,6 +218,9 @@ def room(model, reference=None, cache=None, delta=0.03, epsilon=0.001, *args, **
     model: SolverBasedModel
     reference: dict
     cache: ProblemCache
+    flux_ranges: dict, optional
+        Effective flux ranges {reaction_id: (lower_bound, upper_bound)} used to tighten the big-M
+        coefficients of the on/off constraints (see cameo.flux_analysis.analysis.effective_bounds).
 
     Returns
     -------
@@ -241,6 +244,17 @@ def room(model, reference=None, cache=None, delta=0.03, epsilon=0.001, *args, **
     if not isinstance(reference, (dict, FluxDistributionResult)):
         raise TypeError("reference must be a flux distribution (dict or FluxDistributionResult")
 
+    if flux_ranges is None:
+        flux_ranges = {}
+
+    # Reactions cannot carry more flux than their effective range allows, so the tighter of reaction bound
+    # and effective bound is a valid big-M coefficient (and gives a much stronger LP relaxation).
+    def _upper_bound(reaction):
+        return min(reaction.upper_bound, flux_ranges.get(reaction.id, (None, reaction.upper_bound))[1])
+
+    def _lower_bound(reaction):
+        return max(reaction.lower_bound, flux_ranges.get(reaction.id, (reaction.lower_bound, None))[0])
+
     try:
         for rid, flux_value in six.iteritems(reference):
             reaction = model.reactions.get_by_id(rid)
@@ -253,14 +267,14 @@ def room(model, reference=None, cache=None, delta=0.03, epsilon=0.001, *args, **
             def create_upper_constraint(model, constraint_id, reaction, variable, flux_value, epsilon):
                 w_u = flux_value + delta * abs(flux_value) + epsilon
                 return model.solver.interface.Constraint(
-                    reaction.flux_expression - variable * (reaction.upper_bound - w_u),
+                    reaction.flux_expression - variable * (_upper_bound(reaction) - w_u),
                     ub=w_u,
                     sloppy=True,
                     name=constraint_id)
 
             def update_upper_constraint(model, constraint, reaction, variable, flux_value, epsilon):
                 w_u = flux_value + delta * abs(flux_value) + epsilon
-                constraint._set_coefficients_low_level({variable: reaction.upper_bound - w_u})
+                constraint._set_coefficients_low_level({variable: _upper_bound(reaction) - w_u})
                 constraint.ub = w_u
 
             cache.add_constraint("c_%s_upper" % rid, create_upper_constraint, update_upper_constraint,
@@ -269,14 +283,14 @@ def room(model, reference=None, cache=None, delta=0.03, epsilon=0.001, *args, **
             def create_lower_constraint(model, constraint_id, reaction, variable, flux_value, epsilon):
                 w_l = flux_value - delta * abs(flux_value) - epsilon
                 return model.solver.interface.Constraint(
-                    reaction.flux_expression - variable * (reaction.lower_bound - w_l),
+                    reaction.flux_expression - variable * (_lower_bound(reaction) - w_l),
                     lb=w_l,
                     sloppy=True,
                     name=constraint_id)
 
             def update_lower_constraint(model, constraint, reaction, variable, flux_value, epsilon):
                 w_l = flux_value - delta * abs(flux_value) - epsilon
-                constraint._set_coefficients_low_level({variable: reaction.lower_bound - w_l})
+                constraint._set_coefficients_low_level({variable: _lower_bound(reaction) - w_l})
                 constraint.lb = w_l
 
             cache.add_constraint("c_%s_lower" % rid, create_lower_constraint, update_lower_constraint,
@@ -14,8 +14,15 @@
 
 from __future__ import absolute_import, print_function
 
+import os
+import socket
+import struct
+import threading
 import six.moves.queue
-from multiprocessing import Pool, cpu_count
+import six.moves.cPickle as pickle
+from six.moves import socketserver
+from multiprocessing import Manager, Pool, cpu_count
+from uuid import uuid4
 from cameo.util import Singleton
 
 import logging
@@ -48,7 +55,7 @@ class MultiprocessingView(Singleton):
     def apply_async(self, func, *args, **kwargs):
         if self.pool is None:
             self.pool = Pool(*self._args, **self._kwargs)
-        self.pool.apply_async(func, args=args, **kwargs)
+        return self.pool.apply_async(func, args=args, **kwargs)
 
     def imap(self, func, *args, **kwargs):
         if self.pool is None:
@@ -83,9 +90,106 @@ class MultiprocessingView(Singleton):
         self.shutdown()
 
 
+_manager = None
+
+
+def _default_manager():
+    global _manager
+    if _manager is None:
+        _manager = Manager()
+    return _manager
+
+
+class ManagerQueue(object):
+    """
+    Queue shared by the processes of one machine (no external service required).
+
+    The queue lives in a multiprocessing.Manager server process (by default one manager per process that creates
+    queues, started on first use). ManagerQueue objects can be pickled and sent to worker processes (e.g. by
+    MultiprocessingView.map), which then access the same queue. It has the same interface as RedisQueue.
+
+    Parameters
+    ----------
+    name: str
+        Only used to identify the queue in its representation.
+    maxsize: int
+        Maximum number of items (0 for an unbounded queue).
+    namespace: str
+    manager: multiprocessing.managers.SyncManager
+        The manager to create the queue with (default: a shared manager).
+
+    """
+
+    def __init__(self, name=None, maxsize=0, namespace='queue', manager=None):
+        if manager is None:
+            manager = _default_manager()
+        self._maxsize = maxsize
+        self._queue = manager.Queue(maxsize)
+        self._key = '%s:%s' % (namespace, name)
+
+    def __len__(self):
+        return self.length
+
+    @property
+    def length(self):
+        return self._queue.qsize()
+
+    def empty(self):
+        return self.length == 0
+
+    def put(self, item, block=True, timeout=None):
+        """
+        Inserts an object in the queue.
+
+        Parameters
+        ----------
+        item: object
+            An object to put in the queue.
+        block: bool, default is True
+            If True and the queue is full, wait until a free slot is available (or the timeout is reached).
+            Otherwise six.moves.queue.Full is raised right away.
+        timeout: float
+            The timeout (in seconds) when blocking.
+
+        """
+        self._queue.put(item, block, timeout)
+
+    def put_nowait(self, item):
+        """Equivalent to put(item, False)."""
+        self.put(item, False)
+
+    def get(self, block=True, timeout=None):
+        """
+        Retrieves the next item in the queue.
+
+        Parameters
+        ----------
+        block: bool, default is True
+            If True, wait until an item is available (or the timeout is reached).
+        timeout: float
+            The timeout (in seconds) when blocking.
+
+        Returns
+        -------
+        item: object
+
+        Raises
+        ------
+        six.moves.queue.Empty
+
+        """
+        return self._queue.get(block, timeout)
+
+    def get_nowait(self):
+        """Equivalent to get(False)."""
+        return self.get(False)
+
+    def __repr__(self):
+        return "<ManagerQueue %s (%i items)>" % (self._key, self.length)
+
+
 try:
     import redis
-    import six.moves.cPickle as pickle
 
     class RedisQueue(object):
         """
@@ -144,9 +248,9 @@ try:
             return self._db.llen(self._key)
 
         def empty(self):
-            return self.length() == 0
+            return self.length == 0
 
-        def put(self, item):
+        def put(self, item, block=True, timeout=None):
             """
             Inserts an object in the queue.
 
@@ -154,6 +258,10 @@ try:
             ----------
             item : object
                 An object to put in the queue
+            block: bool
+            timeout: float
+                Accepted for compatibility with Python Queue; six.moves.queue.Full is raised right away
+                if the queue is full.
 
             """
             if self.length >= self._maxsize:
@@ -200,12 +308,9 @@ try:
                 item = self._db.blpop(self._key, timeout=timeout)
                 if item:
                     item = item[1]
-                logger.debug("Wait...")
             else:
                 item = self._db.lpop(self._key)
-                logger.debug("No-wait...")
 
-            logger.debug("Item: %s" % [item])
             if item:
                 return pickle.loads(item)
             else:
@@ -223,6 +328,361 @@ except ImportError:
     pass
 
 
+DEFAULT_BROKER_PORT = 5600
+
+# request: operation, block, timeout (< 0 for None), maxsize, length of the queue key, length of the payload
+_REQUEST = struct.Struct('!cBdIHI')
+# response: status, length of the payload (get) or number of items (length)
+_RESPONSE = struct.Struct('!cI')
+_PUT, _GET, _LENGTH = b'P', b'G', b'L'
+_OK, _EMPTY, _FULL = b'O', b'E', b'F'
+# sent by the client once it has received an item; the broker re-queues items that are not acknowledged
+_ACK = b'A'
+
+
+def _recv_exactly(connection, size):
+    chunks = []
+    while size > 0:
+        chunk = connection.recv(min(size, 65536))
+        if not chunk:
+            raise IOError("Connection closed by peer")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+class _QueueRequestHandler(socketserver.BaseRequestHandler):
+    def setup(self):
+        self.server.broker._connections.add(self.request)
+
+    def finish(self):
+        self.server.broker._connections.discard(self.request)
+
+    def handle(self):
+        broker = self.server.broker
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            try:
+                operation, block, timeout, maxsize, key_length, payload_length = _REQUEST.unpack(
+                    _recv_exactly(self.request, _REQUEST.size))
+                key = _recv_exactly(self.request, key_length)
+                payload = _recv_exactly(self.request, payload_length)
+            except (IOError, struct.error):
+                return
+            queue = broker.queue(key, maxsize)
+            timeout = None if timeout < 0 else timeout
+            response = None
+            if operation == _PUT:
+                try:
+                    queue.put(payload, bool(block), timeout)
+                    response = _RESPONSE.pack(_OK, 0)
+                except six.moves.queue.Full:
+                    response = _RESPONSE.pack(_FULL, 0)
+            elif operation == _GET:
+                try:
+                    payload = queue.get(bool(block), timeout)
+                except six.moves.queue.Empty:
+                    response = _RESPONSE.pack(_EMPTY, 0)
+                else:
+                    response = _RESPONSE.pack(_OK, len(payload)) + payload
+            elif operation == _LENGTH:
+                response = _RESPONSE.pack(_OK, queue.qsize())
+            else:
+                logger.debug("Unknown queue operation %r from %s" % (operation, self.client_address))
+                return
+            delivered = operation == _GET and response[:1] == _OK
+            try:
+                self.request.sendall(response)
+                # a client that timed out or died while waiting still accepts the send (the kernel buffers it)
+                if delivered and _recv_exactly(self.request, len(_ACK)) != _ACK:
+                    raise IOError("Item not acknowledged by %s:%i" % self.client_address[:2])
+            except IOError:
+                if delivered:
+                    # the client is gone, keep the item for the other ones
+                    try:
+                        queue.put_nowait(payload)
+                    except six.moves.queue.Full:
+                        logger.warning("Dropped an unacknowledged item, queue %r is full" % key)
+                return
+
+
+class _ThreadingTCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class QueueBroker(object):
+    """
+    A small TCP server that hosts named queues for SocketQueue clients.
+
+    Queues are created on first use. The broker only stores the serialized items, so clients never have to trust
+    the broker (but clients unpickle the items other clients put, so use it on trusted networks only). Every client
+    connection is served by its own thread; clients that disconnect or die do not affect the others.
+
+    Start a broker in the background with start() (e.g. in the process that runs the optimization), or dedicate a
+    process to it on one of the hosts:
+
+    >>> QueueBroker(host='0.0.0.0', port=5600).serve_forever()
+
+    Parameters
+    ----------
+    host: str
+    port: int
+        The port to listen on (0 to pick a free one, see address).
+
+    """
+
+    def __init__(self, host='localhost', port=DEFAULT_BROKER_PORT):
+        self._queues = {}
+        self._connections = set()
+        self._lock = threading.Lock()
+        self._server = _ThreadingTCPServer((host, port), _QueueRequestHandler)
+        self._server.broker = self
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.server_address[:2]
+
+    def queue(self, key, maxsize=0):
+        with self._lock:
+            try:
+                return self._queues[key]
+            except KeyError:
+                queue = self._queues[key] = six.moves.queue.Queue(maxsize)
+                return queue
+
+    def serve_forever(self):
+        logger.info("Queue broker listening on %s:%i" % self.address)
+        self._server.serve_forever()
+
+    def start(self):
+        """Serve in a background (daemon) thread."""
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def shutdown(self):
+        """Stop serving and close all client connections."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        for connection in list(self._connections):
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except IOError:
+                pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, type, value, traceback):
+        self.shutdown()
+
+
+class SocketQueue(object):
+    """
+    Queue hosted by a QueueBroker, shared by processes on any hosts that can connect to the broker.
+
+    Items are pickled (protocol 2, so hosts may run different Python versions). Every process opens its own
+    connection on first use, so SocketQueue objects can be pickled and sent to other processes. Connection
+    problems (e.g. a broker that is not running) raise IOError. It has the same interface as RedisQueue.
+
+    Parameters
+    ----------
+    name: str
+        Processes that use the same broker, namespace and name share a queue.
+    maxsize: int
+        Maximum number of items (0 for an unbounded queue); the first process to use a queue decides.
+    namespace: str
+    address: tuple
+        (host, port) of the broker.
+    timeout: float
+        Seconds to wait for the broker (on top of the timeout of blocking calls).
+
+    """
+
+    def __init__(self, name, maxsize=0, namespace='queue', address=('localhost', DEFAULT_BROKER_PORT), timeout=10.):
+        self._key = ('%s:%s' % (namespace, name)).encode('utf-8')
+        self._maxsize = max(0, maxsize)
+        self.address = tuple(address)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+    def __getstate__(self):
+        return {
+            '_key': self._key,
+            '_maxsize': self._maxsize,
+            'address': self.address,
+            'timeout': self.timeout
+        }
+
+    def __setstate__(self, d):
+        self.__dict__.update(d)
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+    def _connect(self):
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = socket.create_connection(self.address, self.timeout)
+            self._connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._pid = os.getpid()
+        return self._connection
+
+    def close(self):
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+
+    def _request(self, operation, payload=b'', block=False, timeout=None):
+        header = _REQUEST.pack(operation, bool(block), -1. if timeout is None else timeout, self._maxsize,
+                               len(self._key), len(payload))
+        with self._lock:
+            try:
+                connection = self._connect()
+                if block and timeout is None:
+                    connection.settimeout(None)
+                else:
+                    connection.settimeout(self.timeout + (timeout or 0.) * bool(block))
+                connection.sendall(header + self._key + payload)
+                status, value = _RESPONSE.unpack(_recv_exactly(connection, _RESPONSE.size))
+                if operation == _GET and status == _OK:
+                    value = _recv_exactly(connection, value)
+                    connection.sendall(_ACK)
+            except IOError:
+                self.close()
+                raise
+        if status == _EMPTY:
+            raise six.moves.queue.Empty
+        if status == _FULL:
+            raise six.moves.queue.Full
+        return value
+
+    def __len__(self):
+        return self.length
+
+    @property
+    def length(self):
+        return self._request(_LENGTH)
+
+    def empty(self):
+        return self.length == 0
+
+    def put(self, item, block=True, timeout=None):
+        """
+        Inserts an object in the queue.
+
+        Parameters
+        ----------
+        item: object
+            An object to put in the queue.
+        block: bool, default is True
+            If True and the queue is full, wait until a free slot is available (or the timeout is reached).
+            Otherwise six.moves.queue.Full is raised right away.
+        timeout: float
+            The timeout (in seconds) when blocking.
+
+        """
+        self._request(_PUT, pickle.dumps(item, 2), block, timeout)
+
+    def put_nowait(self, item):
+        """Equivalent to put(item, False)."""
+        self.put(item, False)
+
+    def get(self, block=True, timeout=None):
+        """
+        Retrieves the next item in the queue.
+
+        Parameters
+        ----------
+        block: bool, default is True
+            If True, wait until an item is available (or the timeout is reached).
+        timeout: float
+            The timeout (in seconds) when blocking.
+
+        Returns
+        -------
+        item: object
+
+        Raises
+        ------
+        six.moves.queue.Empty
+
+        """
+        return pickle.loads(self._request(_GET, block=block, timeout=timeout))
+
+    def get_nowait(self):
+        """Equivalent to get(False)."""
+        return self.get(False)
+
+    def __repr__(self):
+        return "<SocketQueue %s at %s:%i>" % (self._key.decode('utf-8'), self.address[0], self.address[1])
+
+
+QUEUE_TRANSPORTS = ('multiprocessing', 'redis', 'tcp://host:port')
+
+
+def new_queue(name=None, maxsize=0, namespace='queue', transport='multiprocessing'):
+    """Create a queue that can be shared by processes.
+
+    Parameters
+    ----------
+    name: str
+        A unique name (a random one is generated if None).
+    maxsize: int
+        Maximum number of items (0 for an unbounded queue).
+    namespace: str
+    transport: str or callable
+        'multiprocessing' (ManagerQueue, processes on one machine), 'redis' (RedisQueue, requires a running
+        Redis server), 'tcp://host:port' (SocketQueue, requires a running QueueBroker) or a callable with the
+        signature of this function (without transport) returning a queue.
+
+    Returns
+    -------
+    ManagerQueue or RedisQueue or SocketQueue
+    """
+    if name is None:
+        name = str(uuid4())
+    if callable(transport):
+        return transport(name=name, maxsize=maxsize, namespace=namespace)
+    if transport == 'multiprocessing':
+        return ManagerQueue(name=name, maxsize=maxsize, namespace=namespace)
+    if transport == 'redis':
+        try:
+            return RedisQueue(name, maxsize=maxsize, namespace=namespace)
+        except NameError:
+            raise ImportError("The redis transport requires the redis package.")
+    if isinstance(transport, six.string_types) and transport.startswith('tcp://'):
+        host, _, port = transport[len('tcp://'):].rpartition(':')
+        return SocketQueue(name, maxsize=maxsize, namespace=namespace, address=(host, int(port)))
+    raise ValueError("Unknown transport '%s' (use one of %s or a callable)" % (transport, ", ".join(QUEUE_TRANSPORTS)))
+
+
+class SequentialAsyncResult(object):
+    """The (already available) result of SequentialView.apply_async (mimics multiprocessing's AsyncResult)."""
+
+    def __init__(self, value):
+        self._value = value
+
+    def ready(self):
+        return True
+
+    def successful(self):
+        return True
+
+    def wait(self, timeout=None):
+        pass
+
+    def get(self, timeout=None):
+        return self._value
+
+
 class SequentialView(object):
     def map(self, *args, **kwargs):
         return list(map(*args, **kwargs))
@@ -231,7 +691,7 @@ class SequentialView(object):
         return func(*args, **kwargs)
 
     def apply_async(self, func, *args, **kwargs):
-        return func(*args, **kwargs)
+        return SequentialAsyncResult(func(*args, **kwargs))
 
     def imap(self, func, *args, **kwargs):
         return map(func, *args, **kwargs)
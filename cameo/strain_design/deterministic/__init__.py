@@ -13,3 +13,5 @@
 # limitations under the License.
 
 from .flux_variability_based import *
+from .linear_programming import *
+from .minimal_cut_sets import *
@@ -0,0 +1,317 @@
+# Copyright 2015 Novo Nordisk Foundation Center for Biosustainability, DTU.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import, print_function
+
+__all__ = ['OptKnock', 'OptKnockResult']
+
+from functools import partial
+
+import six
+from pandas import DataFrame
+from sympy import Add
+
+from cameo import config
+from cameo.core.result import Result
+from cameo.core.solver_based_model import Reaction
+from cameo.exceptions import SolveError
+from cameo.flux_analysis.analysis import effective_bounds
+from cameo.flux_analysis.flux_coupling import flux_coupling_analysis
+from cameo.strain_design import StrainDesignMethod
+from cameo.util import TimeMachine
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _is_finite(bound):
+    return bound is not None and abs(bound) < float('inf')
+
+
+class OptKnock(StrainDesignMethod):
+    """
+    OptKnock [1]: reaction knockouts that couple the production of a target to the model's objective (growth).
+
+    The bilevel problem (maximize the target flux over knockouts, while the cell maximizes model.objective) is
+    turned into a single MILP by strong duality: the dual of the inner FBA problem (mass balances and reaction
+    bounds) is added to a copy of the model, together with a constraint that forces the primal and dual objective
+    values to be equal. Every candidate (a set of fully coupled reactions, see flux_coupling_analysis) gets a binary
+    variable y (y = 0 means knocked out) that switches its reactions off in the primal and removes their columns from
+    the dual. The MILP is solved with the solver attached to model.
+
+    Parameters
+    ----------
+    model : SolverBasedModel
+        A model whose objective is the inner (cellular) objective, usually growth.
+    reactions : list
+        Reactions that may be knocked out (ids or Reaction objects). Defaults to all reactions.
+    exclude_reactions : list
+        Reactions that must not be knocked out (in addition to essential reactions and, if exclude_exchanges is
+        True, exchange reactions).
+    essential_reactions : list
+        Reactions that cannot be knocked out without killing the cell. Determined with model.essential_reactions()
+        if None.
+    exclude_exchanges : bool
+        Do not knock out exchange reactions.
+    fraction_of_optimum : float
+        Solutions need to reach at least this fraction of the maximal inner objective value of model.
+    big_m : float
+        Bound on the dual variables of the bounds of candidate reactions and on the dual constraints of knocked out
+        reactions. It needs to exceed the shadow prices of the inner problem.
+    view : SequentialView or MultiprocessingView or ipython.cluster.DirectView
+        A parallelization view (used for the flux variability analysis that determines coupled reactions and the
+        coefficients of the knockout switches).
+
+    Attributes
+    ----------
+    candidates : list
+        Lists of reaction ids that are knocked out together.
+
+    Examples
+    --------
+    >>> from cameo import models
+    >>> optknock = OptKnock(models.bigg.e_coli_core, fraction_of_optimum=0.1)
+    >>> result = optknock.run(target="EX_succ_lp_e_rp_", max_knockouts=3, max_results=5)
+
+    References
+    ----------
+    .. [1] A. P. Burgard, P. Pharkya, and C. D. Maranas, 'OptKnock: a bilevel programming framework for identifying
+    gene knockout strategies for microbial strain optimization,' Biotechnol Bioeng, vol. 84, no. 6, pp. 647-657, 2003.
+    """
+
+    def __init__(self, model, reactions=None, exclude_reactions=None, essential_reactions=None,
+                 exclude_exchanges=True, fraction_of_optimum=None, big_m=1000., view=None, *args, **kwargs):
+        super(OptKnock, self).__init__(*args, **kwargs)
+        self.big_m = big_m
+        if reactions is None:
+            reactions = set(reaction.id for reaction in model.reactions)
+        else:
+            reactions = set(getattr(reaction, 'id', reaction) for reaction in reactions)
+        if essential_reactions is None:
+            essential_reactions = [reaction.id for reaction in model.essential_reactions()]
+        excluded = set(getattr(reaction, 'id', reaction) for reaction in essential_reactions)
+        if exclude_reactions is not None:
+            excluded.update(getattr(reaction, 'id', reaction) for reaction in exclude_reactions)
+        if exclude_exchanges:
+            excluded.update(reaction.id for reaction in model.exchanges)
+        reactions = reactions.difference(excluded)
+        self.candidates = flux_coupling_analysis(model, view=view).equivalent_reactions(reactions)
+        logger.info("%i knockout candidates (sets of coupled reactions)" % len(self.candidates))
+
+        coupled = [reaction_id for group in self.candidates for reaction_id in group]
+        self._flux_ranges = effective_bounds(model, coupled, view=view) if len(coupled) > 0 else {}
+        self._inner_coefficients = self._objective_coefficients(model)
+        minimal_objective = None
+        if fraction_of_optimum is not None:
+            minimal_objective = fraction_of_optimum * model.solve().f
+
+        self._model = model.copy()
+        self._build_problem(minimal_objective)
+
+    @property
+    def model(self):
+        """The copy of the model that holds the MILP."""
+        return self._model
+
+    @staticmethod
+    def _objective_coefficients(model):
+        coefficients = model.objective.expression.as_coefficients_dict()
+        inner = {}
+        for reaction in model.reactions:
+            forward = float(coefficients.get(reaction.forward_variable, 0.))
+            reverse = float(coefficients.get(reaction.reverse_variable, 0.))
+            if forward != -reverse:
+                raise ValueError("The objective of model needs to depend on net fluxes only (reaction %s)."
+                                 % reaction.id)
+            if forward != 0:
+                inner[reaction.id] = forward
+        if model.objective.direction != 'max':
+            inner = dict((reaction_id, -coefficient) for reaction_id, coefficient in six.iteritems(inner))
+        return inner
+
+    def _build_problem(self, minimal_objective):
+        model = self._model
+        interface = model.solver.interface
+        big_m = self.big_m
+
+        switches = {}
+        self._y_vars_ids = []
+        for group in self.candidates:
+            y = interface.Variable('y_' + group[0], lb=0, ub=1, type='binary')
+            self._y_vars_ids.append(y.name)
+            for reaction_id in group:
+                switches[reaction_id] = y
+
+        metabolite_duals = dict((metabolite.id, interface.Variable('dual_' + metabolite.id))
+                                for metabolite in model.metabolites)
+        variables = list(metabolite_duals.values())
+        constraints = []
+        dual_objective = []
+        for reaction in model.reactions:
+            y = switches.get(reaction.id)
+            terms = [coefficient * metabolite_duals[metabolite.id]
+                     for metabolite, coefficient in six.iteritems(reaction.metabolites)]
+            for sign, bound, prefix in ((1., reaction.upper_bound, 'dual_ub_'),
+                                        (-1., reaction.lower_bound, 'dual_lb_')):
+                if not _is_finite(bound):
+                    continue
+                dual = interface.Variable(prefix + reaction.id, lb=0)
+                variables.append(dual)
+                terms.append(sign * dual)
+                dual_objective.append(sign * bound * dual)
+                if y is not None:
+                    # the bounds of knocked out reactions are not part of the inner problem
+                    constraints.append(interface.Constraint(dual - big_m * y, ub=0,
+                                                            name='dual_switch_%s%s' % (prefix, reaction.id)))
+            objective_coefficient = self._inner_coefficients.get(reaction.id, 0.)
+            if len(terms) == 0:
+                continue
+            expression = Add(*terms)
+            if y is None:
+                constraints.append(interface.Constraint(expression, lb=objective_coefficient, ub=objective_coefficient,
+                                                        name='dual_constraint_' + reaction.id))
+            else:
+                # the column of a knocked out reaction is removed from the inner problem
+                constraints.append(interface.Constraint(expression + big_m * y, ub=objective_coefficient + big_m,
+                                                        name='dual_constraint_ub_' + reaction.id))
+                constraints.append(interface.Constraint(expression - big_m * y, lb=objective_coefficient - big_m,
+                                                        name='dual_constraint_lb_' + reaction.id))
+                lower_bound, upper_bound = self._flux_ranges.get(reaction.id, (reaction.lower_bound,
+                                                                               reaction.upper_bound))
+                lower_bound = max(lower_bound, reaction.lower_bound)
+                upper_bound = min(upper_bound, reaction.upper_bound)
+                constraints.append(interface.Constraint(y * lower_bound - reaction.flux_expression,
+                                                        name='switch_lb_' + reaction.id, ub=0))
+                constraints.append(interface.Constraint(y * upper_bound - reaction.flux_expression,
+                                                        name='switch_ub_' + reaction.id, lb=0))
+
+        self._inner_objective = Add(*[coefficient * model.reactions.get_by_id(reaction_id).flux_expression
+                                      for reaction_id, coefficient in six.iteritems(self._inner_coefficients)])
+        # weak duality gives primal <= dual, so this forces the fluxes to be optimal for the inner problem
+        constraints.append(interface.Constraint(self._inner_objective - Add(*dual_objective), lb=0,
+                                                name='strong_duality'))
+        if minimal_objective is not None:
+            constraints.append(interface.Constraint(self._inner_objective, lb=minimal_objective,
+                                                    name='minimal_objective'))
+        y_vars = [switches[group[0]] for group in self.candidates]
+        # the number of knockouts is len(y_vars) - sum(y_vars), see run
+        self._number_of_knockouts = interface.Constraint(Add(*y_vars), lb=0, name='number_of_knockouts')
+        constraints.append(self._number_of_knockouts)
+        model.solver.add(variables + y_vars)
+        model.solver.add(constraints)
+
+    def run(self, target=None, max_knockouts=5, max_results=1, timeout=None):
+        """
+        Find knockouts that maximize the target flux at optimal growth.
+
+        Additional solutions are found by adding integer cuts that exclude every knockout set found so far (and
+        its supersets), until max_results solutions have been found or the MILP becomes infeasible.
+
+        Parameters
+        ----------
+        target : Reaction or str
+            The reaction whose flux is maximized (usually the exchange reaction of the product).
+        max_knockouts : int
+            The largest number of candidates that can be knocked out.
+        max_results : int
+            The number of knockout sets to find.
+        timeout : int
+            The time limit [seconds] per MILP.
+
+        Returns
+        -------
+        OptKnockResult
+        """
+        model = self._model
+        if isinstance(target, Reaction):
+            target = target.id
+        target = model.reactions.get_by_id(target)
+        knockouts = []
+        inner_values = []
+        target_values = []
+        with TimeMachine() as tm:
+            tm(do=partial(setattr, model.solver.configuration, 'timeout', timeout),
+               undo=partial(setattr, model.solver.configuration, 'timeout', model.solver.configuration.timeout))
+            tm(do=partial(setattr, self._number_of_knockouts, 'lb', len(self.candidates) - max_knockouts),
+               undo=partial(setattr, self._number_of_knockouts, 'lb', self._number_of_knockouts.lb))
+            objective = model.objective
+            tm(do=partial(setattr, model, 'objective',
+                          model.solver.interface.Objective(target.flux_expression, direction='max')),
+               undo=partial(setattr, model, 'objective', objective))
+
+            while len(knockouts) < max_results:
+                try:
+                    model.solve()
+                except SolveError as e:
+                    logger.info("No more knockout sets (%s)." % e)
+                    break
+                y_vars = [model.solver.variables[y_var_id] for y_var_id in self._y_vars_ids]
+                knocked_out = [(group, y_var) for group, y_var in zip(self.candidates, y_vars) if y_var.primal < .5]
+                if len(knocked_out) == 0:
+                    logger.info("No knockouts improve the production of %s." % target.id)
+                    break
+                knockouts.append([group for group, _ in knocked_out])
+                inner_values.append(round(sum(coefficient * model.reactions.get_by_id(reaction_id).flux
+                                              for reaction_id, coefficient in six.iteritems(self._inner_coefficients)),
+                                          config.ndecimals))
+                target_values.append(round(target.flux, config.ndecimals))
+                integer_cut = model.solver.interface.Constraint(Add(*[y_var for _, y_var in knocked_out]), lb=1,
+                                                                name="integer_cut_%i" % len(knockouts))
+                logger.debug('Adding integer cut.')
+                tm(do=partial(model.solver.add, integer_cut), undo=partial(model.solver.remove, integer_cut))
+        return OptKnockResult(knockouts, inner_values, target_values, target.id, max_knockouts)
+
+
+class OptKnockResult(Result):
+    """Knockout sets found by OptKnock.
+
+    Attributes
+    ----------
+    knockouts : list
+        Every solution is a list of knocked out candidates (lists of coupled reaction ids).
+    objective_values : list
+        The inner objective value (growth) of every solution.
+    target_values : list
+        The (optimistic) target flux of every solution at that objective value.
+    """
+
+    def __init__(self, knockouts, objective_values, target_values, target, max_knockouts, *args, **kwargs):
+        super(OptKnockResult, self).__init__(*args, **kwargs)
+        self.knockouts = knockouts
+        self.objective_values = objective_values
+        self.target_values = target_values
+        self.target = target
+        self.max_knockouts = max_knockouts
+
+    def __len__(self):
+        return len(self.knockouts)
+
+    def __iter__(self):
+        return iter(self.knockouts)
+
+    @property
+    def data_frame(self):
+        return DataFrame({
+            'Knockouts': [tuple(group[0] for group in solution) for solution in self.knockouts],
+            'Size': [len(solution) for solution in self.knockouts],
+            'Objective': self.objective_values,
+            self.target: self.target_values
+        }, columns=['Knockouts', 'Size', 'Objective', self.target])
+
+    def plot(self, grid=None, width=None, height=None, title=None):
+        raise NotImplementedError('Plotting of OptKnock results has not been implemented yet.')
+
+    def _repr_html_(self):
+        return self.data_frame._repr_html_()
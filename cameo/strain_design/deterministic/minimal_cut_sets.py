@@ -0,0 +1,328 @@
+# Copyright 2015 Novo Nordisk Foundation Center for Biosustainability, DTU.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Minimal cut sets: minimal sets of reactions whose removal blocks a target (for example growth or production).
+
+Cut sets are the supports of solutions of the dual network [1]: by Farkas' lemma, the target region
+{S r = 0, lb <= r <= ub, r[target] >= threshold} is infeasible after reactions C are removed if and only if there
+are u (free) and w >= 0 such that, for every reaction j not in C,
+
+    (S^T u)_j + w_ub_j - w_lb_j - w_target * [j == target] = 0,
+
+and ub^T w_ub - lb^T w_lb - threshold * w_target < 0. Binary variables allow the equation of a reaction to be
+violated (within +/- big_m) if the reaction is cut; the bound multipliers of a cut reaction are forced to zero,
+since knocking it out sets its bounds to zero. Minimizing their sum yields the smallest cut sets first, and
+integer cuts exclude the supersets of the cut sets found so far [2].
+
+References
+----------
+.. [1] A. Ballerstein, A. von Kamp, S. Klamt, and U.-U. Haus, 'Minimal cut sets in a metabolic network are elementary
+modes in a dual network,' Bioinformatics, vol. 28, no. 3, pp. 381-387, 2012.
+.. [2] A. von Kamp and S. Klamt, 'Enumeration of smallest intervention strategies in genome-scale metabolic
+networks,' PLoS Comput Biol, vol. 10, no. 1, e1003378, 2014.
+"""
+
+from __future__ import absolute_import, print_function
+
+__all__ = ['MinimalCutSets', 'MinimalCutSetsResult']
+
+from functools import partial
+
+import six
+from pandas import DataFrame
+from six.moves import range
+from sympy import Add
+
+from cameo import config
+from cameo.core.result import Result
+from cameo.core.solver_based_model import Reaction
+from cameo.exceptions import SolveError
+from cameo.strain_design import StrainDesignMethod
+from cameo.util import TimeMachine
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _is_finite(bound):
+    return bound is not None and abs(bound) < float('inf')
+
+
+def _is_cut_set(model, cut_set, target, threshold):
+    """True if target cannot reach threshold once the reactions in cut_set are knocked out."""
+    with TimeMachine() as tm:
+        for reaction_id in cut_set:
+            model.reactions.get_by_id(reaction_id).knock_out(time_machine=tm)
+        tm(do=partial(setattr, model, 'objective', model.reactions.get_by_id(target)),
+           undo=partial(setattr, model, 'objective', model.objective))
+        try:
+            return round(model.solve().f, config.ndecimals) < threshold
+        except SolveError as e:
+            logger.debug(e)
+            return True
+
+
+def _minimize(model, cut_set, target, threshold):
+    """A minimal cut set contained in cut_set (reactions are dropped one by one as long as the rest is a cut set)."""
+    cut_set = set(cut_set)
+    for reaction_id in sorted(cut_set):
+        if _is_cut_set(model, cut_set - set([reaction_id]), target, threshold):
+            cut_set.remove(reaction_id)
+    return frozenset(cut_set)
+
+
+class _DualNetwork(object):
+    """The dual network MILP of a model. Cuts are added in place, so the solver can start from its last solution."""
+
+    def __init__(self, model, target, threshold, candidates, big_m, timeout=None):
+        interface = model.solver.interface
+        self.problem = interface.Model()
+        self.problem.configuration.timeout = timeout
+        self._x_vars = dict((reaction_id, interface.Variable('x_' + reaction_id, lb=0, ub=1, type='binary'))
+                            for reaction_id in candidates)
+        self._reaction_ids = dict((x_var.name, reaction_id) for reaction_id, x_var in six.iteritems(self._x_vars))
+        metabolite_duals = dict((metabolite.id, interface.Variable('u_' + metabolite.id))
+                                for metabolite in model.metabolites)
+        target_dual = interface.Variable('w_target', lb=0)
+        constraints = []
+        farkas = [-threshold * target_dual]
+        for reaction in model.reactions:
+            x_var = self._x_vars.get(reaction.id)
+            terms = [coefficient * metabolite_duals[metabolite.id]
+                     for metabolite, coefficient in six.iteritems(reaction.metabolites)]
+            for sign, bound, prefix in ((1., reaction.upper_bound, 'w_ub_'), (-1., reaction.lower_bound, 'w_lb_')):
+                if _is_finite(bound):
+                    dual = interface.Variable(prefix + reaction.id, lb=0)
+                    terms.append(sign * dual)
+                    farkas.append(sign * bound * dual)
+                    if x_var is not None:
+                        # cutting a reaction sets its bounds to zero, so they cannot be part of the certificate
+                        constraints.append(interface.Constraint(dual + big_m * x_var, ub=big_m,
+                                                                name='switch_%s%s' % (prefix, reaction.id)))
+            if reaction.id == target:
+                terms.append(-target_dual)
+            if len(terms) == 0:
+                continue
+            expression = Add(*terms)
+            if x_var is None:
+                constraints.append(interface.Constraint(expression, lb=0, ub=0, name='c_' + reaction.id))
+            else:
+                constraints.append(interface.Constraint(expression - big_m * x_var, ub=0, name='c_ub_' + reaction.id))
+                constraints.append(interface.Constraint(expression + big_m * x_var, lb=0, name='c_lb_' + reaction.id))
+        # the multipliers can be scaled, so < 0 becomes <= -threshold (which keeps w_target around 1 and the other
+        # multipliers close to the shadow prices of the target, i.e. well below big_m)
+        constraints.append(interface.Constraint(Add(*farkas), ub=-threshold, name='farkas'))
+        self._size = interface.Constraint(Add(*self._x_vars.values()), lb=1, name='size')
+        constraints.append(self._size)
+        self.problem.add(constraints)
+        self.problem.objective = interface.Objective(Add(*self._x_vars.values()), direction='min')
+        self._cuts = 0
+
+    def set_size(self, min_size, max_size):
+        self._size.ub = max_size
+        self._size.lb = min_size
+
+    def solve(self):
+        """The next cut set (None if there are no more)."""
+        status = self.problem.optimize()
+        if status != 'optimal':
+            logger.debug("Dual network status: %s" % status)
+            return None
+        return frozenset(self._reaction_ids[x_var.name] for x_var in six.itervalues(self._x_vars) if x_var.primal > .5)
+
+    def exclude_supersets(self, cut_set):
+        self.exclude(cut_set, supersets=True)
+
+    def exclude(self, cut_set, supersets=False):
+        """Add an integer cut against cut_set (and, if supersets is True, against all its supersets)."""
+        self._cuts += 1
+        x_vars = [self._x_vars[reaction_id] for reaction_id in cut_set]
+        if supersets:
+            # no solution may contain all reactions of cut_set
+            cut = self.problem.interface.Constraint(Add(*x_vars), ub=len(x_vars) - 1, name='cut_%i' % self._cuts)
+        else:
+            others = [x_var for x_var in six.itervalues(self._x_vars) if x_var not in x_vars]
+            cut = self.problem.interface.Constraint(Add(*x_vars) - Add(*others), ub=len(x_vars) - 1,
+                                                    name='cut_%i' % self._cuts)
+        self.problem.add(cut)
+
+
+class _SizeClassFunctionObject(object):
+    """Enumerates the minimal cut sets of one size (for parallel views).
+
+    Minimal cut sets of other sizes are not known, so every cut set found is reduced to a minimal one; if that one
+    is smaller, only its supersets are excluded (it belongs to another size class).
+    """
+
+    def __init__(self, model, target, threshold, candidates, big_m, max_results, timeout):
+        self.model = model
+        self.target = target
+        self.threshold = threshold
+        self.candidates = candidates
+        self.big_m = big_m
+        self.max_results = max_results
+        self.timeout = timeout
+
+    def __call__(self, size):
+        network = _DualNetwork(self.model, self.target, self.threshold, self.candidates, self.big_m, self.timeout)
+        network.set_size(size, size)
+        cut_sets = []
+        while len(cut_sets) < self.max_results:
+            cut_set = network.solve()
+            if cut_set is None:
+                break
+            if not _is_cut_set(self.model, cut_set, self.target, self.threshold):
+                logger.warning("Discarding %s (numerical issues in the dual network)." % sorted(cut_set))
+                network.exclude(cut_set)
+                continue
+            minimal = _minimize(self.model, cut_set, self.target, self.threshold)
+            if len(minimal) == size:
+                cut_sets.append(minimal)
+            network.exclude_supersets(minimal)
+        return cut_sets
+
+
+class MinimalCutSets(StrainDesignMethod):
+    """
+    Minimal cut sets: minimal sets of reactions that block a target when they are knocked out.
+
+    Cut sets are enumerated with the dual network MILP (see the module documentation), smallest first. Blocking
+    growth (target = the biomass reaction) yields lethal knockout sets, blocking the production of a by-product
+    yields intervention strategies. Only mass balances and reaction bounds are considered (other constraints of
+    model.solver are ignored).
+
+    Parameters
+    ----------
+    model : SolverBasedModel
+    target : Reaction or str
+        The reaction to block.
+    threshold : float
+        target counts as blocked if its maximal flux is below threshold (defaults to
+        config.non_zero_flux_threshold).
+    reactions : list
+        Reactions that may be cut (ids or Reaction objects). Defaults to all reactions.
+    exclude_reactions : list
+        Reactions that must not be cut (target itself is never cut).
+    big_m : float
+        Bound on the violation of the dual constraints of cut reactions.
+
+    Examples
+    --------
+    >>> from cameo import models
+    >>> model = models.bigg.e_coli_core
+    >>> result = MinimalCutSets(model, model.reactions.Biomass_Ecoli_core_w_GAM).run(max_size=2)
+    """
+
+    def __init__(self, model, target, threshold=None, reactions=None, exclude_reactions=None, big_m=1000., *args,
+                 **kwargs):
+        super(MinimalCutSets, self).__init__(*args, **kwargs)
+        self.model = model
+        if isinstance(target, Reaction):
+            target = target.id
+        self.target = model.reactions.get_by_id(target).id
+        if threshold is None:
+            threshold = config.non_zero_flux_threshold
+        self.threshold = threshold
+        if reactions is None:
+            reactions = [reaction.id for reaction in model.reactions]
+        else:
+            reactions = [model.reactions.get_by_id(getattr(reaction, 'id', reaction)).id for reaction in reactions]
+        excluded = set()
+        if exclude_reactions is not None:
+            excluded.update(getattr(reaction, 'id', reaction) for reaction in exclude_reactions)
+        excluded.add(self.target)
+        self.candidates = [reaction_id for reaction_id in reactions if reaction_id not in excluded]
+        self.big_m = big_m
+
+    def run(self, max_size=3, max_results=float('inf'), view=None, timeout=None):
+        """
+        Enumerate the minimal cut sets of up to max_size reactions.
+
+        Parameters
+        ----------
+        max_size : int
+            The largest cut set size.
+        max_results : int
+            Stop after max_results cut sets (per size class, if view is given).
+        view : SequentialView or MultiprocessingView or ipython.cluster.DirectView
+            If given, every size class is enumerated with its own MILP on view. Otherwise a single MILP is
+            solved again after every cut set, with an integer cut against its supersets.
+        timeout : int
+            The time limit [seconds] per MILP solution.
+
+        Returns
+        -------
+        MinimalCutSetsResult
+        """
+        if _is_cut_set(self.model, [], self.target, self.threshold):
+            raise ValueError("%s cannot carry a flux of %s in the first place." % (self.target, self.threshold))
+        if view is None:
+            cut_sets = self._enumerate(max_size, max_results, timeout)
+        else:
+            func_obj = _SizeClassFunctionObject(self.model, self.target, self.threshold, self.candidates, self.big_m,
+                                                max_results, timeout)
+            cut_sets = [cut_set for size_class in view.map(func_obj, list(range(1, max_size + 1)))
+                        for cut_set in size_class]
+        cut_sets.sort(key=lambda cut_set: (len(cut_set), sorted(cut_set)))
+        return MinimalCutSetsResult(cut_sets, self.target, self.threshold, max_size)
+
+    def _enumerate(self, max_size, max_results, timeout):
+        network = _DualNetwork(self.model, self.target, self.threshold, self.candidates, self.big_m, timeout)
+        network.set_size(1, max_size)
+        cut_sets = []
+        while len(cut_sets) < max_results:
+            cut_set = network.solve()
+            if cut_set is None:
+                break
+            if _is_cut_set(self.model, cut_set, self.target, self.threshold):
+                if timeout is not None:
+                    # only optimal solutions are minimal (smaller cut sets would have been found first)
+                    cut_set = _minimize(self.model, cut_set, self.target, self.threshold)
+                cut_sets.append(cut_set)
+                network.exclude_supersets(cut_set)
+            else:
+                logger.warning("Discarding %s (numerical issues in the dual network)." % sorted(cut_set))
+                network.exclude(cut_set)
+        return cut_sets
+
+
+class MinimalCutSetsResult(Result):
+    """Minimal cut sets (frozensets of reaction ids), smallest first."""
+
+    def __init__(self, cut_sets, target, threshold, max_size, *args, **kwargs):
+        super(MinimalCutSetsResult, self).__init__(*args, **kwargs)
+        self.cut_sets = cut_sets
+        self.target = target
+        self.threshold = threshold
+        self.max_size = max_size
+
+    def __len__(self):
+        return len(self.cut_sets)
+
+    def __iter__(self):
+        return iter(self.cut_sets)
+
+    @property
+    def data_frame(self):
+        return DataFrame({
+            'Reactions': [tuple(sorted(cut_set)) for cut_set in self.cut_sets],
+            'Size': [len(cut_set) for cut_set in self.cut_sets]
+        }, columns=['Reactions', 'Size'])
+
+    def plot(self, grid=None, width=None, height=None, title=None):
+        raise NotImplementedError('Plotting of minimal cut sets has not been implemented yet.')
+
+    def _repr_html_(self):
+        return self.data_frame._repr_html_()
@@ -15,22 +15,120 @@ from __future__ import absolute_import, print_function
 
 __all__ = ['BestSolutionArchiver']
 
-from bisect import insort
+import six
+
+from cameo.strain_design.heuristic.genomes import BitSet
 
 
 class BestSolutionArchiver(object):
+    """Keeps the best solutions, sorted by fitness (best first).
+
+    Solutions with the same fitness as a solution with a subset of their knockouts are not kept. To avoid
+    scanning the whole archive for every new individual, solutions are indexed by fitness, and the solutions
+    with the same fitness by candidate set and by element, so that add only looks at the solutions that share
+    the new solution's fitness and at least one of its elements.
+    """
+
     def __init__(self):
         self.__name__ = self.__class__.__name__
         self.worst_fitness = None
         self.archive = []
+        self._groups = {}
 
     def __call__(self, random, population, archive, args):
-        self.archive = archive
+        if len(archive) == 0:
+            # a new run (archivers are reused between runs)
+            self.worst_fitness = None
+        if archive is not self.archive:
+            self.archive = archive
+            self._reindex()
         maximize = args.get("maximize", True)
         size = args.get('max_archive_size', 100)
         [self.add(individual.candidate, individual.fitness, size, maximize) for individual in population]
         return self.archive
 
+    def __getstate__(self):
+        # the index is rebuilt when unpickled (e.g. from a checkpoint)
+        state = self.__dict__.copy()
+        del state['_groups']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._reindex()
+
+    def _reindex(self):
+        self._groups = {}
+        for solution in self.archive:
+            self._index(solution)
+
+    def _index(self, solution):
+        group = self._groups.setdefault(solution.fitness, ({}, {}, {}))
+        members, sets, postings = group
+        members[id(solution)] = solution
+        sets[frozenset(solution.candidate)] = solution
+        for element in solution.candidate:
+            postings.setdefault(element, {})[id(solution)] = solution
+
+    def _unindex(self, solution):
+        members, sets, postings = self._groups[solution.fitness]
+        del members[id(solution)]
+        key = frozenset(solution.candidate)
+        if sets.get(key) is solution:
+            del sets[key]
+        for element in solution.candidate:
+            del postings[element][id(solution)]
+        if len(members) == 0:
+            del self._groups[solution.fitness]
+
+    def _relations(self, candidate, fitness):
+        """Solutions with the same fitness that are subsets (including the same set) and strict supersets of
+        candidate."""
+        try:
+            members, sets, postings = self._groups[fitness]
+        except KeyError:
+            return [], []
+        same = sets.get(frozenset(candidate.candidate))
+        if same is not None:
+            return [same], []
+        shared = {}
+        for element in candidate.candidate:
+            for key in postings.get(element, ()):
+                shared[key] = shared.get(key, 0) + 1
+        size = len(candidate.candidate)
+        if size == 0:
+            return [], list(six.itervalues(members))
+        subsets, supersets = [], []
+        empty = sets.get(frozenset())
+        if empty is not None:
+            subsets.append(empty)
+        for key, count in six.iteritems(shared):
+            solution = members[key]
+            if count == len(solution.candidate):
+                subsets.append(solution)
+            elif count == size:
+                supersets.append(solution)
+        return subsets, supersets
+
+    def _position(self, fitness, maximize):
+        """The position after the last solution whose fitness is at least as good as fitness."""
+        low, high = 0, len(self.archive)
+        while low < high:
+            middle = (low + high) // 2
+            other = self.archive[middle].fitness
+            if (other < fitness) if maximize else (other > fitness):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def _remove(self, solution, maximize):
+        position = self._position(solution.fitness, maximize) - 1
+        while self.archive[position] is not solution:
+            position -= 1
+        del self.archive[position]
+        self._unindex(solution)
+
     def add(self, candidate, fitness, max_size, maximize=True):
         if self.worst_fitness is None:
             self.worst_fitness = fitness
@@ -38,20 +136,18 @@ class BestSolutionArchiver(object):
         if fitness >= self.worst_fitness:
 
             candidate = SolutionTuple(candidate, fitness, maximize)
-            add = True
-            for c in self.archive:
-                if c == candidate:
-                    add = False
-                elif c.improves(candidate) and candidate.fitness == c.fitness:
-                    add = False
-                elif candidate.improves(c) and candidate.fitness == c.fitness:
-                    self.archive.remove(c)
+            subsets, supersets = self._relations(candidate, fitness)
+            # a solution with the same fitness and the same or fewer knockouts is already known
+            add = len(subsets) == 0
+            for solution in supersets:
+                self._remove(solution, maximize)
 
             if add:
-                insort(self.archive, candidate)
+                self.archive.insert(self._position(fitness, maximize), candidate)
+                self._index(candidate)
 
             while self.length() > max_size:
-                self.archive.pop()
+                self._unindex(self.archive.pop())
 
             self.worst_fitness = self.archive[len(self.archive) - 1].fitness
 
@@ -68,7 +164,8 @@ class BestSolutionArchiver(object):
 
 class SolutionTuple(object):
     def __init__(self, candidate, fitness, maximize=True):
-        self.candidate = set(candidate)
+        # BitSets are kept as they are, their subset and difference operations are bit operations
+        self.candidate = candidate if isinstance(candidate, BitSet) else set(candidate)
         self.fitness = fitness
         self.maximize = maximize
 
@@ -0,0 +1,278 @@
+# Copyright 2015 Novo Nordisk Foundation Center for Biosustainability, DTU.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import absolute_import, print_function
+
+__all__ = ['FitnessCache', 'SQLiteFitnessStore', 'evaluation_scope']
+
+import os
+import hashlib
+import sqlite3
+import zlib
+from collections import OrderedDict
+
+import six
+from six.moves import range
+from six.moves import cPickle as pickle
+
+from cameo.util import model_fingerprint
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _digest(obj, digest):
+    if isinstance(obj, dict):
+        for key in sorted(obj, key=str):
+            digest.update(repr(key).encode('utf-8'))
+            _digest(obj[key], digest)
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            _digest(item, digest)
+    elif hasattr(obj, 'name') and isinstance(obj.name, six.string_types):
+        digest.update(obj.name.encode('utf-8'))
+    elif hasattr(obj, '__name__'):
+        digest.update(obj.__name__.encode('utf-8'))
+    else:
+        digest.update(repr(obj).encode('utf-8'))
+
+
+def evaluation_scope(model, simulation_method, simulation_kwargs, objective_function, representation=None,
+                     ko_type=None):
+    """A digest of everything (except the knockouts) that determines the fitness of a candidate.
+
+    Parameters
+    ----------
+    model : SolverBasedModel
+    simulation_method : see flux_analysis.simulation
+    simulation_kwargs : dict
+        The extra parameters passed to the simulation method.
+    objective_function : objective function or list(objective function)
+    representation : list, optional
+        The knockout targets candidates are encoded against. Required if candidates are keyed
+        by their indices, omit it if they are keyed by target ids.
+    ko_type : str, optional
+        The type of knockout targets (e.g. 'reaction' or 'gene').
+
+    Returns
+    -------
+    str
+        A hexadecimal md5 digest.
+    """
+    digest = hashlib.md5(model_fingerprint(model).encode('utf-8'))
+    _digest([simulation_method, simulation_kwargs, objective_function], digest)
+    if representation is not None:
+        _digest(list(representation), digest)
+    if ko_type is not None:
+        _digest(ko_type, digest)
+    return digest.hexdigest()
+
+
+class FitnessCache(object):
+    """A bounded least-recently-used cache for candidate fitness.
+
+    Keys are (scope, frozenset(candidate)) tuples (see evaluation_scope).
+
+    Attributes
+    ----------
+    maxsize : int
+        Maximum number of entries. The least recently used entries are evicted first.
+    hits : int
+    misses : int
+    evictions : int
+    """
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __getitem__(self, key):
+        try:
+            value = self._data.pop(key)
+        except KeyError:
+            self.misses += 1
+            raise
+        self._data[key] = value
+        self.hits += 1
+        return value
+
+    def __setitem__(self, key, value):
+        self._data.pop(key, None)
+        self._data[key] = value
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def clear(self):
+        self._data.clear()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0.
+        return self.hits / float(lookups)
+
+    @property
+    def stats(self):
+        return {'size': len(self), 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'hit_rate': self.hit_rate}
+
+    def __repr__(self):
+        return "<FitnessCache %d/%d entries, hit rate %.1f%%>" % (len(self), self.maxsize, self.hit_rate * 100)
+
+
+class SQLiteFitnessStore(object):
+    """A persistent fitness store that can be shared by processes (workers, islands or consecutive runs).
+
+    Entries are keyed by scope (see evaluation_scope) and the sorted ids of the knocked out targets.
+    The database uses write-ahead logging, so readers do not block writers. Connections are opened lazily
+    in every process, so the store can be pickled and sent to workers.
+
+    Parameters
+    ----------
+    path : str
+        The database file (will be created if it does not exist).
+    keep_fluxes : bool
+        Also store (compressed) flux distributions of evaluated candidates.
+    timeout : float
+        Seconds to wait for a lock held by another process.
+    """
+
+    _MAX_VARIABLES = 500
+
+    def __init__(self, path, keep_fluxes=False, timeout=60.):
+        self.path = path
+        self.keep_fluxes = keep_fluxes
+        self.timeout = timeout
+        self._connection = None
+        self._pid = None
+
+    def __getstate__(self):
+        return {'path': self.path, 'keep_fluxes': self.keep_fluxes, 'timeout': self.timeout}
+
+    def __setstate__(self, d):
+        self.__init__(**d)
+
+    def __repr__(self):
+        return "<SQLiteFitnessStore %s>" % self.path
+
+    @property
+    def connection(self):
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, timeout=self.timeout)
+            self._pid = os.getpid()
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS fitness ("
+                                     "scope TEXT NOT NULL, knockouts TEXT NOT NULL, value BLOB NOT NULL, fluxes BLOB, "
+                                     "PRIMARY KEY (scope, knockouts))")
+            self._connection.commit()
+        return self._connection
+
+    @staticmethod
+    def key(knockouts):
+        """Canonical key for a collection of target ids."""
+        return "\t".join(sorted(knockouts))
+
+    def get_many(self, scope, knockouts):
+        """Look up stored fitness values.
+
+        Parameters
+        ----------
+        scope : str
+        knockouts : iterable
+            Collections of target ids.
+
+        Returns
+        -------
+        dict
+            {key: fitness} for the entries that were found (see SQLiteFitnessStore.key).
+        """
+        keys = list(set(self.key(k) for k in knockouts))
+        found = {}
+        for i in range(0, len(keys), self._MAX_VARIABLES):
+            chunk = keys[i:i + self._MAX_VARIABLES]
+            query = "SELECT knockouts, value FROM fitness WHERE scope = ? AND knockouts IN (%s)" % ",".join(
+                "?" * len(chunk))
+            for key, value in self.connection.execute(query, [scope] + chunk):
+                found[key] = pickle.loads(bytes(value))
+        return found
+
+    def get(self, scope, knockouts, default=None):
+        return self.get_many(scope, [knockouts]).get(self.key(knockouts), default)
+
+    def put_many(self, scope, entries):
+        """Store fitness values.
+
+        Parameters
+        ----------
+        scope : str
+        entries : iterable
+            (knockouts, fitness, fluxes) tuples. fluxes is ignored unless keep_fluxes is True and may be None.
+        """
+        rows = []
+        for knockouts, fitness, fluxes in entries:
+            if self.keep_fluxes and fluxes is not None:
+                fluxes = sqlite3.Binary(zlib.compress(pickle.dumps(dict(fluxes), 2)))
+            else:
+                fluxes = None
+            rows.append((scope, self.key(knockouts), sqlite3.Binary(pickle.dumps(fitness, 2)), fluxes))
+        if len(rows) > 0:
+            try:
+                with self.connection:
+                    self.connection.executemany("INSERT OR REPLACE INTO fitness VALUES (?, ?, ?, ?)", rows)
+            except sqlite3.OperationalError as e:
+                # The store only saves work, so losing a batch (e.g. because of lock timeouts) is not fatal.
+                logger.warning("Could not write %i entries to %s: %s" % (len(rows), self, e))
+
+    def put(self, scope, knockouts, fitness, fluxes=None):
+        self.put_many(scope, [(knockouts, fitness, fluxes)])
+
+    def fluxes(self, scope, knockouts):
+        """The stored flux distribution ({reaction_id: flux}) of a candidate or None."""
+        row = self.connection.execute("SELECT fluxes FROM fitness WHERE scope = ? AND knockouts = ?",
+                                      (scope, self.key(knockouts))).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return pickle.loads(zlib.decompress(bytes(row[0])))
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM fitness").fetchone()[0]
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
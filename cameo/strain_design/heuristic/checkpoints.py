@@ -0,0 +1,151 @@
+# Copyright 2015 Novo Nordisk Foundation Center for Biosustainability, DTU.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import absolute_import, print_function
+
+__all__ = ['CheckpointObserver', 'save_checkpoint', 'load_checkpoint']
+
+import os
+import time
+import types
+
+from six.moves import cPickle as pickle
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 1
+
+
+def save_checkpoint(path, ec, fitness_cache=None):
+    """Write the state of a running evolutionary computation to path.
+
+    The checkpoint is first written to a temporary file in the same directory, which then replaces path,
+    so an interrupted write never leaves a corrupt checkpoint behind.
+
+    Parameters
+    ----------
+    path : str
+    ec : inspyred.ec.EvolutionaryComputation
+    fitness_cache : FitnessCache
+    """
+    checkpoint = {
+        'version': CHECKPOINT_VERSION,
+        'population': [(individual.candidate, individual.fitness) for individual in ec.population],
+        'archive': ec.archive,
+        'archiver': None if isinstance(ec.archiver, types.FunctionType) else ec.archiver,
+        'random_state': ec._random.get_state(),
+        'num_evaluations': ec.num_evaluations,
+        'num_generations': ec.num_generations,
+        'fitness_cache': [] if fitness_cache is None else list(fitness_cache._data.items())
+    }
+    tmp_path = "%s.tmp" % path
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(checkpoint, f, 2)
+        f.flush()
+        os.fsync(f.fileno())
+    if hasattr(os, 'replace'):
+        os.replace(tmp_path, path)
+    else:
+        os.rename(tmp_path, path)
+    logger.debug("Checkpoint written to %s at generation %i" % (path, ec.num_generations))
+
+
+def load_checkpoint(path):
+    """Read a checkpoint written by save_checkpoint.
+
+    Returns
+    -------
+    dict
+    """
+    with open(path, 'rb') as f:
+        checkpoint = pickle.load(f)
+    if checkpoint.get('version') != CHECKPOINT_VERSION:
+        raise ValueError("%s is not a compatible checkpoint (version %s)" % (path, checkpoint.get('version')))
+    return checkpoint
+
+
+class CheckpointObserver(object):
+    """
+    Writes checkpoints every n generations and/or t seconds (and when the run ends).
+
+    When resuming, the population of the checkpoint has to be passed to the algorithm as seeds. The observer
+    then restores archive, archiver, counters and random state on its first call (right after the seeds have
+    been evaluated), so it must be the first observer.
+
+    Parameters
+    ----------
+    path : str
+        Checkpoint file. No checkpoints are written if None.
+    fitness_cache : FitnessCache
+        A fitness cache to include in checkpoints.
+    generations : int
+        Number of generations between checkpoints (None to disable).
+    seconds : float
+        Number of seconds between checkpoints (None to disable).
+    resume : dict
+        A checkpoint (see load_checkpoint) to restore.
+    """
+    __name__ = "Checkpoint Observer"
+
+    def __init__(self, path, fitness_cache=None, generations=10, seconds=None, resume=None):
+        self.path = path
+        self.fitness_cache = fitness_cache
+        self.generations = generations
+        self.seconds = seconds
+        self.resume = resume
+        self._ec = None
+        self._last_generation = 0
+        self._last_time = time.time()
+
+    def __call__(self, population, num_generations, num_evaluations, args):
+        self._ec = args['_ec']
+        if self.resume is not None:
+            self._restore(self._ec, self.resume)
+            self.resume = None
+        elif self._is_due(num_generations):
+            self.save()
+
+    def _is_due(self, num_generations):
+        if self.path is None:
+            return False
+        if self.generations is not None and num_generations - self._last_generation >= self.generations:
+            return True
+        return self.seconds is not None and time.time() - self._last_time >= self.seconds
+
+    def _restore(self, ec, checkpoint):
+        logger.info("Resuming from generation %i (%i evaluations)" % (checkpoint['num_generations'],
+                                                                     checkpoint['num_evaluations']))
+        ec.archive = checkpoint['archive']
+        if checkpoint['archiver'] is not None:
+            ec.archiver = checkpoint['archiver']
+        ec._random.set_state(checkpoint['random_state'])
+        ec.num_evaluations = checkpoint['num_evaluations']
+        ec.num_generations = checkpoint['num_generations']
+        self._last_generation = ec.num_generations
+        self._last_time = time.time()
+
+    def save(self):
+        if self.path is not None and self._ec is not None:
+            save_checkpoint(self.path, self._ec, self.fitness_cache)
+            self._last_generation = self._ec.num_generations
+            self._last_time = time.time()
+
+    def reset(self):
+        self._ec = None
+        self._last_generation = 0
+        self._last_time = time.time()
+
+    def end(self):
+        self.save()
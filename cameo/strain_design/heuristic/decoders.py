@@ -16,8 +16,6 @@ from __future__ import absolute_import
 
 __all__ = ['ReactionKnockoutDecoder', 'GeneKnockoutDecoder']
 
-from cobra.manipulation.delete import find_gene_knockout_reactions
-
 
 class KnockoutDecoder(object):
     def __init__(self, representation, model, *args, **kwargs):
@@ -50,7 +48,7 @@ class ReactionKnockoutDecoder(KnockoutDecoder):
         Parameters
         ----------
 
-        individual : list
+        individual : list or BitSet
             a list of integers
 
         Returns
@@ -82,7 +80,7 @@ class GeneKnockoutDecoder(KnockoutDecoder):
         Parameters
         ----------
 
-        individual : list
+        individual : list or BitSet
             a list of integers
 
         Returns
@@ -92,5 +90,5 @@ class GeneKnockoutDecoder(KnockoutDecoder):
 
         """
         genes = [self.model.genes.get_by_id(self.representation[index]) for index in individual]
-        reactions = find_gene_knockout_reactions(self.model, genes)
+        reactions = self.model.gpr_index.knockout_reactions(self.model, genes)
         return [reactions, genes]
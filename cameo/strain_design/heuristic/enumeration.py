@@ -0,0 +1,124 @@
+# Copyright 2015 Novo Nordisk Foundation Center for Biosustainability, DTU.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Building blocks for the exhaustive enumeration of small knockout sets (see KnockoutOptimization.enumerate_knockouts).
+
+Knocking out more targets only removes flux distributions from a model, so two properties of a knockout set hold
+for all of its supersets: if the mutant is lethal (has no feasible solution), so are all mutants that knock out
+more targets; and a fitness bound derived from the flux ranges of the mutant (see
+ObjectiveFunction.superset_bound) bounds the fitness of all those mutants too. Knockout sets are enumerated level
+by level (by size), and a set is only visited if none of its subsets was pruned.
+"""
+
+from __future__ import absolute_import, print_function
+
+__all__ = ['SupersetBoundEvaluator', 'next_level']
+
+from collections import OrderedDict
+
+import six
+from six.moves import range
+
+from cameo.exceptions import SolveError
+from cameo.parallel import SequentialView
+from cameo.flux_analysis.analysis import flux_variability_analysis
+from cameo.util import TimeMachine
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def next_level(alive):
+    """The knockout sets of the next size whose subsets are all alive (Apriori candidate generation).
+
+    Parameters
+    ----------
+    alive : iterable
+        Sorted tuples of the same size (the sets of the current level that were not pruned).
+
+    Returns
+    -------
+    list
+        Sorted tuples with one more element, in lexicographic order.
+    """
+    alive = set(alive)
+    prefixes = OrderedDict()
+    for knockouts in sorted(alive):
+        prefixes.setdefault(knockouts[:-1], []).append(knockouts[-1])
+    candidates = []
+    for prefix, lasts in six.iteritems(prefixes):
+        for i, first in enumerate(lasts):
+            for second in lasts[i + 1:]:
+                candidate = prefix + (first, second)
+                # the subsets without first or second are alive by construction
+                if all(candidate[:j] + candidate[j + 1:] in alive for j in range(len(prefix))):
+                    candidates.append(candidate)
+    return candidates
+
+
+class SupersetBoundEvaluator(object):
+    """
+    Determines if knockout sets are lethal and bounds the fitness of all their supersets.
+
+    Returns (viable, bound) tuples: viable is False if the mutant has no feasible solution (or cannot reach
+    min_growth) and bound is an upper bound of the fitness of the mutant and of all mutants that knock out more
+    targets (see ObjectiveFunction.superset_bound; None if no bound is known).
+
+    Parameters
+    ----------
+    model : SolverBasedModel
+    decoder : KnockoutDecoder
+    objective_function : ObjectiveFunction
+    min_growth : float
+        Mutants whose maximal objective value (usually growth) is below min_growth count as lethal.
+    with_bounds : bool
+        Determine bounds (only lethality is checked otherwise).
+    """
+
+    def __init__(self, model, decoder, objective_function, min_growth=None, with_bounds=True):
+        self.model = model
+        self.decoder = decoder
+        self.objective_function = objective_function
+        self.min_growth = min_growth
+        self.with_bounds = with_bounds
+
+    def __call__(self, candidates):
+        return [self.screen(candidate) for candidate in candidates]
+
+    def screen(self, candidate):
+        decoded = self.decoder(frozenset(candidate))
+        with TimeMachine() as tm:
+            for reaction in decoded[0]:
+                reaction.knock_out(time_machine=tm)
+            try:
+                objective_value = self.model.solve().f
+            except SolveError as e:
+                logger.debug(e)
+                return False, None
+            if self.min_growth is not None and objective_value < self.min_growth:
+                return False, None
+            flux_ids = getattr(self.objective_function, 'flux_ids', None)
+            if not self.with_bounds or flux_ids is None:
+                return True, None
+            flux_ranges = {}
+            if len(flux_ids) > 0:
+                try:
+                    fva_result = flux_variability_analysis(self.model, reactions=flux_ids, view=SequentialView())
+                except SolveError as e:
+                    logger.debug(e)
+                    return True, None
+                for reaction_id, row in fva_result.data_frame.iterrows():
+                    flux_ranges[reaction_id] = (row['lower_bound'], row['upper_bound'])
+            return True, self.objective_function.superset_bound(flux_ranges, len(decoded[1]))
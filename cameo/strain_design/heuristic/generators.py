@@ -17,7 +17,7 @@ from __future__ import absolute_import, print_function
 __all__ = ['set_generator', 'unique_set_generator']
 
 from inspyred.ec.generators import diversify
-from cameo.strain_design.heuristic.genomes import MultipleChromosomeGenome
+from cameo.strain_design.heuristic.genomes import MultipleChromosomeGenome, BitSet
 from six.moves import range
 from six.moves import zip
 
@@ -35,14 +35,15 @@ def set_generator(random, args):
         representation: set containing the possible values
         max_candidate_size: int, default: 9
         variable_candidate_size: bool, default: True
+        bitset_candidates: bool, default: False
 
 
     Returns
     -------
-    list
-        A list containing a sample of the elements. If variable_candidate_size is
-        True the list size is up to max_candidate_size, otherwise the candidate
-        size equals candidate_size
+    list or BitSet
+        A list containing a sample of the elements (a BitSet if bitset_candidates is True).
+        If variable_candidate_size is True the list size is up to max_candidate_size,
+        otherwise the candidate size equals candidate_size
     """
     representation = args.get('representation')
     max_size = args.get('candidate_size', 9)
@@ -52,6 +53,8 @@ def set_generator(random, args):
     else:
         size = max_size
     candidate = random.sample(range(len(representation)), size)
+    if args.get('bitset_candidates', False):
+        return BitSet.of(candidate)
     return list(candidate)
 
 
@@ -73,13 +76,14 @@ def unique_set_generator(random, args):
         representation: set containing the possible values
         max_candidate_size: int, default: 9
         variable_candidate_size: bool, default: True
+        bitset_candidates: bool, default: False
 
     Returns
     -------
-    list
-        A list containing a sample of the elements. If variable_candidate_size is
-        True the list size is up to max_candidate_size, otherwise the candidate
-        size equals candidate_size
+    list or BitSet
+        A list containing a sample of the elements (a BitSet if bitset_candidates is True).
+        If variable_candidate_size is True the list size is up to max_candidate_size,
+        otherwise the candidate size equals candidate_size
     """
     representation = args.get('representation')
     max_size = args.get('candidate_size', 9)
@@ -89,6 +93,8 @@ def unique_set_generator(random, args):
     else:
         size = max_size
     candidate = random.sample(range(len(representation)), size)
+    if args.get('bitset_candidates', False):
+        return BitSet.of(candidate)
     return list(candidate)
 
 
@@ -17,6 +17,110 @@ from __future__ import absolute_import, print_function
 from ordered_set import OrderedSet
 import six
 
+__all__ = ['BitSet', 'MultipleChromosomeGenome', 'popcount']
+
+if hasattr(int, 'bit_count'):
+    def popcount(value):
+        """The number of set bits of a non-negative integer."""
+        return int.bit_count(value)
+else:
+    def popcount(value):
+        """The number of set bits of a non-negative integer."""
+        return bin(value).count('1')
+
+
+class BitSet(int):
+    """An immutable set of non-negative integers (e.g. candidate indices) stored as the bits of an int.
+
+    Iteration yields the members in ascending order, so a BitSet can be used wherever a candidate
+    list is expected (decoders, frozenset(candidate) cache keys, ...). Set operations, subset tests and
+    sizes are bit operations and popcounts instead of hashing of every member.
+
+    Examples
+    --------
+    >>> candidate = BitSet.of([5, 1, 3])
+    >>> list(candidate), len(candidate), 3 in candidate
+    ([1, 3, 5], 3, True)
+    >>> len(candidate ^ BitSet.of([1, 2]))
+    3
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def of(cls, members):
+        """A BitSet of members (an iterable of non-negative integers or a BitSet)."""
+        if isinstance(members, six.integer_types):
+            return cls(members)
+        mask = 0
+        for member in members:
+            mask |= 1 << member
+        return cls(mask)
+
+    def __iter__(self):
+        mask = int(self)
+        while mask:
+            lowest = mask & -mask
+            yield lowest.bit_length() - 1
+            mask ^= lowest
+
+    def __len__(self):
+        return popcount(self)
+
+    def __contains__(self, member):
+        return member >= 0 and (int(self) >> member) & 1 == 1
+
+    def __or__(self, other):
+        return BitSet(int(self) | int(BitSet.of(other)))
+
+    def __and__(self, other):
+        return BitSet(int(self) & int(BitSet.of(other)))
+
+    def __xor__(self, other):
+        return BitSet(int(self) ^ int(BitSet.of(other)))
+
+    def __sub__(self, other):
+        return BitSet(int(self) & ~int(BitSet.of(other)))
+
+    __ror__ = __or__
+    __rand__ = __and__
+    __rxor__ = __xor__
+
+    def union(self, other):
+        return self | other
+
+    def intersection(self, other):
+        return self & other
+
+    def difference(self, other):
+        return self - other
+
+    def symmetric_difference(self, other):
+        return self ^ other
+
+    def issubset(self, other):
+        return int(self) & ~int(BitSet.of(other)) == 0
+
+    def issuperset(self, other):
+        return BitSet.of(other).issubset(self)
+
+    def add(self, member):
+        """A new BitSet that also contains member (BitSets are immutable)."""
+        return BitSet(int(self) | 1 << member)
+
+    def discard(self, member):
+        """A new BitSet without member (BitSets are immutable)."""
+        return BitSet(int(self) & ~(1 << member))
+
+    def __repr__(self):
+        return "BitSet(%s)" % list(self)
+
+    def __str__(self):
+        return repr(self)
+
+    def __reduce__(self):
+        return BitSet, (int(self),)
+
 
 class MultipleChromosomeGenome(object):
     def __init__(self, keys=[], *args, **kwargs):
@@ -15,8 +15,29 @@
 from __future__ import absolute_import, print_function
 
 import six.moves.queue
-from cameo.parallel import RedisQueue
-from uuid import uuid4
+from six.moves import range
+from inspyred.ec import Individual
+from cameo.parallel import new_queue
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _pack(individual):
+    """Individuals travel as (candidate, fitness, maximize) tuples."""
+    if isinstance(individual, Individual):
+        return individual.candidate, individual.fitness, individual.maximize
+    return individual
+
+
+def _unpack(migrant):
+    if isinstance(migrant, tuple) and len(migrant) == 3:
+        candidate, fitness, maximize = migrant
+        individual = Individual(candidate, maximize=maximize)
+        individual.fitness = fitness
+        return individual
+    return migrant
 
 
 class MultiprocessingMigrator(object):
@@ -45,33 +66,73 @@ class MultiprocessingMigrator(object):
     population (re-evaluating fitness if necessary). Otherwise, *E* remains in
     the population and also exists in the queue as a migrant.
 
+    Migrants travel in batches of ``batch_size`` individuals (one queue
+    item per batch), so ``max_migrants`` is the maximum number of batches
+    in the queue. A batch of migrants is evaluated with a single call of
+    the evaluator. Only candidate, fitness and maximize of individuals are
+    transferred.
+
+    The queue can connect islands on several hosts (e.g. a SocketQueue, use
+    the same ``name`` on every host). If the queue cannot be reached, the
+    island continues without migration.
+
     Optional keyword arguments in args:
 
     - *evaluate_migrant* -- should new migrants be evaluated before
       adding them to the population (default False)
 
+    Parameters
+    ----------
+    max_migrants : int
+        Maximum number of migrant batches in the queue.
+    queue : ManagerQueue or RedisQueue
+        The queue shared by the islands (default: a new queue for ``transport``).
+    batch_size : int
+        Number of individuals that migrate together.
+    transport : str or callable
+        The kind of queue to create if ``queue`` is None (see cameo.parallel.new_queue).
+    name : str
+        The name of the queue to create (default: a random name).
+
     """
 
-    def __init__(self, max_migrants=1):
+    def __init__(self, max_migrants=1, queue=None, batch_size=1, transport='multiprocessing', name=None):
         self.max_migrants = max_migrants
-        self.migrants = RedisQueue(uuid4())
+        self.batch_size = batch_size
+        if queue is None:
+            queue = new_queue(name=name, maxsize=max_migrants, namespace='migrants', transport=transport)
+        self.migrants = queue
         self.__name__ = self.__class__.__name__
 
+    def _emigrant_indices(self, random, population):
+        if self.batch_size == 1:
+            return [random.randint(0, len(population) - 1)]
+        return random.sample(range(len(population)), min(self.batch_size, len(population)))
+
     def __call__(self, random, population, args):
         evaluate_migrant = args.setdefault('evaluate_migrant', False)
-        migrant_index = random.randint(0, len(population) - 1)
-        old_migrant = population[migrant_index]
+        migrant_indices = self._emigrant_indices(random, population)
+        old_migrants = [population[i] for i in migrant_indices]
         try:
-            migrant = self.migrants.get(block=False)
+            migrants = self.migrants.get(block=False)
+            if not isinstance(migrants, list):
+                migrants = [migrants]
+            migrants = [_unpack(migrant) for migrant in migrants[:len(migrant_indices)]]
             if evaluate_migrant:
-                fit = args["_ec"].evaluator([migrant.candidate], args)
-                migrant.fitness = fit[0]
-                args["_ec"].num_evaluations += 1
-            population[migrant_index] = migrant
+                fit = args["_ec"].evaluator([migrant.candidate for migrant in migrants], args)
+                for migrant, fitness in zip(migrants, fit):
+                    migrant.fitness = fitness
+                args["_ec"].num_evaluations += len(migrants)
+            for i, migrant in zip(migrant_indices, migrants):
+                population[i] = migrant
         except six.moves.queue.Empty:
             pass
+        except IOError as e:
+            logger.debug("No immigrants (%s)" % e)
         try:
-            self.migrants.put(old_migrant, block=False)
+            self.migrants.put_nowait([_pack(migrant) for migrant in old_migrants])
         except six.moves.queue.Full:
             pass
+        except IOError as e:
+            logger.debug("No emigrants (%s)" % e)
         return population
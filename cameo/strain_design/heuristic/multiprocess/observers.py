@@ -17,36 +17,91 @@ from __future__ import absolute_import, print_function
 import six
 from six.moves.queue import Empty
 from uuid import uuid4
-from cameo.parallel import RedisQueue
+from cameo.parallel import new_queue
 from six.moves import range
 
+import logging
+
+logger = logging.getLogger(__name__)
+
+# tells the listener thread to stop (clients only send dicts)
+_STOP = None
+
 
 class AbstractParallelObserver(object):
-    def __init__(self, number_of_islands=None, *args, **kwargs):
+    """
+    Collects the messages of observer clients (one per island) in a thread of the main process.
+
+    The thread waits on the queue (no polling) and processes all messages that are available at once
+    (see _process_messages). finish() wakes it up, so it exits as soon as the remaining messages are processed.
+
+    Parameters
+    ----------
+    number_of_islands: int
+    transport: str or callable
+        See cameo.parallel.new_queue.
+    timeout: float
+        Maximum number of seconds to wait for a message before checking if the observer was stopped.
+    max_messages: int
+        Maximum number of messages processed together.
+    """
+
+    def __init__(self, number_of_islands=None, transport='multiprocessing', timeout=1, max_messages=1000, *args,
+                 **kwargs):
         assert isinstance(number_of_islands, int)
         super(AbstractParallelObserver, self).__init__()
-        self.queue = RedisQueue(name=str(uuid4()), namespace=self.__name__)
+        self.queue = new_queue(name=str(uuid4()), namespace=self.__name__, transport=transport)
+        self.timeout = timeout
+        self.max_messages = max_messages
         self.clients = {}
         self.run = True
+        self.t = None
         for i in range(number_of_islands):
             self._create_client(i)
 
     def _create_client(self, i):
         raise NotImplementedError
 
+    def _receive(self):
+        """Wait for a message and return it together with all messages that are already available.
+
+        Returns
+        -------
+        tuple
+            (messages, stop) where stop is True if the stop message was received.
+        """
+        messages = []
+        try:
+            message = self.queue.get(timeout=self.timeout)
+            while message is not _STOP:
+                messages.append(message)
+                if len(messages) >= self.max_messages:
+                    return messages, False
+                message = self.queue.get_nowait()
+            return messages, True
+        except Empty:
+            return messages, False
+
     def _listen(self):
         print("Start %s" % self.__name__)
-        while self.run:
+        stop = False
+        while self.run and not stop:
             try:
-                message = self.queue.get_nowait()
-                self._process_message(message)
-            except Empty:
-                pass
+                messages, stop = self._receive()
+                if messages:
+                    self._process_messages(messages)
+            except IOError as e:
+                logger.error("%s lost its queue: %s" % (self.__name__, e))
+                break
             except Exception as e:
                 print(e)
 
         print("Exit %s" % self.__name__)
 
+    def _process_messages(self, messages):
+        for message in messages:
+            self._process_message(message)
+
     def _process_message(self, message):
         raise NotImplementedError
 
@@ -56,7 +111,26 @@ class AbstractParallelObserver(object):
         self.t.start()
 
     def finish(self):
-        self.run = False
+        """Process the remaining messages and stop the listener thread."""
+        try:
+            self.queue.put_nowait(_STOP)
+        except Exception:
+            self.run = False
+        if self.t is not None:
+            self.t.join(10 * self.timeout)
+            self.run = False
+            self.t = None
+
+
+def _latest_per_island(messages):
+    """The last message of every island (in the order of their first message)."""
+    latest = {}
+    order = []
+    for message in messages:
+        if message['index'] not in latest:
+            order.append(message['index'])
+        latest[message['index']] = message
+    return [latest[index] for index in order]
 
 
 class AbstractParallelObserverClient(object):
@@ -105,6 +179,10 @@ class CliMultiprocessProgressObserver(AbstractParallelObserver):
 
         self.progress[i].update(message['num_evaluations'])
 
+    def _process_messages(self, messages):
+        # only the latest progress of every island needs to be displayed
+        AbstractParallelObserver._process_messages(self, _latest_per_island(messages))
+
     def _listen(self):
         AbstractParallelObserver._listen(self)
         for i, progress in six.iteritems(self.progress):
@@ -163,6 +241,9 @@ class IPythonNotebookMultiprocessProgressObserver(AbstractParallelObserver):
             self.progress[message['index']].start()
         self.progress[message['index']].set(message['progress'])
 
+    def _process_messages(self, messages):
+        AbstractParallelObserver._process_messages(self, _latest_per_island(messages))
+
 
 class IPythonNotebookMultiprocessProgressObserverClient(AbstractParallelObserverClient):
     __name__ = "IPython Notebook Multiprocess Progress Observer"
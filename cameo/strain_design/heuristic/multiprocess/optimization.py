@@ -16,6 +16,7 @@ from __future__ import absolute_import, print_function
 
 __all__ = ['MultiprocessReactionKnockoutOptimization', 'MultiprocessGeneKnockoutOptimization']
 
+import six
 from six.moves import range
 from functools import reduce
 
@@ -28,6 +29,7 @@ from cameo.flux_analysis.simulation import pfba
 from cameo.strain_design import StrainDesignMethod
 from cameo.strain_design.heuristic import ReactionKnockoutOptimization, GeneKnockoutOptimization
 from cameo.strain_design.heuristic.optimization import KnockoutOptimizationResult
+from cameo.strain_design.heuristic.caches import SQLiteFitnessStore
 from cameo.strain_design.heuristic.multiprocess.observers import IPythonNotebookMultiprocessProgressObserver, \
     CliMultiprocessProgressObserver
 from cameo.strain_design.heuristic.multiprocess.plotters import IPythonNotebookBokehMultiprocessPlotObserver
@@ -47,11 +49,17 @@ class MultiprocessRunner(object):
         self.migrator = migrator
         self.run_kwargs = run_kwargs
 
-    def __call__(self, clients):
+    def __call__(self, island_clients):
+        index, clients = island_clients
+        run_kwargs = dict(self.run_kwargs)
+        # every island keeps its own checkpoint
+        for key in ('checkpoint', 'resume_from'):
+            if run_kwargs.get(key) is not None:
+                run_kwargs[key] = "%s.island-%i" % (run_kwargs[key], index)
         island = self.island_class(**self.init_kwargs)
         island.migrator = self.migrator
         island.observer = clients
-        return island.run(**self.run_kwargs)
+        return island.run(**run_kwargs)
 
 
 class MultiprocessHeuristicOptimization(StrainDesignMethod):
@@ -68,18 +76,29 @@ class MultiprocessHeuristicOptimization(StrainDesignMethod):
     heuristic_method: inspyred.ec instance
         The method using for search (default: inspyred.ec.GA).
     max_migrants: int
-        The number of individuals travelling between islands (different processes) at the same time (default: 1).
+        The number of migrant batches travelling between islands (different processes) at the same time (default: 1).
+    migration_batch_size: int
+        The number of individuals that migrate together (default: 1).
+    transport: str or callable
+        The queues used for migration and progress reporting: 'multiprocessing' (default, islands on one machine,
+        no external service needed), 'redis' (requires a Redis server), 'tcp://host:port' (requires a
+        cameo.parallel.QueueBroker) or a queue factory (see cameo.parallel.new_queue).
+    migration_channel: str
+        The name of the migration queue. Optimizations running on several hosts with the same (tcp or redis)
+        transport and channel exchange migrants between all of their islands (default: a random name).
 
     """
     _island_class = None
 
-    def __init__(self, model=None, objective_function=None, heuristic_method=inspyred.ec.GA, max_migrants=1, *args,
-                 **kwargs):
+    def __init__(self, model=None, objective_function=None, heuristic_method=inspyred.ec.GA, max_migrants=1,
+                 migration_batch_size=1, transport='multiprocessing', migration_channel=None, *args, **kwargs):
         super(MultiprocessHeuristicOptimization, self).__init__(*args, **kwargs)
         self.model = model
         self.objective_function = objective_function
         self.heuristic_method = heuristic_method
-        self.migrator = MultiprocessingMigrator(max_migrants)
+        self.transport = transport
+        self.migrator = MultiprocessingMigrator(max_migrants, batch_size=migration_batch_size, transport=transport,
+                                                name=migration_channel)
         self.observers = []
 
     def _init_kwargs(self):
@@ -94,7 +113,7 @@ class MultiprocessHeuristicOptimization(StrainDesignMethod):
             number_of_islands = len(view)
         run_kwargs['view'] = parallel.SequentialView()
         runner = MultiprocessRunner(self._island_class, self._init_kwargs(), self.migrator, run_kwargs)
-        clients = [[o.clients[i] for o in self.observers] for i in range(number_of_islands)]
+        clients = [(i, [o.clients[i] for o in self.observers]) for i in range(number_of_islands)]
         try:
             results = view.map(runner, clients)
         except KeyboardInterrupt as e:
@@ -120,15 +139,21 @@ class MultiprocessKnockoutOptimization(MultiprocessHeuristicOptimization):
         The number of individuals travelling between islands (different processes) at the same time (default: 1).
     simulation_method: a function from flux_analysis.simulation
         The method to simulate the model (default: pfba).
+    fitness_store: SQLiteFitnessStore or str
+        A persistent fitness store (or the path to one) shared by all islands (default: None).
     """
 
-    def __init__(self, simulation_method=pfba, *args, **kwargs):
+    def __init__(self, simulation_method=pfba, fitness_store=None, *args, **kwargs):
         super(MultiprocessKnockoutOptimization, self).__init__(*args, **kwargs)
         self.simulation_method = simulation_method
+        if isinstance(fitness_store, six.string_types):
+            fitness_store = SQLiteFitnessStore(fitness_store)
+        self.fitness_store = fitness_store
 
     def _init_kwargs(self):
         init_kwargs = MultiprocessHeuristicOptimization._init_kwargs(self)
         init_kwargs['simulation_method'] = self.simulation_method
+        init_kwargs['fitness_store'] = self.fitness_store
         return init_kwargs
 
     def _set_observers(self, number_of_islands):
@@ -138,14 +163,17 @@ class MultiprocessKnockoutOptimization(MultiprocessHeuristicOptimization):
         if util.in_ipnb():
             color_map = util.generate_colors(number_of_islands)
             progress_observer = IPythonNotebookMultiprocessProgressObserver(number_of_islands=number_of_islands,
-                                                                            color_map=color_map)
+                                                                            color_map=color_map,
+                                                                            transport=self.transport)
             if config.use_bokeh:
                 plotting_observer = IPythonNotebookBokehMultiprocessPlotObserver(number_of_islands=number_of_islands,
-                                                                                 color_map=color_map)
+                                                                                 color_map=color_map,
+                                                                                 transport=self.transport)
             elif config.use_matplotlib:
                 pass
         else:
-            progress_observer = CliMultiprocessProgressObserver(number_of_islands=number_of_islands)
+            progress_observer = CliMultiprocessProgressObserver(number_of_islands=number_of_islands,
+                                                                transport=self.transport)
 
         if not progress_observer is None:
             observers.append(progress_observer)
@@ -161,10 +189,12 @@ class MultiprocessKnockoutOptimization(MultiprocessHeuristicOptimization):
         for observer in self.observers:
             observer.start()
 
-        results = MultiprocessHeuristicOptimization.run(self, view=view, number_of_islands=number_of_islands, **kwargs)
-
-        for observer in self.observers:
-            observer.finish()
+        try:
+            results = MultiprocessHeuristicOptimization.run(self, view=view, number_of_islands=number_of_islands,
+                                                            **kwargs)
+        finally:
+            for observer in self.observers:
+                observer.finish()
 
         return reduce(KnockoutOptimizationResult.merge, results)
 
@@ -189,8 +219,9 @@ class MultiprocessReactionKnockoutOptimization(MultiprocessKnockoutOptimization)
     """
     _island_class = ReactionKnockoutOptimization
 
-    def __init__(self, reactions=None, essential_reactions=None, *args, **kwargs):
+    def __init__(self, reactions=None, essential_reactions=None, collapse_coupled_reactions=False, *args, **kwargs):
         super(MultiprocessReactionKnockoutOptimization, self).__init__(*args, **kwargs)
+        self.collapse_coupled_reactions = collapse_coupled_reactions
         if reactions is None:
             self.reactions = set([r.id for r in self.model.reactions])
         else:
@@ -205,14 +236,16 @@ class MultiprocessReactionKnockoutOptimization(MultiprocessKnockoutOptimization)
         init_kwargs = MultiprocessKnockoutOptimization._init_kwargs(self)
         init_kwargs['essential_reactions'] = self.essential_reactions
         init_kwargs['reactions'] = self.reactions
+        init_kwargs['collapse_coupled_reactions'] = self.collapse_coupled_reactions
         return init_kwargs
 
 
 class MultiprocessGeneKnockoutOptimization(MultiprocessKnockoutOptimization):
     _island_class = GeneKnockoutOptimization
 
-    def __init__(self, genes=None, essential_genes=None, *args, **kwargs):
+    def __init__(self, genes=None, essential_genes=None, collapse_equivalent_genes=True, *args, **kwargs):
         super(MultiprocessGeneKnockoutOptimization, self).__init__(*args, **kwargs)
+        self.collapse_equivalent_genes = collapse_equivalent_genes
         if genes is None:
             self.genes = set([g.id for g in self.model.genes])
         else:
@@ -227,4 +260,5 @@ class MultiprocessGeneKnockoutOptimization(MultiprocessKnockoutOptimization):
         init_kwargs = MultiprocessKnockoutOptimization._init_kwargs(self)
         init_kwargs['essential_genes'] = self.essential_genes
         init_kwargs['genes'] = self.genes
+        init_kwargs['collapse_equivalent_genes'] = self.collapse_equivalent_genes
         return init_kwargs
@@ -14,11 +14,15 @@
 
 from __future__ import absolute_import, print_function
 
+import time
+import six
 import six.moves.queue
 
+import numpy as np
 from uuid import uuid1
-from pandas import DataFrame
+from pandas import DataFrame, concat
 from cameo import config
+from cameo.strain_design.heuristic.plotters import PlotBuffer, _best_fitness
 from cameo.strain_design.heuristic.multiprocess.observers import AbstractParallelObserver, \
     AbstractParallelObserverClient
 
@@ -28,18 +32,38 @@ if config.use_bokeh:
 
 
 class IPythonNotebookBokehMultiprocessPlotObserver(AbstractParallelObserver):
+    """
+    Plots the best fitness of every generation of all islands.
+
+    The history of every island is kept in a PlotBuffer and the plot is updated at most every `update_interval`
+    seconds.
+
+    Parameters
+    ----------
+    url: str
+    color_map: dict
+        Colors of the islands.
+    window_size: int
+        Number of recent generations per island that are plotted at full resolution (older ones are decimated).
+    update_interval: float
+        Minimum number of seconds between plot updates.
+    """
     __name__ = "IPython Notebook Bokeh Multiprocess Plot Observer"
 
-    def __init__(self, url='default', color_map={}, *args, **kwargs):
+    def __init__(self, url='default', color_map={}, window_size=1000, update_interval=1., *args, **kwargs):
+        self.window_size = window_size
+        self.histories = {}
         super(IPythonNotebookBokehMultiprocessPlotObserver, self).__init__(*args, **kwargs)
         self.url = url
         self.plotted = False
         self.connections = {}
         self.color_map = color_map
-        self.data_frame = DataFrame(columns=['iteration', 'island', 'color', 'fitness'])
+        self.update_interval = update_interval
+        self._last_update = 0.
 
     def _create_client(self, i):
         self.clients[i] = IPythonNotebookBokehMultiprocessPlotObserverClient(queue=self.queue, index=i)
+        self.histories[i] = PlotBuffer(self.window_size)
 
     def start(self):
         self._plot()
@@ -59,31 +83,51 @@ class IPythonNotebookBokehMultiprocessPlotObserver(AbstractParallelObserver):
         show(self.plot)
 
     def _process_message(self, message):
+        self.histories[message['index']].append((message['iteration'], message['fitness']))
+
+    def _process_messages(self, messages):
         if not self.plotted:
             self._plot()
-
-        index = message['index']
-        df = DataFrame({
-            'iteration': [message['iteration']],
-            'fitness': [message['fitness']],
-            'color': [self.color_map[index]],
-            'island': [index]
-        })
-        self.data_frame = self.data_frame.append(df, ignore_index=True)
-        if message['iteration'] % message['n'] == 0:
+        AbstractParallelObserver._process_messages(self, messages)
+        if time.time() - self._last_update >= self.update_interval:
             self._update_plot()
 
+    @property
+    def data_frame(self):
+        frames = []
+        for index, history in six.iteritems(self.histories):
+            data = history.data
+            frames.append(DataFrame({
+                'iteration': data[:, 0],
+                'island': index,
+                'color': self.color_map[index],
+                'fitness': data[:, 1]
+            }, columns=['iteration', 'island', 'color', 'fitness']))
+        if len(frames) == 0:
+            return DataFrame(columns=['iteration', 'island', 'color', 'fitness'])
+        return concat(frames, ignore_index=True)
+
     def _update_plot(self):
-        self.ds.data['x'] = self.data_frame['iteration']
-        self.ds.data['y'] = self.data_frame['fitness']
-        self.ds.data['fill_color'] = self.data_frame['color']
-        self.ds.data['line_color'] = self.data_frame['color']
+        data = [(history.data, self.color_map[index]) for index, history in six.iteritems(self.histories)]
+        colors = [color for points, color in data for _ in range(len(points))]
+        self.ds.data['x'] = np.concatenate([points[:, 0] for points, _ in data]).tolist()
+        self.ds.data['y'] = np.concatenate([points[:, 1] for points, _ in data]).tolist()
+        self.ds.data['fill_color'] = colors
+        self.ds.data['line_color'] = colors
         self.ds._dirty = True
         cursession().store_objects(self.ds)
+        self._last_update = time.time()
+
+    def finish(self):
+        AbstractParallelObserver.finish(self)
+        if self.plotted:
+            self._update_plot()
 
     def stop(self):
-        self.data_frame = DataFrame(columns=['iteration', 'island', 'color', 'fitness'])
+        for history in six.itervalues(self.histories):
+            history.clear()
         self.plotted = False
+        self._last_update = 0.
 
 
 class IPythonNotebookBokehMultiprocessPlotObserverClient(AbstractParallelObserverClient):
@@ -95,13 +139,11 @@ class IPythonNotebookBokehMultiprocessPlotObserverClient(AbstractParallelObserve
 
     def __call__(self, population, num_generations, num_evaluations, args):
         self.iteration += 1
-        best = max(population)
         try:
             self._queue.put_nowait({
-                'fitness': best.fitness,
+                'fitness': _best_fitness(population),
                 'iteration': self.iteration,
-                'index': self.index,
-                'n': args.get('n', 1)})
+                'index': self.index})
         except six.moves.queue.Full:
             pass
 
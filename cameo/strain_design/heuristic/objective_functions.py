@@ -15,12 +15,64 @@
 
 from __future__ import absolute_import, print_function
 
-__all__ = ['biomass_product_coupled_yield', 'product_yield', 'number_of_knockouts']
+__all__ = ['biomass_product_coupled_yield', 'product_yield', 'number_of_knockouts', 'batch_fitness']
+
+import numpy
+from inspyred.ec.emo import Pareto
 
 from cobra import Reaction
 from cameo import config
 
 
+def _round(values, decimals):
+    """numpy.round with the results of Python's round (which differ for values close to a half)."""
+    rounded = numpy.round(values, decimals)
+    scaled = values * 10. ** decimals
+    for i in numpy.flatnonzero(numpy.abs(scaled - numpy.floor(scaled) - 0.5) < 1e-6):
+        rounded[i] = round(float(values[i]), decimals)
+    return rounded
+
+
+def flux_matrix(solutions, reaction_ids):
+    """The fluxes of reaction_ids in solutions as a (solutions x reactions) array."""
+    matrix = numpy.zeros((len(solutions), len(reaction_ids)))
+    for i, solution in enumerate(solutions):
+        fluxes = solution.fluxes
+        matrix[i] = [fluxes[reaction_id] for reaction_id in reaction_ids]
+    return matrix
+
+
+def batch_fitness(objective_function, model, solutions, decoded_representations):
+    """The fitness of several solutions.
+
+    Objective functions that support batches (see ObjectiveFunction.flux_ids) are evaluated on a flux matrix
+    at once, the others are called for every solution.
+
+    Parameters
+    ----------
+    objective_function : ObjectiveFunction or list(ObjectiveFunction)
+    model : SolverBasedModel
+    solutions : list
+        FluxDistributionResults.
+    decoded_representations : list
+        The knockouts of every solution (see decoders).
+
+    Returns
+    -------
+    list
+        Fitness values (Pareto objects for a list of objective functions).
+    """
+    if isinstance(objective_function, list):
+        columns = [batch_fitness(of, model, solutions, decoded_representations) for of in objective_function]
+        return [Pareto(values=list(values)) for values in zip(*columns)]
+    flux_ids = getattr(objective_function, 'flux_ids', None)
+    if flux_ids is None:
+        return [objective_function(model, solution, decoded)
+                for solution, decoded in zip(solutions, decoded_representations)]
+    sizes = numpy.array([len(decoded[1]) for decoded in decoded_representations])
+    return objective_function.batch(flux_matrix(solutions, flux_ids), sizes).tolist()
+
+
 class ObjectiveFunction(object):
     """
     Blueprint for objective function.
@@ -32,15 +84,84 @@ class ObjectiveFunction(object):
     -------
     __call__(model, solution, decoded_representation)
         Calculates the fitness of the solution
+    batch(fluxes, sizes)
+        Calculates the fitness of several solutions at once (optional, see flux_ids)
+    upper_bound(model, screening_solution, decoded_representation)
+        An upper bound of the fitness for any simulation method (None if unknown)
+    superset_bound(flux_ranges, size)
+        An upper bound of the fitness of a mutant and all mutants with more knockouts (None if unknown)
+
+    Attributes
+    ----------
+    flux_ids : list or None
+        The reactions whose fluxes batch needs (the columns of its flux matrix); None if batch is not
+        implemented.
 
     """
 
+    flux_ids = None
+
     def __init__(self, *args, **kwargs):
         super(ObjectiveFunction, self).__init__(*args, **kwargs)
 
     def __call__(self, model, solution, decoded_representation):
         raise NotImplementedError
 
+    def batch(self, fluxes, sizes):
+        """Calculate the fitness of several solutions at once.
+
+        Parameters
+        ----------
+        fluxes : numpy.ndarray
+            A (solutions x flux_ids) flux matrix.
+        sizes : numpy.ndarray
+            The number of knockouts of every solution (the length of decoded_representation[1]).
+
+        Returns
+        -------
+        numpy.ndarray
+            The same fitness values as __call__.
+        """
+        raise NotImplementedError
+
+    def upper_bound(self, model, screening_solution, decoded_representation):
+        """An upper bound of the fitness of a mutant, whatever method is used to simulate it.
+
+        Parameters
+        ----------
+        model : SolverBasedModel
+        screening_solution : FluxDistributionResult
+            A solution of the mutant that maximizes the model's objective (e.g. from fba or pfba).
+        decoded_representation : tuple
+            The knockouts (see decoders).
+
+        Returns
+        -------
+        float or None
+            None if no bound is known.
+        """
+        return None
+
+    def superset_bound(self, flux_ranges, size):
+        """An upper bound of the fitness of a mutant and of all mutants that knock out more targets.
+
+        Knockouts only narrow flux ranges, so a bound that holds for all fluxes within the ranges of a mutant also
+        holds for the mutants derived from it.
+
+        Parameters
+        ----------
+        flux_ranges : dict
+            {reaction_id: (minimum, maximum)} flux ranges of the flux_ids reactions in the mutant.
+        size : int
+            The number of knockouts of the mutant (the length of decoded_representation[1]).
+
+        Returns
+        -------
+        float or None
+            None if no bound is known.
+        """
+        return None
+
     def _repr_latex_(self):
         return self.name
 
@@ -49,6 +170,25 @@ class ObjectiveFunction(object):
         return self.__class__.__name__
 
 
+def _maximizes(model, reaction_id):
+    """True if the objective of model is to maximize the flux of reaction_id (and nothing else)."""
+    if model is None or model.objective.direction != 'max':
+        return False
+    reaction = model.reactions.get_by_id(reaction_id)
+    coefficients = model.objective.expression.as_coefficients_dict()
+    forward = float(coefficients.get(reaction.forward_variable, 0.))
+    reverse = float(coefficients.get(reaction.reverse_variable, 0.))
+    return len(coefficients) == (2 if reverse != 0 else 1) and forward > 0 and reverse in (0., -forward)
+
+
+def _min_abs(flux_range):
+    """The smallest absolute flux in a flux range."""
+    lower, upper = flux_range
+    if lower <= 0 <= upper:
+        return 0.
+    return min(abs(lower), abs(upper))
+
+
 class biomass_product_coupled_yield(ObjectiveFunction):
     """
     Biomass-Product Coupled Yield: (v[biomass] * v[product]) / v[substrate] [1]
@@ -87,6 +227,10 @@ class biomass_product_coupled_yield(ObjectiveFunction):
         self.substrate = substrate
         self.__name__ = self.__class__.__name__
 
+    @property
+    def flux_ids(self):
+        return [self.biomass, self.product, self.substrate]
+
     def __call__(self, model, solution, decoded_representation):
         try:
             biomass_flux = round(solution.fluxes[self.biomass], config.ndecimals)
@@ -97,6 +241,33 @@ class biomass_product_coupled_yield(ObjectiveFunction):
         except ZeroDivisionError:
             return 0.0
 
+    def batch(self, fluxes, sizes):
+        biomass_flux = _round(fluxes[:, 0], config.ndecimals)
+        product_flux = _round(fluxes[:, 1], config.ndecimals)
+        substrate_flux = _round(numpy.abs(fluxes[:, 2]), config.ndecimals)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            bpcy = numpy.where(substrate_flux != 0, (biomass_flux * product_flux) / substrate_flux, 0.)
+        return _round(bpcy, config.ndecimals)
+
+    def upper_bound(self, model, screening_solution, decoded_representation):
+        # mutants that cannot grow have a bpcy of 0 (the screening solution only shows that if it maximizes growth)
+        if not _maximizes(model, self.biomass):
+            return None
+        if round(screening_solution.fluxes[self.biomass], config.ndecimals) <= 0:
+            return 0.0
+        return None
+
+    def superset_bound(self, flux_ranges, size):
+        (biomass_min, biomass_max), (product_min, product_max) = flux_ranges[self.biomass], flux_ranges[self.product]
+        numerator = max(biomass_min * product_min, biomass_min * product_max,
+                        biomass_max * product_min, biomass_max * product_max)
+        if round(numerator, config.ndecimals) <= 0:
+            return 0.0
+        substrate = round(_min_abs(flux_ranges[self.substrate]), config.ndecimals)
+        if substrate <= 0:
+            return None
+        return numerator / substrate
+
     def _repr_latex_(self):
         return "$$bpcy = \\frac{(%s * %s)}{%s}$$" % (
         self.biomass.replace("_", "\\_"), self.product.replace("_", "\\_"), self.substrate.replace("_", "\\_"))
@@ -132,6 +303,10 @@ class product_yield(ObjectiveFunction):
             substrate = substrate.id
         self.substrate = substrate
 
+    @property
+    def flux_ids(self):
+        return [self.product, self.substrate]
+
     def __call__(self, model, solution, decoded_representation):
         try:
             product_flux = round(solution.fluxes[self.product], config.ndecimals)
@@ -140,6 +315,22 @@ class product_yield(ObjectiveFunction):
         except ZeroDivisionError:
             return 0.0
 
+    def batch(self, fluxes, sizes):
+        product_flux = _round(fluxes[:, 0], config.ndecimals)
+        substrate_flux = _round(numpy.abs(fluxes[:, 1]), config.ndecimals)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            product_yield = numpy.where(substrate_flux != 0, product_flux / substrate_flux, 0.)
+        return _round(product_yield, config.ndecimals)
+
+    def superset_bound(self, flux_ranges, size):
+        product_max = flux_ranges[self.product][1]
+        if round(product_max, config.ndecimals) <= 0:
+            return 0.0
+        substrate = round(_min_abs(flux_ranges[self.substrate]), config.ndecimals)
+        if substrate <= 0:
+            return None
+        return product_max / substrate
+
     def _repr_latex_(self):
         return "$$yield = \\frac{%s}{%s}$$" % (self.product, self.substrate)
 
@@ -164,6 +355,8 @@ class number_of_knockouts(ObjectiveFunction):
         fitness value
     """
 
+    flux_ids = []
+
     def __init__(self, sense='min', *args, **kwargs):
         super(number_of_knockouts, self).__init__(*args, **kwargs)
         self.sense = sense
@@ -174,6 +367,20 @@ class number_of_knockouts(ObjectiveFunction):
         else:
             return round(1.0 / len(decoded_representation[1]), config.ndecimals)
 
+    def batch(self, fluxes, sizes):
+        if self.sense == 'max':
+            return sizes
+        return _round(1.0 / sizes, config.ndecimals)
+
+    def upper_bound(self, model, screening_solution, decoded_representation):
+        return self(model, screening_solution, decoded_representation)
+
+    def superset_bound(self, flux_ranges, size):
+        if self.sense == 'max':
+            return None
+        # 1 / #knockouts only decreases with more knockouts
+        return float(self.batch(None, numpy.array([size], dtype=float))[0])
+
     def _repr_latex_(self):
         return "$$ %s\\:\\#knockouts $$" % self.sense
 
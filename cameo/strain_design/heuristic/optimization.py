@@ -17,12 +17,19 @@ from __future__ import absolute_import, print_function
 __all__ = ['KnockoutOptimizationResult', 'GeneOptimizationResult',
            'ReactionKnockoutOptimization', 'GeneKnockoutOptimization']
 
-from six.moves import range
+import six
+from six.moves import range, zip
 
+import copy
+import heapq
+import itertools
+import math
 import time
+from collections import deque, OrderedDict
 from functools import reduce
 
-from cobra.manipulation.delete import find_gene_knockout_reactions
+import numpy
+
 from inspyred.ec.emo import Pareto
 
 from cameo.exceptions import SolveError
@@ -33,9 +40,19 @@ from cameo.strain_design.heuristic import variators
 from cameo.strain_design.heuristic import generators
 from cameo.strain_design.heuristic import decoders
 from cameo.strain_design.heuristic import stats
+from cameo.strain_design.heuristic import caches
+from cameo.strain_design.heuristic import checkpoints
+from cameo.strain_design.heuristic import surrogates
+from cameo.strain_design.heuristic import pareto
+from cameo.strain_design.heuristic import objective_functions
+from cameo.strain_design.heuristic import enumeration
+from cameo.strain_design.heuristic.genomes import BitSet, popcount
 from cameo import config
-from cameo.flux_analysis.simulation import pfba, lmoma, moma, room
-from cameo.util import partition, TimeMachine, memoize, ProblemCache
+from cameo.parallel import SequentialView
+from cameo.flux_analysis.simulation import fba, pfba, lmoma, moma, room
+from cameo.flux_analysis.analysis import effective_bounds
+from cameo.flux_analysis.flux_coupling import flux_coupling_analysis
+from cameo.util import partition, TimeMachine, ProblemCache
 from pandas import DataFrame
 
 import inspyred
@@ -54,6 +71,7 @@ FITNESS = 'Fitness'
 BIOMASS = 'Biomass'
 KNOCKOUTS = 'Knockouts'
 REACTIONS = 'Reactions'
+EQUIVALENTS = 'Equivalents'
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -86,7 +104,7 @@ PRE_CONFIGURED = {
             variators.set_n_point_crossover
         ],
         inspyred.ec.selectors.tournament_selection,
-        inspyred.ec.replacers.nsga_replacement,
+        pareto.nsga_replacement,
         inspyred.ec.archivers.population_archiver
     ],
     inspyred.ec.emo.PAES: [
@@ -102,10 +120,61 @@ PRE_CONFIGURED = {
 }
 
 
+# Replacers used when candidates are evaluated asynchronously (offspring arrive a few at a time)
+STEADY_STATE_REPLACERS = {
+    inspyred.ec.replacers.generational_replacement: inspyred.ec.replacers.plus_replacement,
+    inspyred.ec.replacers.plus_replacement: inspyred.ec.replacers.plus_replacement,
+    inspyred.ec.replacers.steady_state_replacement: inspyred.ec.replacers.steady_state_replacement,
+    inspyred.ec.replacers.nsga_replacement: inspyred.ec.replacers.nsga_replacement,
+    pareto.nsga_replacement: pareto.nsga_replacement
+}
+
+# Knockouts only remove flux distributions from the solution space of these methods, so a wild-type solution
+# that carries no flux through the knocked out reactions is still optimal for the mutant.
+ZERO_FLUX_SHORTCUT_METHODS = (fba, pfba, lmoma, room)
+
+
+def failed_fitness(objective_function):
+    """The fitness of candidates that cannot be simulated."""
+    if isinstance(objective_function, list):
+        return inspyred.ec.emo.Pareto(values=[0 for _ in objective_function])
+    return 0
+
+
 def set_distance_function(candidate1, candidate2):
+    if isinstance(candidate1, BitSet) and isinstance(candidate2, BitSet):
+        return popcount(candidate1 ^ candidate2)
     return len(set(candidate1).symmetric_difference(set(candidate2)))
 
 
+def similarity_order(candidates, distance_function=set_distance_function):
+    """A greedy nearest-neighbour tour through candidates, starting with the smallest one.
+
+    Parameters
+    ----------
+    candidates : list
+        Sets (e.g. of knockouts).
+    distance_function : function
+        The distance between two candidates.
+
+    Returns
+    -------
+    list
+        The indices of candidates in visiting order.
+    """
+    remaining = list(range(len(candidates)))
+    if len(remaining) == 0:
+        return []
+    order = [min(remaining, key=lambda i: len(candidates[i]))]
+    remaining.remove(order[0])
+    while len(remaining) > 0:
+        last = candidates[order[-1]]
+        closest = min(remaining, key=lambda i: distance_function(last, candidates[i]))
+        remaining.remove(closest)
+        order.append(closest)
+    return order
+
+
 class HeuristicOptimization(object):
     """
     Blueprint for any model optimization based on heuristic methods.
@@ -191,16 +260,25 @@ class HeuristicOptimization(object):
     def _evaluator(self):
         raise NotImplementedError
 
-    def run(self, view=config.default_view, maximize=True, **kwargs):
+    def _evolve_asynchronously(self, generator, maximize, view, **kwargs):
+        raise NotImplementedError
+
+    def run(self, view=config.default_view, maximize=True, asynchronous=False, **kwargs):
         for observer in self.observers:
             observer.reset()
         t = time.time()
         print(time.strftime("Starting optimization at %a, %d %b %Y %H:%M:%S", time.localtime(t)))
-        res = self.heuristic_method.evolve(generator=self._generator,
-                                           maximize=maximize,
-                                           view=view,
-                                           evaluator=self._evaluator,
-                                           **kwargs)
+        if asynchronous:
+            res = self._evolve_asynchronously(generator=self._generator,
+                                              maximize=maximize,
+                                              view=view,
+                                              **kwargs)
+        else:
+            res = self.heuristic_method.evolve(generator=self._generator,
+                                               maximize=maximize,
+                                               view=view,
+                                               evaluator=self._evaluator,
+                                               **kwargs)
         for observer in self.observers:
             observer.end()
         runtime = time.time() - t
@@ -229,6 +307,17 @@ class KnockoutEvaluator(object):
         The method use to simulate the knockouts
     simulation_kwargs : dict
         The extra parameters used by the simulation method
+    fitness_store : SQLiteFitnessStore
+        A persistent store that is consulted before and updated after simulating (optional)
+    store_scope : str
+        The scope of the fitness values in fitness_store (see caches.evaluation_scope)
+    reference_solution : FluxDistributionResult
+        The wild-type solution of simulation_method (optional). Candidates that knock out only reactions
+        without flux in it are not simulated; their fitness is calculated from reference_solution instead
+        (only valid for methods in ZERO_FLUX_SHORTCUT_METHODS).
+    key_fluxes : list
+        Ids of reactions whose fluxes are returned together with the fitness, as (fitness, {id: flux}) tuples
+        (fluxes are None if the simulation failed). Only fitness values are returned if None.
 
     See Also
     --------
@@ -241,41 +330,146 @@ class KnockoutEvaluator(object):
 
     """
 
-    def __init__(self, model, decoder, objective_function, simulation_method, simulation_kwargs):
+    def __init__(self, model, decoder, objective_function, simulation_method, simulation_kwargs,
+                 fitness_store=None, store_scope=None, reference_solution=None, key_fluxes=None):
         self.model = model
         self.decoder = decoder
         self.objective_function = objective_function
         self.simulation_method = simulation_method
         self.simulation_kwargs = simulation_kwargs
+        self.fitness_store = fitness_store
+        self.store_scope = store_scope
+        self.reference_solution = reference_solution
+        self.key_fluxes = key_fluxes
+        if reference_solution is None:
+            self._carries_flux = None
+        else:
+            self._carries_flux = frozenset(reaction_id for reaction_id, flux in six.iteritems(reference_solution.fluxes)
+                                           if abs(flux) > config.non_zero_flux_threshold)
+        objectives = objective_function if isinstance(objective_function, list) else [objective_function]
+        self._batch = all(getattr(of, 'flux_ids', None) is not None for of in objectives)
         self.cache = ProblemCache(model)
 
     def __call__(self, population):
-        res = [self.evaluate_individual(frozenset(i)) for i in population]
+        if self.fitness_store is None:
+            res = [self._result(fitness, solution) for fitness, solution in self._evaluate_population(population)]
+        else:
+            res = self._evaluate_with_store(population)
         self.cache.reset()
         return res
 
-    @memoize
+    def _evaluate_with_store(self, population):
+        targets = [[self.decoder.representation[index] for index in individual] for individual in population]
+        stored = self.fitness_store.get_many(self.store_scope, targets)
+        logger.debug("%i of %i candidates found in %s" % (len(stored), len(population), self.fitness_store))
+        missing = OrderedDict()
+        for individual, knockouts in zip(population, targets):
+            key = self.fitness_store.key(knockouts)
+            if key not in stored:
+                missing.setdefault(key, (individual, knockouts))
+        results = dict((key, self._result(fitness, None)) for key, fitness in six.iteritems(stored))
+        new_entries = []
+        evaluated = self._evaluate_population([individual for individual, _ in six.itervalues(missing)])
+        for (key, (_, knockouts)), (fitness, solution) in zip(six.iteritems(missing), evaluated):
+            results[key] = self._result(fitness, solution)
+            new_entries.append((knockouts, fitness, self._stored_fluxes(solution)))
+        self.fitness_store.put_many(self.store_scope, new_entries)
+        return [results[self.fitness_store.key(knockouts)] for knockouts in targets]
+
     def evaluate_individual(self, individual):
-        decoded = self.decoder(individual)
-        reactions = decoded[0]
-        with TimeMachine() as tm:
-            for reaction in reactions:
-                reaction.knock_out(time_machine=tm)
-            try:
-                solution = self.simulation_method(self.model,
-                                                  cache=self.cache,
-                                                  volatile=False,
-                                                  raw=True,
-                                                  **self.simulation_kwargs)
-                fitness = self._calculate_fitness(solution, decoded)
-            except SolveError as e:
-                logger.debug(e)
-                if isinstance(self.objective_function, list):
-                    fitness = inspyred.ec.emo.Pareto(values=[0 for _ in self.objective_function])
-                else:
-                    fitness = 0
+        return self._evaluate_population([individual])[0][0]
 
+    def _result(self, fitness, solution):
+        if self.key_fluxes is None:
             return fitness
+        return fitness, self.get_key_fluxes(solution)
+
+    def get_key_fluxes(self, solution):
+        """The fluxes of the key_fluxes reactions in solution ({id: flux}, or None if solution is None)."""
+        if solution is None:
+            return None
+        return dict((reaction_id, solution.fluxes[reaction_id]) for reaction_id in self.key_fluxes)
+
+    def _is_unaffected(self, decoded):
+        return self._carries_flux is not None and not any(
+            reaction.id in self._carries_flux for reaction in decoded[0])
+
+    def _stored_fluxes(self, solution):
+        if solution is not None and self.fitness_store.keep_fluxes:
+            return solution.fluxes
+        return None
+
+    def shortcut(self, individual):
+        """The fitness of individual if it can be calculated from the reference solution, otherwise None."""
+        decoded = self.decoder(individual)
+        if self._is_unaffected(decoded):
+            return self._calculate_fitness(self.reference_solution, decoded)
+        return None
+
+    def _evaluate_population(self, population):
+        """Simulate individuals, changing only the bounds that differ from the previously simulated individual.
+
+        Individuals are simulated in a greedy nearest-neighbour order (see similarity_order), so consecutive
+        individuals share most of their knockouts and the solver restarts from a nearby basis.
+
+        Returns
+        -------
+        list
+            (fitness, solution) tuples in the order of population (solution is None if the simulation failed).
+        """
+        decoded = [self.decoder(frozenset(individual)) for individual in population]
+        solutions = [None for _ in population]
+        # objective functions that support batches are evaluated for all solutions at once at the end
+        fitness = None if self._batch else [None for _ in population]
+        simulated = []
+        for i, decoded_individual in enumerate(decoded):
+            if self._is_unaffected(decoded_individual):
+                solutions[i] = self.reference_solution
+                if fitness is not None:
+                    fitness[i] = self._calculate_fitness(self.reference_solution, decoded_individual)
+            else:
+                simulated.append(i)
+
+        knockouts = [frozenset(reaction.id for reaction in decoded[i][0]) for i in simulated]
+        knocked_out = {}
+        try:
+            for j in similarity_order(knockouts):
+                i = simulated[j]
+                for reaction_id in [reaction_id for reaction_id in knocked_out if reaction_id not in knockouts[j]]:
+                    knocked_out.pop(reaction_id).reset()
+                for reaction in decoded[i][0]:
+                    if reaction.id not in knocked_out:
+                        tm = TimeMachine()
+                        reaction.knock_out(time_machine=tm)
+                        knocked_out[reaction.id] = tm
+                solutions[i] = self._simulate()
+                if fitness is not None and solutions[i] is not None:
+                    fitness[i] = self._calculate_fitness(solutions[i], decoded[i])
+        finally:
+            for tm in six.itervalues(knocked_out):
+                tm.reset()
+
+        if fitness is None:
+            succeeded = [i for i, solution in enumerate(solutions) if solution is not None]
+            fitness = [None for _ in population]
+            values = objective_functions.batch_fitness(self.objective_function, self.model,
+                                                       [solutions[i] for i in succeeded],
+                                                       [decoded[i] for i in succeeded])
+            for i, value in zip(succeeded, values):
+                fitness[i] = value
+        return [(failed_fitness(self.objective_function), None) if solution is None else (value, solution)
+                for value, solution in zip(fitness, solutions)]
+
+    def _simulate(self):
+        try:
+            return self.simulation_method(self.model,
+                                          cache=self.cache,
+                                          volatile=False,
+                                          raw=True,
+                                          **self.simulation_kwargs)
+        except SolveError as e:
+            logger.debug(e)
+            return None
 
     def _calculate_fitness(self, solution, decoded):
         if isinstance(self.objective_function, list):
@@ -286,12 +480,47 @@ class KnockoutEvaluator(object):
             return self.objective_function(self.model, solution, decoded)
 
 
+class ScreeningEvaluator(object):
+    """
+    Screens knockouts with a cheap simulation method (see KnockoutOptimization.screening_method).
+
+    Returns (viable, upper_bound) tuples: viable is False if the mutant has no feasible solution (so no other
+    simulation method can find one either) and upper_bound is the fitness bound given by the objective function
+    (see ObjectiveFunction.upper_bound; None for multiple objectives or if no bound is known).
+    """
+
+    def __init__(self, model, decoder, objective_function, screening_method):
+        self.model = model
+        self.decoder = decoder
+        self.objective_function = objective_function
+        self.screening_method = screening_method
+
+    def __call__(self, population):
+        return [self.screen(individual) for individual in population]
+
+    def screen(self, individual):
+        decoded = self.decoder(frozenset(individual))
+        with TimeMachine() as tm:
+            for reaction in decoded[0]:
+                reaction.knock_out(time_machine=tm)
+            try:
+                solution = self.screening_method(self.model)
+            except SolveError as e:
+                logger.debug(e)
+                return False, None
+            if isinstance(self.objective_function, list) or not hasattr(self.objective_function, 'upper_bound'):
+                return True, None
+            return True, self.objective_function.upper_bound(self.model, solution, decoded)
+
+
 class KnockoutOptimization(HeuristicOptimization):
     """
     Abstract class for knockout optimization.
     """
 
-    def __init__(self, simulation_method=pfba, max_size=9, variable_size=True, wt_reference=None, *args, **kwargs):
+    def __init__(self, simulation_method=pfba, max_size=9, variable_size=True, wt_reference=None,
+                 fitness_cache_size=100000, fitness_store=None, zero_flux_shortcut=True, screening_method=None,
+                 surrogate=None, surrogate_fraction=0.5, bitset_candidates=False, *args, **kwargs):
         """
          Attributes
         ----------
@@ -300,14 +529,61 @@ class KnockoutOptimization(HeuristicOptimization):
         max_size: int
         variable_size: boolean
         wt_reference: dict
+        fitness_cache_size: int
+            Maximum number of candidate fitness values kept in memory (least recently used are evicted first).
+        fitness_store: SQLiteFitnessStore or str
+            A persistent fitness store (or the path to one) shared by workers, islands and consecutive runs.
+        zero_flux_shortcut: boolean
+            Skip the simulation of candidates that only knock out reactions without flux in the wild-type
+            solution (see ZERO_FLUX_SHORTCUT_METHODS).
+        screening_method: see flux_analysis.simulation
+            A cheap method (fba or pfba) that screens candidates before simulation_method is used. Mutants
+            without a feasible solution, and mutants whose fitness bound (see ObjectiveFunction.upper_bound)
+            is below the worst solution in the archive, are not simulated with simulation_method (they get the
+            fitness of failed simulations).
+        surrogate: KNNSurrogate or True
+            A surrogate model (True for a default KNNSurrogate) trained on the evaluated candidates. Once it is
+            trained, only the surrogate_fraction of new candidates with the best predicted fitness is
+            simulated; the others get their prediction as fitness (capped below the worst solution in the
+            archive, so they never enter it). The surrogate is available to observers as args['surrogate'].
+        surrogate_fraction: float
+            The fraction of new candidates that is simulated when a surrogate is used.
+        bitset_candidates: boolean
+            Encode candidates as BitSets (see genomes.BitSet) instead of lists, so that generators, variators,
+            the archiver and distances work with bit operations. Seeds are converted.
         """
         super(KnockoutOptimization, self).__init__(*args, **kwargs)
         self.wt_reference = wt_reference
+        self.flux_ranges = None
+        self.fitness_cache = caches.FitnessCache(maxsize=fitness_cache_size)
+        # biomass and product fluxes of evaluated candidates, reused when the result is built
+        self.key_flux_cache = caches.FitnessCache(maxsize=fitness_cache_size)
+        self._key_flux_ids = None
+        if isinstance(fitness_store, six.string_types):
+            fitness_store = caches.SQLiteFitnessStore(fitness_store)
+        self.fitness_store = fitness_store
+        self.zero_flux_shortcut = zero_flux_shortcut
+        self.screening_method = screening_method
+        if surrogate is True:
+            surrogate = surrogates.KNNSurrogate()
+        self.surrogate = surrogate
+        self.surrogate_fraction = surrogate_fraction
+        self.bitset_candidates = bitset_candidates
+        self.shortcuts = 0
+        self.simulations = 0
+        self.duplicates = 0
+        self.screened = 0
+        self.predicted = 0
+        self.pruned = 0
+        self._evaluation_scope = None
+        self._store_scope = None
+        self._reference_solution = None
         self._simulation_method = None
         self.simulation_method = simulation_method
         self.max_size = max_size
         self.variable_size = variable_size
         self.representation = None
+        self.equivalents = None
         self._ko_type = None
         self._decoder = None
         self._generator = generators.set_generator
@@ -321,23 +597,314 @@ class KnockoutOptimization(HeuristicOptimization):
         if simulation_method in [lmoma, moma, room] and self.wt_reference is None:
             logger.info("No WT reference found, generating using pfba.")
             self.wt_reference = pfba(self.model).fluxes
+        if simulation_method is room and self.flux_ranges is None:
+            # Knockouts only shrink flux ranges so the wild-type ranges are valid big-M values for every mutant.
+            logger.info("Determining effective flux ranges for ROOM.")
+            self.flux_ranges = effective_bounds(self.model)
         self._simulation_method = simulation_method
 
+    def _simulation_kwargs(self):
+        kwargs = {'reference': self.wt_reference}
+        if self.simulation_method is room:
+            kwargs['flux_ranges'] = self.flux_ranges
+        return kwargs
+
+    def _init_evaluation_scopes(self, simulation_kwargs):
+        if self._evaluation_scope is None:
+            self._evaluation_scope = caches.evaluation_scope(self.model, self.simulation_method, simulation_kwargs,
+                                                             self.objective_function, self.representation)
+            if self.fitness_store is not None:
+                self._store_scope = caches.evaluation_scope(self.model, self.simulation_method, simulation_kwargs,
+                                                            self.objective_function, ko_type=self._ko_type)
+
+    def _init_reference_solution(self, simulation_kwargs):
+        if self._reference_solution is None and self.zero_flux_shortcut and \
+                self.simulation_method in ZERO_FLUX_SHORTCUT_METHODS:
+            try:
+                self._reference_solution = self.simulation_method(self.model, **simulation_kwargs)
+            except SolveError as e:
+                logger.debug("No reference solution for the zero-flux shortcut: %s" % e)
+
+    def _knockout_evaluator(self, simulation_kwargs):
+        self._init_evaluation_scopes(simulation_kwargs)
+        self._init_reference_solution(simulation_kwargs)
+        return KnockoutEvaluator(self.model, self._decoder, self.objective_function, self.simulation_method,
+                                 simulation_kwargs, fitness_store=self.fitness_store, store_scope=self._store_scope,
+                                 reference_solution=self._reference_solution, key_fluxes=self._key_flux_ids)
+
+    def _resolve(self, candidates, evaluator):
+        """Look up candidates in the fitness cache, merge identical ones and apply the zero-flux shortcut.
+
+        Returns
+        -------
+        tuple
+            The known fitness values (None for candidates that must be simulated) and an OrderedDict
+            {key: [index, ...]} with the positions of the identical candidates behind every knockout set
+            that must be simulated.
+        """
+        fitness = [None for _ in candidates]
+        missing = OrderedDict()
+        for i, candidate in enumerate(candidates):
+            key = (self._evaluation_scope, frozenset(candidate))
+            try:
+                fitness[i] = self.fitness_cache[key]
+            except KeyError:
+                missing.setdefault(key, []).append(i)
+
+        pending = OrderedDict()
+        for key, indices in six.iteritems(missing):
+            self.duplicates += len(indices) - 1
+            # shortcut fitness values are cheap to recalculate, so they are not cached
+            value = evaluator.shortcut(candidates[indices[0]])
+            if value is None:
+                pending[key] = indices
+            else:
+                self.shortcuts += 1
+                if self._key_flux_ids is not None:
+                    self.key_flux_cache[key] = evaluator.get_key_fluxes(evaluator.reference_solution)
+                for i in indices:
+                    fitness[i] = value
+        return fitness, pending
+
+    def _archive_threshold(self, args):
+        """The fitness a candidate needs to enter the archive (None if unknown)."""
+        archive = self.heuristic_method.archive
+        if self.is_mo() or not args.get('maximize', True) or not archive or \
+                not isinstance(self.heuristic_method.archiver, archivers.BestSolutionArchiver):
+            return None
+        return min(solution.fitness for solution in archive)
+
+    def _screen(self, candidates, pending, fitness, view, args):
+        """Screen pending candidates with screening_method and return the ones that still must be simulated."""
+        unique_candidates = [candidates[indices[0]] for indices in six.itervalues(pending)]
+        func_obj = ScreeningEvaluator(self.model, self._decoder, self.objective_function, self.screening_method)
+        try:
+            results = view.map(func_obj, (chunk for chunk in partition(unique_candidates, len(view))))
+        except KeyboardInterrupt as e:
+            view.shutdown()
+            raise e
+        threshold = self._archive_threshold(args)
+        remaining = OrderedDict()
+        for (key, indices), (viable, bound) in zip(six.iteritems(pending), reduce(list.__add__, results)):
+            if not viable:
+                # the expensive method has the same constraints, so this is its result too
+                value = failed_fitness(self.objective_function)
+                self.fitness_cache[key] = value
+            elif bound is not None and threshold is not None and bound < threshold:
+                # cannot enter the archive; the bound may be far above the real fitness, so it would let these
+                # candidates win selection against simulated ones (not cached, simulations may still be needed)
+                value = failed_fitness(self.objective_function)
+            else:
+                remaining[key] = indices
+                continue
+            self.screened += 1
+            for i in indices:
+                fitness[i] = value
+        return remaining
+
+    def _preselect(self, candidates, pending, fitness, args):
+        """Rank pending candidates with the surrogate and return the ones that must be simulated."""
+        args['surrogate'] = self.surrogate
+        threshold = self._archive_threshold(args)
+        if threshold is None:
+            return pending
+        unique_candidates = [candidates[indices[0]] for indices in six.itervalues(pending)]
+        selected, predictions = self.surrogate.select(unique_candidates, self.surrogate_fraction)
+        if predictions is None:
+            return pending
+        selected = set(selected)
+        # predictions are not cached and are kept below the archive threshold, so only simulated
+        # candidates end up in the archive
+        below_threshold = numpy.nextafter(threshold, -numpy.inf)
+        remaining = OrderedDict()
+        for j, (key, indices) in enumerate(six.iteritems(pending)):
+            if j in selected:
+                remaining[key] = indices
+                continue
+            self.predicted += 1
+            value = min(predictions[j], below_threshold)
+            for i in indices:
+                fitness[i] = value
+        return remaining
+
+    def _cache_result(self, key, result):
+        """Cache the result of a KnockoutEvaluator (and train the surrogate with it) and return the fitness."""
+        self.simulations += 1
+        if self._key_flux_ids is not None:
+            result, fluxes = result
+            if fluxes is not None:
+                self.key_flux_cache[key] = fluxes
+        self.fitness_cache[key] = result
+        if self.surrogate is not None and not self.is_mo():
+            self.surrogate.update(key[1], result)
+        return result
+
+    @property
+    def evaluation_stats(self):
+        stats = self.fitness_cache.stats
+        stats.update(shortcuts=self.shortcuts, simulations=self.simulations, duplicates=self.duplicates,
+                     screened=self.screened, predicted=self.predicted, pruned=self.pruned)
+        evaluated = self.shortcuts + self.simulations
+        stats['shortcut_rate'] = self.shortcuts / float(evaluated) if evaluated > 0 else 0.
+        return stats
+
     def _evaluator(self, candidates, args):
         view = args.get('view')
-        population_chunks = (chunk for chunk in partition(candidates, len(view)))
-        kwargs = {'reference': self.wt_reference}
+        func_obj = self._knockout_evaluator(self._simulation_kwargs())
+
+        fitness, pending = self._resolve(candidates, func_obj)
+        if len(pending) > 0 and self.surrogate is not None:
+            pending = self._preselect(candidates, pending, fitness, args)
+        if len(pending) > 0 and self.screening_method is not None:
+            pending = self._screen(candidates, pending, fitness, view, args)
+        if len(pending) > 0:
+            self._simulate_pending(candidates, pending, fitness, func_obj, view)
 
-        func_obj = KnockoutEvaluator(self.model, self._decoder, self.objective_function, self.simulation_method, kwargs)
+        return fitness
+
+    def _simulate_pending(self, candidates, pending, fitness, evaluator, view):
+        """Simulate pending candidates (see _resolve) in parallel and cache their fitness."""
+        unique_candidates = [candidates[indices[0]] for indices in six.itervalues(pending)]
+        population_chunks = (chunk for chunk in partition(unique_candidates, len(view)))
         try:
-            results = view.map(func_obj, population_chunks)
+            results = view.map(evaluator, population_chunks)
         except KeyboardInterrupt as e:
             view.shutdown()
             raise e
 
-        fitness = reduce(list.__add__, results)
+        for (key, indices), result in zip(six.iteritems(pending), reduce(list.__add__, results)):
+            value = self._cache_result(key, result)
+            for i in indices:
+                fitness[i] = value
 
-        return fitness
+    def _evolve_asynchronously(self, generator, maximize, view, pop_size=100, seeds=None, batch_size=None,
+                               max_pending=None, **args):
+        """Steady-state evolution that keeps all workers of view busy.
+
+        Offspring are bred from the current population whenever fewer than max_pending batches are being
+        evaluated, and evaluated individuals enter the population (via the steady-state counterpart of the
+        configured replacer) and the archive as soon as their batch returns. Observers are notified every
+        pop_size evaluations, i.e. once per pseudo-generation.
+
+        Parameters
+        ----------
+        batch_size : int
+            Number of candidates sent to a worker at once (default: pop_size / (2 * len(view)), at least 2).
+        max_pending : int
+            Maximum number of batches being evaluated at the same time (default: 2 * len(view)).
+        """
+        ec = self.heuristic_method
+        try:
+            replacer = STEADY_STATE_REPLACERS[ec.replacer]
+        except KeyError:
+            raise ValueError("Asynchronous evaluation is not supported with replacer %s" % ec.replacer.__name__)
+        if batch_size is None:
+            batch_size = max(2, int(math.ceil(pop_size / (2. * len(view)))))
+        if max_pending is None:
+            max_pending = 2 * len(view)
+        if seeds is None:
+            seeds = []
+
+        args.update(view=view, maximize=maximize, pop_size=pop_size, _ec=ec)
+        # selectors return num_selected parents and crossovers need pairs of them
+        args['num_selected'] = batch_size + batch_size % 2
+        ec._kwargs = args
+        ec.maximize = maximize
+        ec.generator = generator
+        ec.termination_cause = None
+        ec.population = []
+        ec.archive = []
+        ec.num_evaluations = 0
+        ec.num_generations = 0
+        random = ec._random
+        variators = ec.variator if isinstance(ec.variator, (list, tuple)) else [ec.variator]
+        observers = ec.observer if isinstance(ec.observer, (list, tuple)) else [ec.observer]
+
+        func_obj = self._knockout_evaluator(self._simulation_kwargs())
+        pending = deque()
+        evaluated = []
+
+        def submit(candidates):
+            known, missing = self._resolve(candidates, func_obj)
+            if len(missing) > 0 and self.surrogate is not None:
+                missing = self._preselect(candidates, missing, known, args)
+            if len(missing) > 0 and self.screening_method is not None:
+                missing = self._screen(candidates, missing, known, view, args)
+            evaluated.extend((candidate, fitness) for candidate, fitness in zip(candidates, known)
+                             if fitness is not None)
+            groups = [(key, [candidates[i] for i in indices]) for key, indices in six.iteritems(missing)]
+            for chunk in (groups[i:i + batch_size] for i in range(0, len(groups), batch_size)):
+                pending.append((chunk, view.apply_async(func_obj, [duplicates[0] for _, duplicates in chunk])))
+
+        def collect():
+            while len(evaluated) == 0 and len(pending) > 0:
+                pending[0][1].wait(0.01)
+                for entry in [entry for entry in pending if entry[1].ready()]:
+                    pending.remove(entry)
+                    chunk, result = entry
+                    for (key, duplicates), value in zip(chunk, result.get()):
+                        fitness = self._cache_result(key, value)
+                        evaluated.extend((candidate, fitness) for candidate in duplicates)
+            individuals = []
+            for candidate, fitness in evaluated:
+                individual = inspyred.ec.Individual(candidate, maximize=maximize)
+                individual.fitness = fitness
+                individuals.append(individual)
+            del evaluated[:]
+            return individuals
+
+        def notify():
+            for observer in observers:
+                observer(population=list(ec.population), num_generations=ec.num_generations,
+                         num_evaluations=ec.num_evaluations, args=args)
+
+        try:
+            initial = list(seeds)
+            initial.extend(generator(random=random, args=args) for _ in range(pop_size - len(initial)))
+            submit(initial)
+            since_last_notification = 0
+            terminated = False
+            while len(pending) > 0 or len(evaluated) > 0:
+                individuals = collect()
+                ec.num_evaluations += len(individuals)
+                missing = pop_size - len(ec.population)
+                ec.population.extend(individuals[:missing])
+                if len(individuals) > missing:
+                    ec.population = replacer(random=random, population=ec.population, parents=[],
+                                             offspring=individuals[missing:], args=args)
+                # archivers accumulate solutions so they only need to see the new individuals (except for
+                # population_archiver, which mirrors the population)
+                if ec.archiver is inspyred.ec.archivers.population_archiver:
+                    ec.archive = ec.archiver(random=random, population=list(ec.population), archive=ec.archive,
+                                             args=args)
+                else:
+                    ec.archive = ec.archiver(random=random, population=individuals, archive=ec.archive, args=args)
+
+                if len(ec.population) < pop_size or terminated:
+                    continue
+                if missing > 0:
+                    notify()
+                else:
+                    since_last_notification += len(individuals)
+                    if since_last_notification >= pop_size:
+                        since_last_notification = 0
+                        ec.num_generations += 1
+                        notify()
+                terminated = ec._should_terminate(list(ec.population), ec.num_generations, ec.num_evaluations)
+
+                while not terminated and len(pending) < max_pending:
+                    parents = ec.selector(random=random, population=list(ec.population), args=args)
+                    offspring = [copy.deepcopy(individual.candidate) for individual in parents]
+                    for variator in variators:
+                        offspring = variator(random=random, candidates=offspring, args=args)
+                    submit(offspring)
+                    if len(evaluated) > 0:
+                        break
+        except KeyboardInterrupt as e:
+            view.shutdown()
+            raise e
+
+        return ec.population
 
     @HeuristicOptimization.heuristic_method.setter
     def heuristic_method(self, heuristic_method):
@@ -384,25 +951,243 @@ class KnockoutOptimization(HeuristicOptimization):
         if self.progress:
             self.observers.append(observers.ProgressObserver())
 
-    def run(self, **kwargs):
-        self.heuristic_method.observer = self.observers
+    def run(self, checkpoint=None, checkpoint_generations=10, checkpoint_seconds=None, resume_from=None,
+            keep_key_fluxes=True, **kwargs):
+        """
+        Run the optimization (see HeuristicOptimization.run).
+
+        Parameters
+        ----------
+        checkpoint : str
+            Path of a checkpoint file that is written every checkpoint_generations generations and/or
+            checkpoint_seconds seconds, and at the end of the run.
+        resume_from : str
+            Path of a checkpoint file to continue from.
+        keep_key_fluxes : bool
+            Keep the biomass and product fluxes of evaluated candidates, so the result does not have to
+            simulate its solutions again.
+        """
+        self._prepare_run(keep_key_fluxes, kwargs)
+        run_observers = list(self.observers)
+        checkpoint_observer = None
+        if resume_from is not None:
+            resume = checkpoints.load_checkpoint(resume_from)
+            kwargs['seeds'] = [candidate for candidate, _ in resume['population']]
+            kwargs['pop_size'] = len(kwargs['seeds'])
+            for key, value in resume['fitness_cache']:
+                self.fitness_cache[key] = value
+            self._init_evaluation_scopes(self._simulation_kwargs())
+            for candidate, fitness in resume['population']:
+                self.fitness_cache[(self._evaluation_scope, frozenset(candidate))] = fitness
+        else:
+            resume = None
+        if self.bitset_candidates and kwargs.get('seeds') is not None:
+            kwargs['seeds'] = [BitSet.of(seed) for seed in kwargs['seeds']]
+        kwargs.setdefault('bitset_candidates', self.bitset_candidates)
+        if checkpoint is not None or resume is not None:
+            checkpoint_observer = checkpoints.CheckpointObserver(checkpoint, self.fitness_cache,
+                                                                 generations=checkpoint_generations,
+                                                                 seconds=checkpoint_seconds, resume=resume)
+            run_observers.insert(0, checkpoint_observer)
+        self.heuristic_method.observer = run_observers
         super(KnockoutOptimization, self).run(
             distance_function=set_distance_function,
             representation=self.representation,
             candidate_size=self.max_size,
             variable_candidate_size=self.variable_size,
             **kwargs)
+        if checkpoint_observer is not None:
+            checkpoint_observer.end()
+        stats = self.evaluation_stats
+        logger.info("Fitness cache: %(hits)i hits, %(misses)i misses (hit rate %(hit_rate).2f), "
+                    "%(evictions)i evictions, %(size)i entries" % stats)
+        logger.info("Zero-flux shortcut: %(shortcuts)i candidates calculated from the reference solution, "
+                    "%(simulations)i simulated (shortcut rate %(shortcut_rate).2f)" % stats)
+        logger.info("Deduplication: %(duplicates)i candidates were identical to another candidate evaluated at "
+                    "the same time and not simulated again" % stats)
+        if self.screening_method is not None:
+            logger.info("Screening: %i of %i candidates were not simulated with %s" % (
+                stats['screened'], stats['screened'] + stats['simulations'], self.simulation_method.__name__))
+        if self.surrogate is not None:
+            logger.info("Surrogate: %i candidates got their predicted fitness instead of being simulated, %s" % (
+                stats['predicted'], self.surrogate))
+        return self._result(self.heuristic_method, self.heuristic_method.archive, kwargs)
+
+    def _prepare_run(self, keep_key_fluxes, kwargs):
+        self._evaluation_scope = None
+        if keep_key_fluxes:
+            self._key_flux_ids = key_flux_ids(kwargs.get('biomass', None), kwargs.get('product', None))
+        else:
+            self._key_flux_ids = None
+        self._reference_solution = None
+        self.fitness_cache.reset_stats()
+        self.shortcuts = 0
+        self.simulations = 0
+        self.duplicates = 0
+        self.screened = 0
+        self.predicted = 0
+        self.pruned = 0
+        if self.surrogate is not None:
+            # the fitness of candidates depends on the run's objective function, so the surrogate starts over
+            self.surrogate.clear()
+
+    def _result(self, heuristic_method, solutions, kwargs):
+        key_fluxes = {}
+        if self._key_flux_ids is not None:
+            for individual in solutions:
+                fluxes = self.key_flux_cache.get((self._evaluation_scope, frozenset(individual.candidate)))
+                if fluxes is not None and all(reaction_id in fluxes for reaction_id in self._key_flux_ids):
+                    key_fluxes[frozenset(individual.candidate)] = fluxes
         return KnockoutOptimizationResult(model=self.model,
-                                          heuristic_method=self.heuristic_method,
+                                          heuristic_method=heuristic_method,
                                           simulation_method=self.simulation_method,
-                                          solutions=self.heuristic_method.archive,
+                                          solutions=solutions,
                                           objective_function=self.objective_function,
                                           ko_type=self._ko_type,
                                           decoder=self._decoder,
                                           product=kwargs.get('product', None),
                                           biomass=kwargs.get('biomass', None),
                                           seed=self.seed,
-                                          reference=self.wt_reference)
+                                          reference=self.wt_reference,
+                                          equivalents=self.equivalents,
+                                          key_fluxes=key_fluxes,
+                                          view=kwargs.get('view', config.default_view))
+
+    def enumerate_knockouts(self, max_size=3, max_solutions=100, min_growth=None, view=config.default_view,
+                            keep_key_fluxes=True, **kwargs):
+        """
+        Find the best knockout sets of up to max_size targets by exhaustive enumeration.
+
+        Unlike run, the result is guaranteed to contain the best solutions. Knockout sets are enumerated by size,
+        and sets are skipped together with all their supersets (branch and bound, see enumeration):
+
+        - if they are lethal (no feasible solution, or less than min_growth),
+        - if a bound of their fitness (see ObjectiveFunction.superset_bound; determined from the flux ranges of the
+          objective's reactions) shows that neither they nor their supersets can have a positive fitness or
+          improve on the max_solutions best solutions found so far.
+
+        Fitness values are taken from and added to the fitness cache (and fitness store). The sets of every size
+        are screened and simulated in parallel on view. The number of sets skipped together with their supersets is
+        counted in pruned.
+
+        Parameters
+        ----------
+        max_size : int
+            The largest number of knockouts.
+        max_solutions : int
+            The number of solutions to keep (the best ones).
+        min_growth : float
+            Mutants whose maximal objective value (usually growth) is below min_growth are treated as lethal.
+        view : SequentialView or MultiprocessingView or ipython.cluster.DirectView
+        keep_key_fluxes : bool
+            See run.
+        kwargs : dict
+            biomass and product, as for run.
+
+        Returns
+        -------
+        KnockoutOptimizationResult
+            heuristic_method is None.
+        """
+        if self.is_mo():
+            raise ValueError("Knockout enumeration supports a single objective function only.")
+        kwargs['view'] = view
+        self._prepare_run(keep_key_fluxes, kwargs)
+        evaluator = self._knockout_evaluator(self._simulation_kwargs())
+        tolerance = 10. ** -(config.ndecimals - 1)
+        best = []
+        counter = itertools.count()
+
+        def pruned(bound):
+            if bound is None:
+                return False
+            if bound <= 0:
+                return True
+            return len(best) == max_solutions and bound + tolerance < best[0][0]
+
+        alive = [(i,) for i in range(len(self.representation))]
+        size = 1
+        while len(alive) > 0 and size <= max_size:
+            candidates = alive
+            bounds = [None for _ in candidates]
+            if size < max_size:
+                # leaves are simulated right away, their subtrees are empty
+                screening = enumeration.SupersetBoundEvaluator(self.model, self._decoder, self.objective_function,
+                                                               min_growth=min_growth)
+                try:
+                    results = view.map(screening, (chunk for chunk in partition(candidates, len(view))))
+                except KeyboardInterrupt as e:
+                    view.shutdown()
+                    raise e
+                screened = reduce(list.__add__, results, [])
+                candidates, bounds = [], []
+                for candidate, (viable, bound) in zip(alive, screened):
+                    if viable and not pruned(bound):
+                        candidates.append(candidate)
+                        bounds.append(bound)
+                self.pruned += len(alive) - len(candidates)
+                logger.info("%i knockouts: %i of %i sets are lethal or bounded" % (
+                    size, len(alive) - len(candidates), len(alive)))
+
+            fitness, pending = self._resolve([list(candidate) for candidate in candidates], evaluator)
+            if len(pending) > 0:
+                self._simulate_pending([list(candidate) for candidate in candidates], pending, fitness, evaluator,
+                                       view)
+            for candidate, value in zip(candidates, fitness):
+                if value > 0 and (len(best) < max_solutions or value > best[0][0]):
+                    heapq.heappush(best, (value, next(counter), candidate))
+                    if len(best) > max_solutions:
+                        heapq.heappop(best)
+            logger.info("%i knockouts: %i sets evaluated, best fitness %s" % (
+                size, len(candidates), max(best)[0] if best else None))
+
+            survivors = [candidate for candidate, bound in zip(candidates, bounds) if not pruned(bound)]
+            self.pruned += len(candidates) - len(survivors)
+            alive = enumeration.next_level(survivors)
+            size += 1
+
+        solutions = [archivers.SolutionTuple(list(candidate), value)
+                     for value, _, candidate in sorted(best, key=lambda item: (-item[0], item[1]))]
+        return self._result(None, solutions, kwargs)
+
+
+def key_flux_ids(biomass=None, product=None):
+    """Ids of the reactions whose fluxes are reported in a KnockoutOptimizationResult."""
+    ids = []
+    if biomass is not None:
+        ids.append(getattr(biomass, 'id', biomass))
+    if isinstance(product, (list, tuple, set)):
+        ids.extend(getattr(p, 'id', p) for p in product)
+    elif product is not None:
+        ids.append(getattr(product, 'id', product))
+    return ids
+
+
+class _KeyFluxSimulator(object):
+    """Simulates knockout candidates and returns the fluxes of some reactions (None if the simulation fails)."""
+
+    def __init__(self, model, decoder, simulation_method, reference, reaction_ids):
+        self.model = model
+        self.decoder = decoder
+        self.simulation_method = simulation_method
+        self.reference = reference
+        self.reaction_ids = reaction_ids
+
+    def __call__(self, candidates):
+        results = []
+        for candidate in candidates:
+            decoded = self.decoder(candidate)
+            with TimeMachine() as tm:
+                for reaction in decoded[0]:
+                    reaction.knock_out(time_machine=tm)
+                try:
+                    solution = self.simulation_method(self.model, reference=self.reference)
+                except SolveError as e:
+                    logger.debug(e)
+                    results.append(None)
+                    continue
+            results.append(dict((reaction_id, solution.fluxes[reaction_id]) for reaction_id in self.reaction_ids))
+        return results
 
 
 # TODO: Figure out a way to provide generic parameters for different simulation methods
@@ -413,12 +1198,22 @@ class KnockoutOptimizationResult(core.result.Result):
 
     def __init__(self, model=None, heuristic_method=None, simulation_method=None, solutions=None,
                  objective_function=None, ko_type=None, decoder=None, product=None, biomass=None,
-                 seed=None, reference=None, *args, **kwargs):
+                 seed=None, reference=None, equivalents=None, key_fluxes=None, view=None, *args, **kwargs):
+        """
+        Parameters
+        ----------
+        key_fluxes : dict
+            {frozenset(candidate): {reaction_id: flux}} biomass and product fluxes of solutions that were kept
+            during the optimization. Other solutions are simulated again.
+        view : SequentialView or MultiprocessingView or ipython.cluster.DirectView
+            The view used to simulate solutions again (default: SequentialView).
+        """
         super(KnockoutOptimizationResult, self).__init__(*args, **kwargs)
         self.product = None
         self.biomass = biomass
         self.seed = seed
         self.reference = reference
+        self.equivalents = equivalents
         if not product is None:
             self.product = product
         self.model = model
@@ -430,18 +1225,29 @@ class KnockoutOptimizationResult(core.result.Result):
             self.objective_functions = [objective_function]
         self.ko_type = ko_type
         self.decoder = decoder
-        self.solutions = self._build_solutions(solutions)
+        self.solutions = self._build_solutions(solutions, key_fluxes, view)
 
     def apply(self, column, function, *args, **kwargs):
         self.solutions[column].apply(function, *args, **kwargs)
 
     def __getstate__(self):
-        return {
+        state = {
             'product': self.product,
             'model': self.model,
             'biomass': self.biomass,
             'reference': self.reference,
             'simulation_method': self.simulation_method,
+            'heuristic_method.__class__': None,
+            'seed': self.seed,
+            'objective_functions': self.objective_functions,
+            'ko_type': self.ko_type,
+            'equivalents': self.equivalents,
+            'solutions': self.solutions,
+        }
+        if self.heuristic_method is None:
+            # results of KnockoutOptimization.enumerate_knockouts
+            return state
+        state.update({
             'heuristic_method.__class__': self.heuristic_method.__class__,
             'heuristic_method.maximize': self.heuristic_method.maximize,
             'heuristic_method.variator': self.heuristic_method.variator,
@@ -449,7 +1255,6 @@ class KnockoutOptimizationResult(core.result.Result):
             'heuristic_method.archiver': self.heuristic_method.archiver,
             'heuristic_method.termination_cause': self.heuristic_method.termination_cause,
             'heuristic_method._random': self.heuristic_method._random,
-            'seed': self.seed,
             'heuristic_method.generator': self.heuristic_method.generator,
             'heuristic_method._kwargs.representation': self.heuristic_method._kwargs.get('representation'),
             'heuristic_method._kwargs.max_candidate_size': self.heuristic_method._kwargs.get('max_candidate_size'),
@@ -459,10 +1264,8 @@ class KnockoutOptimizationResult(core.result.Result):
             'heuristic_method._kwargs.mutation_rate': self.heuristic_method._kwargs.get('mutation_rate'),
             'heuristic_method._kwargs.crossover_rate': self.heuristic_method._kwargs.get('crossover_rate'),
             'heuristic_method._kwargs.num_elites': self.heuristic_method._kwargs.get('num_elites'),
-            'objective_functions': self.objective_functions,
-            'ko_type': self.ko_type,
-            'solutions': self.solutions,
-        }
+        })
+        return state
 
     def __setstate__(self, d):
         self.product = d['product']
@@ -471,52 +1274,55 @@ class KnockoutOptimizationResult(core.result.Result):
         self.simulation_method = d['simulation_method']
         self.seed = d['seed']
         self.reference = d['reference']
-        random = d['heuristic_method._random']
-        self.heuristic_method = d['heuristic_method.__class__'](random)
-        self.heuristic_method.maximize = d['heuristic_method.maximize']
-        self.heuristic_method.terminator = d['heuristic_method.terminator']
-        self.heuristic_method.termination_cause = d['heuristic_method.termination_cause']
-        self.heuristic_method.archiver = d['heuristic_method.archiver']
-        self.heuristic_method._kwargs['representation'] = d['heuristic_method._kwargs.representation']
-        self.heuristic_method._kwargs['max_candidate_size'] = d['heuristic_method._kwargs.max_candidate_size']
-        self.heuristic_method._kwargs['variable_candidate_size'] = d['heuristic_method._kwargs.variable_candidate_size']
-        self.heuristic_method._kwargs['pop_size'] = d['heuristic_method._kwargs.pop_size']
-        self.heuristic_method._kwargs['mutation_rate'] = d['heuristic_method._kwargs.mutation_rate']
-        self.heuristic_method._kwargs['crossover_rate'] = d['heuristic_method._kwargs.crossover_rate']
-        self.heuristic_method._kwargs['num_elites'] = d['heuristic_method._kwargs.num_elites']
+        if d['heuristic_method.__class__'] is None:
+            self.heuristic_method = None
+        else:
+            random = d['heuristic_method._random']
+            self.heuristic_method = d['heuristic_method.__class__'](random)
+            self.heuristic_method.maximize = d['heuristic_method.maximize']
+            self.heuristic_method.terminator = d['heuristic_method.terminator']
+            self.heuristic_method.termination_cause = d['heuristic_method.termination_cause']
+            self.heuristic_method.archiver = d['heuristic_method.archiver']
+            kwargs = self.heuristic_method._kwargs
+            kwargs['representation'] = d['heuristic_method._kwargs.representation']
+            kwargs['max_candidate_size'] = d['heuristic_method._kwargs.max_candidate_size']
+            kwargs['variable_candidate_size'] = d['heuristic_method._kwargs.variable_candidate_size']
+            kwargs['pop_size'] = d['heuristic_method._kwargs.pop_size']
+            kwargs['mutation_rate'] = d['heuristic_method._kwargs.mutation_rate']
+            kwargs['crossover_rate'] = d['heuristic_method._kwargs.crossover_rate']
+            kwargs['num_elites'] = d['heuristic_method._kwargs.num_elites']
         self.objective_functions = d['objective_functions']
         self.ko_type = d['ko_type']
+        self.equivalents = d.get('equivalents')
         self.solutions = d['solutions']
 
-    def _build_solutions(self, solutions):
+    def _build_solutions(self, solutions, key_fluxes=None, view=None):
         knockouts = []
         biomass = []
         fitness = []
         products = []
         sizes = []
         reactions = []
+        solutions = [solution for solution in solutions
+                     if isinstance(solution.fitness, Pareto) or solution.fitness > 0]
+        fluxes = self._key_fluxes(solutions, key_fluxes, view)
         for solution in solutions:
-            mo = isinstance(solution.fitness, Pareto)
-            proceed = True if mo else solution.fitness > 0
-            if proceed:
-                decoded_solution = self.decoder(solution.candidate)
-                try:
-                    simulation_result = self._simulate(decoded_solution[0])
-                except SolveError as e:
-                    logger.debug(e)
-                    continue
-                size = len(decoded_solution[1])
-
-                if self.biomass:
-                    biomass.append(simulation_result[self.biomass])
-                fitness.append(solution.fitness)
-                knockouts.append(frozenset([v.id for v in decoded_solution[1]]))
-                reactions.append(frozenset([v.id for v in decoded_solution[0]]))
-                sizes.append(size)
-                if isinstance(self.product, (list, tuple, set)):
-                    products.append([simulation_result[p] for p in self.product])
-                elif self.product is not None:
-                    products.append(simulation_result[self.product])
+            simulation_result = fluxes[frozenset(solution.candidate)]
+            if simulation_result is None:
+                continue
+            decoded_solution = self.decoder(solution.candidate)
+            size = len(decoded_solution[1])
+
+            if self.biomass:
+                biomass.append(simulation_result[getattr(self.biomass, 'id', self.biomass)])
+            fitness.append(solution.fitness)
+            knockouts.append(frozenset([v.id for v in decoded_solution[1]]))
+            reactions.append(frozenset([v.id for v in decoded_solution[0]]))
+            sizes.append(size)
+            if isinstance(self.product, (list, tuple, set)):
+                products.append([simulation_result[getattr(p, 'id', p)] for p in self.product])
+            elif self.product is not None:
+                products.append(simulation_result[getattr(self.product, 'id', self.product)])
 
         assert len(knockouts) == len(fitness)
         assert len(sizes) == len(knockouts)
@@ -524,6 +1330,10 @@ class KnockoutOptimizationResult(core.result.Result):
             data_frame = DataFrame({KNOCKOUTS: knockouts, FITNESS: fitness, SIZE: sizes})
         else:
             data_frame = DataFrame({KNOCKOUTS: knockouts, REACTIONS: reactions, FITNESS: fitness, SIZE: sizes})
+        if self.equivalents is not None:
+            # every knockout stands for a group of targets with the same effect
+            data_frame[EQUIVALENTS] = [tuple(frozenset(self.equivalents.get(target, [target]))
+                                             for target in sorted(targets)) for targets in knockouts]
         if self.biomass is not None:
             assert len(biomass) == len(knockouts)
             data_frame[BIOMASS] = biomass
@@ -537,12 +1347,24 @@ class KnockoutOptimizationResult(core.result.Result):
 
         return data_frame
 
-    def _simulate(self, reactions):
-        with TimeMachine() as tm:
-            for reaction in reactions:
-                reaction.knock_out(time_machine=tm)
-            solution = self.simulation_method(self.model, reference=self.reference)
-            return solution
+    def _key_fluxes(self, solutions, key_fluxes, view):
+        """Biomass and product fluxes of solutions ({frozenset(candidate): {reaction_id: flux} or None}).
+
+        Solutions without kept fluxes are simulated again, in parallel if a view is given. Fluxes are None
+        if the simulation failed.
+        """
+        fluxes = dict(key_fluxes or {})
+        missing = [solution.candidate for solution in solutions if frozenset(solution.candidate) not in fluxes]
+        if len(missing) > 0:
+            if view is None:
+                view = SequentialView()
+            logger.debug("Simulating %i solutions again" % len(missing))
+            func_obj = _KeyFluxSimulator(self.model, self.decoder, self.simulation_method, self.reference,
+                                         key_flux_ids(self.biomass, self.product))
+            results = view.map(func_obj, (chunk for chunk in partition(missing, len(view))))
+            for candidate, candidate_fluxes in zip(missing, reduce(list.__add__, results, [])):
+                fluxes[frozenset(candidate)] = candidate_fluxes
+        return fluxes
 
     def _repr_html_(self):
 
@@ -557,7 +1379,10 @@ class KnockoutOptimizationResult(core.result.Result):
         <ul>
         """
         model_id = self.model.id
-        heuristic = self.heuristic_method.__class__.__name__
+        if self.heuristic_method is None:
+            heuristic = "exhaustive enumeration"
+        else:
+            heuristic = self.heuristic_method.__class__.__name__
         of_string = "<br/>".join([o._repr_latex_() for o in self.objective_functions])
         simulation = self.simulation_method.__name__
         solutions = self.solutions._repr_html_()
@@ -597,7 +1422,7 @@ class KnockoutOptimizationResult(core.result.Result):
             knockouts = self.solutions[KNOCKOUTS][index]
         else:
             genes = [self.model.genes.get_by_id(g) for g in self.solutions[KNOCKOUTS][index]]
-            knockouts = find_gene_knockout_reactions(self.model, genes)
+            knockouts = self.model.gpr_index.knockout_reactions(self.model, genes)
 
         builder = draw_knockout_result(self.model, map_name, self.simulation_method, knockouts)
         return builder.display_in_notebook()
@@ -635,6 +1460,10 @@ class ReactionKnockoutOptimization(KnockoutOptimization):
     essential_reactions: list
         A list of reactions that cannot be knocked out. If None, then all essential reactions will be removed from
         the valid reactions set.
+    collapse_coupled_reactions: boolean
+        If true, blocked reactions are dropped and fully coupled reactions are searched as one target (see
+        flux_analysis.flux_coupling_analysis). Results list the groups in an 'Equivalents' column. The coupling
+        analysis runs a flux variability analysis on construction, so this is off by default (default: False).
 
     Methods
     -------
@@ -648,7 +1477,7 @@ class ReactionKnockoutOptimization(KnockoutOptimization):
 
     """
 
-    def __init__(self, reactions=None, essential_reactions=None, *args, **kwargs):
+    def __init__(self, reactions=None, essential_reactions=None, collapse_coupled_reactions=False, *args, **kwargs):
         super(ReactionKnockoutOptimization, self).__init__(*args, **kwargs)
         if reactions is None:
             self.reactions = set([r.id for r in self.model.reactions])
@@ -661,7 +1490,15 @@ class ReactionKnockoutOptimization(KnockoutOptimization):
             self.essential_reactions = essential_reactions
 
         exchange_reactions = set([r.id for r in self.model.exchanges])
-        self.representation = list(self.reactions.difference(self.essential_reactions).difference(exchange_reactions))
+        reactions = self.reactions.difference(self.essential_reactions).difference(exchange_reactions)
+        if collapse_coupled_reactions:
+            groups = flux_coupling_analysis(self.model).equivalent_reactions(reactions)
+            self.equivalents = dict((group[0], group) for group in groups)
+            self.representation = [group[0] for group in groups]
+            logger.info("%i candidate reactions collapsed into %i coupled sets that are not blocked" % (
+                len(reactions), len(self.representation)))
+        else:
+            self.representation = list(reactions)
         self._ko_type = REACTION_KNOCKOUT_TYPE
         self._decoder = decoders.ReactionKnockoutDecoder(self.representation, self.model)
 
@@ -698,6 +1535,9 @@ class GeneKnockoutOptimization(KnockoutOptimization):
     essential_genes: list
         A list of genes that cannot be knocked out. If None, then all essential genes will be removed from the valid
         genes set.
+    collapse_equivalent_genes: boolean
+        If true, genes that have the same effect when knocked out (according to the model's GPR rules) are searched
+        as one target and genes without any effect are dropped. Results list the groups in an 'Equivalents' column.
 
     Methods
     -------
@@ -711,7 +1551,7 @@ class GeneKnockoutOptimization(KnockoutOptimization):
 
     """
 
-    def __init__(self, genes=None, essential_genes=None, *args, **kwargs):
+    def __init__(self, genes=None, essential_genes=None, collapse_equivalent_genes=True, *args, **kwargs):
         super(GeneKnockoutOptimization, self).__init__(*args, **kwargs)
         if genes is None:
             self.genes = set([g.id for g in self.model.genes])
@@ -723,7 +1563,15 @@ class GeneKnockoutOptimization(KnockoutOptimization):
         else:
             self.essential_genes = essential_genes
 
-        self.representation = list(self.genes.difference(self.essential_genes))
+        genes = self.genes.difference(self.essential_genes)
+        if collapse_equivalent_genes:
+            groups = self.model.gpr_index.equivalent_genes(genes)
+            self.equivalents = dict((group[0], group) for group in groups)
+            self.representation = [group[0] for group in groups]
+            logger.info("%i candidate genes collapsed into %i groups with distinct knockout effects" % (
+                len(genes), len(self.representation)))
+        else:
+            self.representation = list(genes)
         self._ko_type = GENE_KNOCKOUT_TYPE
         self._decoder = decoders.GeneKnockoutDecoder(self.representation, self.model)
 
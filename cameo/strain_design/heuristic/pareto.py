@@ -0,0 +1,243 @@
+# Copyright 2015 Novo Nordisk Foundation Center for Biosustainability, DTU.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Non-dominated sorting with fitness matrices.
+
+inspyred compares Pareto objects pairwise in Python (O(M*N^2) method calls per generation). The functions
+here convert the fitness of a population into a (N x M) numpy array once and determine dominance,
+fronts and crowding distances with array operations.
+"""
+
+from __future__ import absolute_import, print_function
+
+__all__ = ['fitness_matrix', 'dominance_matrix', 'non_dominated_fronts', 'crowding_distance',
+           'nsga_replacement', 'nondominated_archiver']
+
+import numpy
+from six.moves import range
+
+from cameo.strain_design.heuristic.genomes import MultipleChromosomeGenome
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of elements of the (rows x N x M) comparison arrays built at once.
+_BLOCK_SIZE = 2 ** 22
+
+
+def _values(fitness):
+    return list(getattr(fitness, 'values', [fitness]))
+
+
+def fitness_matrix(individuals, oriented=True):
+    """The fitness values of individuals as a (N x M) array.
+
+    Parameters
+    ----------
+    individuals : list
+        inspyred.ec.Individual with Pareto (or scalar) fitness.
+    oriented : bool
+        Flip the sign of objectives that are minimized (by Pareto.maximize or Individual.maximize), so that
+        larger values are better in every column.
+
+    Returns
+    -------
+    numpy.ndarray
+    """
+    matrix = numpy.array([_values(individual.fitness) for individual in individuals], dtype=float)
+    if len(individuals) == 0:
+        return matrix.reshape(0, 0)
+    if oriented:
+        for i, individual in enumerate(individuals):
+            maximize = getattr(individual.fitness, 'maximize', [True] * matrix.shape[1])
+            signs = numpy.array([1. if m else -1. for m in maximize])
+            if not individual.maximize:
+                signs = -signs
+            matrix[i] *= signs
+    return matrix
+
+
+def dominance_matrix(matrix):
+    """D[i, j] is True if row i of an oriented fitness matrix dominates row j.
+
+    A row dominates another one if it is at least as good in all objectives and better in at least one.
+    """
+    n, m = matrix.shape
+    dominance = numpy.empty((n, n), dtype=bool)
+    rows = max(1, _BLOCK_SIZE // max(1, n * m))
+    for start in range(0, n, rows):
+        block = matrix[start:start + rows, numpy.newaxis, :]
+        dominance[start:start + rows] = (block >= matrix).all(axis=2) & (block > matrix).any(axis=2)
+    return dominance
+
+
+def non_dominated_fronts(matrix):
+    """Fast non-dominated sorting (Deb et al. 2002) of an oriented fitness matrix.
+
+    Returns
+    -------
+    list
+        Arrays with the row indices of every front (ascending), best front first.
+    """
+    dominance = dominance_matrix(matrix)
+    dominated_by = dominance.sum(axis=0)
+    remaining = numpy.ones(len(matrix), dtype=bool)
+    fronts = []
+    while remaining.any():
+        front = numpy.flatnonzero(remaining & (dominated_by == 0))
+        fronts.append(front)
+        remaining[front] = False
+        dominated_by -= dominance[front].sum(axis=0)
+    return fronts
+
+
+def crowding_distance(matrix, order=None):
+    """Crowding distances of the rows of a fitness matrix (one front).
+
+    Distances are sums of the (not normalized) differences between the neighbours of every row in each
+    objective; the extreme rows of every objective get an infinite distance (as in inspyred).
+
+    Parameters
+    ----------
+    matrix : numpy.ndarray
+    order : numpy.ndarray, optional
+        The initial order of the rows. Objectives are sorted one after another with a stable sort that
+        starts from the order of the previous objective, which decides between rows with equal values.
+    """
+    n, m = matrix.shape
+    distance = numpy.zeros(n)
+    if order is None:
+        order = numpy.arange(n)
+    for objective in range(m):
+        order = order[numpy.argsort(matrix[order, objective], kind='mergesort')]
+        values = matrix[order, objective]
+        distance[order[0]] = numpy.inf
+        distance[order[-1]] = numpy.inf
+        if n > 2:
+            distance[order[1:-1]] += values[2:] - values[:-2]
+    return distance
+
+
+def _key(individual):
+    """A hashable key that is equal for equal individuals (candidate, fitness and maximize)."""
+    candidate = individual.candidate
+    if isinstance(candidate, MultipleChromosomeGenome):
+        return None
+    try:
+        candidate = tuple(candidate) if isinstance(candidate, list) else candidate
+        key = (candidate, tuple(_values(individual.fitness)), individual.maximize)
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _candidate_key(individual):
+    key = _key(individual)
+    return None if key is None else key[0]
+
+
+class _Survivors(object):
+    """A list of survivors that ignores individuals that are already in it."""
+
+    def __init__(self):
+        self.individuals = []
+        self._keys = set()
+
+    def add(self, individual):
+        key = _key(individual)
+        if key is None:
+            if individual not in self.individuals:
+                self.individuals.append(individual)
+        elif key not in self._keys:
+            self._keys.add(key)
+            self.individuals.append(individual)
+
+    def __len__(self):
+        return len(self.individuals)
+
+
+def nsga_replacement(random, population, parents, offspring, args):
+    """Replaces population using the non-dominated sorting technique from NSGA-II.
+
+    A vectorized drop-in for inspyred.ec.replacers.nsga_replacement with the same survivors in the same
+    order: fronts are listed in the iteration order of the index sets inspyred uses, and ties in the
+    crowding distance are broken the same way.
+
+    Parameters
+    ----------
+    random : Random
+    population : list
+    parents : list
+    offspring : list
+    args : dict
+    """
+    combined = list(population)
+    combined.extend(offspring)
+    if len(combined) == 0:
+        return []
+    dominance = dominance_matrix(fitness_matrix(combined))
+    dominated_by = dominance.sum(axis=0)
+    raw = None
+
+    survivors = _Survivors()
+    remaining = set(range(len(combined)))
+    while len(remaining) > 0:
+        front = [i for i in remaining if dominated_by[i] == 0]
+        dominated_by -= dominance[front].sum(axis=0)
+        remaining = remaining - set(front)
+        if len(survivors) + len(front) > len(population):
+            if raw is None:
+                raw = fitness_matrix(combined, oriented=False)
+            distance = crowding_distance(raw[front])
+            crowd = sorted(range(len(front)), key=lambda i: distance[i], reverse=True)
+            for i in crowd:
+                if len(survivors) >= len(population):
+                    break
+                survivors.add(combined[front[i]])
+            if len(survivors) == len(population):
+                break
+        else:
+            for i in front:
+                survivors.add(combined[i])
+    return survivors.individuals
+
+
+def nondominated_archiver(random, population, archive, args):
+    """Archive the non-dominated individuals of the archive and population (a Pareto archive).
+
+    A vectorized alternative to inspyred.ec.archivers.best_archiver. Individuals with the same candidate as
+    an archived individual are ignored, and of several non-dominated individuals with the same candidate
+    only the first one is archived. Unlike best_archiver, the result does not depend on the order of the
+    population (best_archiver also ignores individuals whose candidate was archived by an individual of the
+    same population that they dominate).
+    """
+    archived = set(_candidate_key(individual) for individual in archive)
+    combined = list(archive)
+    combined.extend(individual for individual in population
+                    if _candidate_key(individual) is None or _candidate_key(individual) not in archived)
+    if len(combined) == 0:
+        return []
+    dominated = dominance_matrix(fitness_matrix(combined)).any(axis=0)
+    new_archive = []
+    seen = set()
+    for individual, is_dominated in zip(combined, dominated):
+        key = _candidate_key(individual)
+        if is_dominated or key in seen:
+            continue
+        if key is not None:
+            seen.add(key)
+        new_archive.append(individual)
+    return new_archive
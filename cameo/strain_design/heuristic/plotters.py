@@ -12,6 +12,7 @@
 
 from __future__ import absolute_import, print_function
 
+import time
 from uuid import uuid1
 from requests import ConnectionError
 
@@ -24,18 +25,106 @@ if config.use_bokeh:
     from bokeh.plotting import *
     from bokeh.models import GlyphRenderer
 
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PlotBuffer(object):
+    """Fixed-size history of points for plots that are updated during long runs.
+
+    The latest `size` points are kept in a ring buffer. Points that drop out of it are decimated: at most `size` of
+    them are kept, evenly spaced over the whole history (whenever the older points fill up, every second one is
+    dropped and only half as many new ones are kept). Memory is constant and appending costs O(1) (amortized).
+
+    Parameters
+    ----------
+    size : int
+        Number of recent points (and maximum number of older points).
+    columns : int
+        Number of values per point.
+    """
+
+    def __init__(self, size=1000, columns=2):
+        self.size = size
+        self._recent = np.empty((size, columns))
+        self._older = np.empty((size, columns))
+        self.clear()
+
+    def clear(self):
+        self._start = 0
+        self._count = 0
+        self._older_count = 0
+        self._evicted = 0
+        self._stride = 1
+
+    def __len__(self):
+        return self._older_count + self._count
+
+    def append(self, point):
+        if self._count < self.size:
+            self._recent[(self._start + self._count) % self.size] = point
+            self._count += 1
+        else:
+            self._decimate(self._recent[self._start].copy())
+            self._recent[self._start] = point
+            self._start = (self._start + 1) % self.size
+
+    def _decimate(self, point):
+        index = self._evicted
+        self._evicted += 1
+        if index % self._stride:
+            return
+        if self._older_count == self.size:
+            kept = self._older[::2].copy()
+            self._older[:len(kept)] = kept
+            self._older_count = len(kept)
+            self._stride *= 2
+            if index % self._stride:
+                return
+        self._older[self._older_count] = point
+        self._older_count += 1
+
+    @property
+    def data(self):
+        """The points in the order they were appended (a new array)."""
+        recent = np.roll(self._recent, -self._start, axis=0)[:self._count]
+        return np.concatenate([self._older[:self._older_count], recent])
+
+
+def _best_fitness(population):
+    """The best (scalar) fitness in population, computed without comparing individuals."""
+    if len(population) == 0:
+        return np.nan
+    fitness = np.fromiter((individual.fitness for individual in population), dtype=float, count=len(population))
+    return fitness.max() if population[0].maximize else fitness.min()
+
 
 class IPythonBokehFitnessPlotter(object):
+    """
+    Plots the best fitness of every generation.
+
+    The history is kept in a PlotBuffer and the plot is updated at most every `update_interval` seconds, so the
+    cost per generation does not grow during long runs.
+
+    Parameters
+    ----------
+    window_size : int
+        Number of recent generations that are plotted at full resolution (older ones are decimated).
+    update_interval : float
+        Minimum number of seconds between plot updates.
+    """
     __name__ = "IPython Bokeh Fitness Plot"
 
-    def __init__(self, window_size=1000):
+    def __init__(self, window_size=1000, update_interval=1.):
         self.iteration = 0
         self.window_size = window_size
-        self.iterations = []
-        self.fitness = []
+        self.update_interval = update_interval
+        self.history = PlotBuffer(window_size)
         self.uuid = None
         self.plotted = False
         self.can_plot = True
+        self._last_update = 0.
 
     def _set_plot(self):
         self.uuid = uuid1()
@@ -64,49 +153,70 @@ class IPythonBokehFitnessPlotter(object):
             self._set_plot()
 
         self.iteration += 1
-        self.iterations.append(self.iteration)
-        if len(population) > 0:
-            best = max(population)
-            self.fitness.append(best.fitness)
-        else:
-            self.fitness.append(None)
+        self.history.append((self.iteration, _best_fitness(population)))
 
-        if self.iteration % args.get('n', 20) == 0:
+        if self.plotted and time.time() - self._last_update >= self.update_interval:
             self._update_plot()
 
     def _update_plot(self):
-        self.ds.data['x'] = self.iterations[-self.window_size:]
-        self.ds.data['y'] = self.fitness[-self.window_size:]
-        if self.can_plot:
-            cursession().store_objects(self.ds)
+        data = self.history.data
+        self.ds.data['x'] = data[:, 0].tolist()
+        self.ds.data['y'] = [None if np.isnan(value) else value for value in data[:, 1].tolist()]
+        cursession().store_objects(self.ds)
+        self._last_update = time.time()
 
     def reset(self):
         self.iteration = 0
-        self.iterations = []
-        self.fitness = []
+        self.history.clear()
         self.plotted = False
+        self._last_update = 0.
 
     def end(self):
-        if not self.can_plot:
+        if self.plotted:
+            self._update_plot()
+        else:
+            data = self.history.data
             plot = figure(title="Fitness plot", tools='', plot_height=400, plot_width=650)
             plot.xaxis.axis_label = "Iteration"
             plot.yaxis.axis_label = "Fitness"
-            plot.scatter(self.ds.data['x'], self.ds.data['y'])
+            plot.scatter(data[:, 0], data[:, 1])
             show(plot)
 
 
 class IPythonBokehParetoPlotter(object):
+    """
+    Plots the fitness of the current population in two of the objectives.
+
+    The plot is updated at most every `update_interval` seconds; fitness values are only collected for updates.
+
+    Parameters
+    ----------
+    ofs : list
+        The objective functions.
+    x : int
+        Index of the objective on the x axis.
+    y : int
+        Index of the objective on the y axis.
+    update_interval : float
+        Minimum number of seconds between plot updates.
+    """
     __name__ = "IPython Bokeh Pareto Plotter"
 
-    def __init__(self, ofs=None, x=0, y=1, url='default'):
+    def __init__(self, ofs=None, x=0, y=1, url='default', update_interval=1.):
         self.url = url
         self.x = x
         self.y = y
         self.ofs = ofs
-        self.fitness = []
+        self.update_interval = update_interval
+        self.population = []
         self.uuid = None
         self.plotted = False
         self.can_plot = True
+        self._last_update = 0.
+
+    @property
+    def fitness(self):
+        return [individual.fitness for individual in self.population]
 
     def _set_plot(self):
         try:
@@ -133,26 +243,31 @@ class IPythonBokehParetoPlotter(object):
         if not self.plotted and self.can_plot:
             self._set_plot()
 
-        self.fitness = [i.fitness for i in population]
-        if num_evaluations % args.get('n', 20) == 0:
+        self.population = population
+        if self.plotted and time.time() - self._last_update >= self.update_interval:
             self._update()
 
     def _update(self):
-        self.ds.data['x'] = [e[self.x] for e in self.fitness]
-        self.ds.data['y'] = [e[self.y] for e in self.fitness]
-        if self.can_plot:
-            cursession().store_objects(self.ds)
+        fitness = self.fitness
+        self.ds.data['x'] = [e[self.x] for e in fitness]
+        self.ds.data['y'] = [e[self.y] for e in fitness]
+        cursession().store_objects(self.ds)
+        self._last_update = time.time()
 
     def reset(self):
-        self.fitness = []
+        self.population = []
         self.plotted = False
+        self._last_update = 0.
 
     def end(self):
-        if not self.can_plot:
+        if self.plotted:
+            self._update()
+        else:
+            fitness = self.fitness
             plot = figure(title="Fitness plot", tools='', plot_height=400, plot_width=650)
             plot.xaxis.axis_label = "Iteration"
             plot.yaxis.axis_label = "Fitness"
-            plot.scatter(self.ds.data['x'], self.ds.data['y'])
+            plot.scatter([e[self.x] for e in fitness], [e[self.y] for e in fitness])
             show(plot)
 
 
@@ -0,0 +1,183 @@
+# Copyright 2015 Novo Nordisk Foundation Center for Biosustainability, DTU.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import absolute_import, print_function
+
+__all__ = ['KNNSurrogate']
+
+from collections import deque
+
+import numpy
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class KNNSurrogate(object):
+    """A k-nearest-neighbour model of the fitness of knockout candidates, trained online.
+
+    The distance between two candidates is the size of their symmetric difference (as in
+    optimization.set_distance_function). Predictions are the inverse-distance weighted mean fitness of the
+    k nearest evaluated candidates. Neighbours are found through an inverted index (knockout -> candidates),
+    so a prediction costs O(n) numpy operations for n training samples.
+
+    Parameters
+    ----------
+    k : int
+        Number of neighbours.
+    min_samples : int
+        Number of training samples needed before predictions are made.
+    max_samples : int
+        Maximum number of training samples (the oldest ones are replaced first).
+    window : int
+        Number of recent predictions the accuracy statistics are based on.
+
+    Attributes
+    ----------
+    selected : int
+        Number of candidates that were evaluated after pre-selection.
+    skipped : int
+        Number of candidates that were not evaluated because of their prediction.
+    """
+
+    def __init__(self, k=5, min_samples=100, max_samples=10000, window=500):
+        self.k = k
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self._errors = deque(maxlen=window)
+        self.selected = 0
+        self.skipped = 0
+        self._candidates = []
+        self._sizes = numpy.zeros(0)
+        self._fitness = numpy.zeros(0)
+        self._postings = {}
+        self._next = 0
+
+    def __len__(self):
+        return len(self._candidates)
+
+    @property
+    def trained(self):
+        return len(self) >= max(self.min_samples, self.k)
+
+    def _distances(self, candidate):
+        overlap = numpy.zeros(len(self))
+        for knockout in candidate:
+            rows = self._postings.get(knockout)
+            if rows:
+                overlap[rows] += 1
+        return self._sizes + len(candidate) - 2 * overlap
+
+    def predict(self, candidate):
+        """The predicted fitness of candidate (None if the surrogate is not trained yet)."""
+        if not self.trained:
+            return None
+        distances = self._distances(candidate)
+        nearest = numpy.argpartition(distances, self.k - 1)[:self.k]
+        weights = 1. / (1. + distances[nearest])
+        return float(numpy.dot(weights, self._fitness[nearest]) / weights.sum())
+
+    def update(self, candidate, fitness):
+        """Add an evaluated candidate. If the surrogate is trained, its prediction is recorded first."""
+        candidate = frozenset(candidate)
+        prediction = self.predict(candidate)
+        if prediction is not None:
+            self._errors.append((prediction, float(fitness)))
+        if len(self) < self.max_samples:
+            row = len(self)
+            self._candidates.append(candidate)
+            self._sizes = numpy.append(self._sizes, len(candidate))
+            self._fitness = numpy.append(self._fitness, float(fitness))
+        else:
+            row = self._next
+            self._next = (self._next + 1) % self.max_samples
+            for knockout in self._candidates[row]:
+                self._postings[knockout].remove(row)
+            self._candidates[row] = candidate
+            self._sizes[row] = len(candidate)
+            self._fitness[row] = float(fitness)
+        for knockout in candidate:
+            self._postings.setdefault(knockout, []).append(row)
+
+    def select(self, candidates, fraction):
+        """Rank candidates by their predicted fitness and keep the most promising fraction.
+
+        Parameters
+        ----------
+        candidates : list
+        fraction : float
+            The fraction of candidates to evaluate (at least one is kept).
+
+        Returns
+        -------
+        tuple
+            The indices of the candidates to evaluate and the predictions of all candidates (None if the
+            surrogate is not trained, in which case all candidates are selected).
+        """
+        if not self.trained or len(candidates) == 0:
+            return list(range(len(candidates))), None
+        predictions = [self.predict(candidate) for candidate in candidates]
+        number = max(1, int(round(fraction * len(candidates))))
+        ranking = sorted(range(len(candidates)), key=lambda i: predictions[i], reverse=True)
+        selected = sorted(ranking[:number])
+        self.selected += len(selected)
+        self.skipped += len(candidates) - len(selected)
+        return selected, predictions
+
+    @property
+    def mean_absolute_error(self):
+        if len(self._errors) == 0:
+            return None
+        return float(numpy.mean([abs(prediction - fitness) for prediction, fitness in self._errors]))
+
+    @property
+    def rank_correlation(self):
+        """Spearman correlation of recent predictions and the real fitness values (ties are not averaged)."""
+        if len(self._errors) < 3:
+            return None
+        values = numpy.array(self._errors)
+        ranks = numpy.argsort(numpy.argsort(values, axis=0), axis=0)
+        if ranks[:, 0].std() == 0 or ranks[:, 1].std() == 0:
+            return None
+        return float(numpy.corrcoef(ranks[:, 0], ranks[:, 1])[0, 1])
+
+    @property
+    def saved_fraction(self):
+        """The fraction of pre-selected candidates that were not evaluated."""
+        total = self.selected + self.skipped
+        return self.skipped / float(total) if total > 0 else 0.
+
+    @property
+    def stats(self):
+        return {'samples': len(self), 'selected': self.selected, 'skipped': self.skipped,
+                'saved_fraction': self.saved_fraction, 'mean_absolute_error': self.mean_absolute_error,
+                'rank_correlation': self.rank_correlation}
+
+    def clear(self):
+        """Remove all training samples and reset the statistics."""
+        self._candidates = []
+        self._sizes = numpy.zeros(0)
+        self._fitness = numpy.zeros(0)
+        self._postings = {}
+        self._next = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.selected = 0
+        self.skipped = 0
+        self._errors.clear()
+
+    def __repr__(self):
+        return "<KNNSurrogate k=%i, %i samples, %.1f%% of evaluations saved>" % (
+            self.k, len(self), self.saved_fraction * 100)
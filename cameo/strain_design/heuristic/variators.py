@@ -20,10 +20,17 @@ from six.moves import range
 
 from inspyred.ec.variators import mutator, crossover
 from ordered_set import OrderedSet
-from cameo.strain_design.heuristic.genomes import MultipleChromosomeGenome
+from cameo.strain_design.heuristic.genomes import MultipleChromosomeGenome, BitSet
 from numpy import float32 as float
 
 
+def _like(individual, members):
+    """members as a candidate of the same type as individual (a BitSet or a list without duplicates)."""
+    if isinstance(individual, BitSet):
+        return BitSet.of(members)
+    return list(OrderedSet(members))
+
+
 def _do_set_n_point_crossover(representation, mom, dad, points, random, candidate_size):
     chunks = []
     i = 0
@@ -54,7 +61,10 @@ def _do_set_n_point_crossover(representation, mom, dad, points, random, candidat
 
 @crossover
 def set_n_point_crossover(random, mom, dad, args):
-    representation = list(set(mom).union(set(dad)))
+    if isinstance(mom, BitSet):
+        representation = list(mom | dad)
+    else:
+        representation = list(set(mom).union(set(dad)))
     crossover_rate = args.setdefault('crossover_rate', 1.0)
     num_crossover_points = args.setdefault('num_crossover_points', 1)
     candidate_size = args.setdefault('candidate_size', 9)
@@ -65,9 +75,9 @@ def set_n_point_crossover(random, mom, dad, args):
 
         # ensure number of knockouts > 0 or do not add individual
         if len(bro) > 0:
-            children.append(bro)
+            children.append(BitSet.of(bro) if isinstance(mom, BitSet) else bro)
         if len(sis) > 0:
-            children.append(sis)
+            children.append(BitSet.of(sis) if isinstance(mom, BitSet) else sis)
     else:
         children.append(mom)
         children.append(dad)
@@ -83,15 +93,15 @@ def set_mutation(random, individual, args):
     ----------
 
     random: Random
-    individual: list
+    individual: list or BitSet
         with unique integers
     args: dict
         must contain the representation
 
     Returns
     -------
-    list
-        created based on an ordered set
+    list or BitSet
+        created based on an ordered set (a BitSet if individual is a BitSet)
 
     """
     representation = args.get('representation')
@@ -103,7 +113,7 @@ def set_mutation(random, individual, args):
         else:
             new_individual.append(index)
 
-    return list(OrderedSet(new_individual))
+    return _like(individual, new_individual)
 
 
 @mutator
@@ -115,15 +125,15 @@ def set_indel(random, individual, args):
     ----------
 
     random: Random
-    individual: list
+    individual: list or BitSet
         with unique integers
     args: dict
         must contain the representation
 
     Returns
     -------
-    list
-        created based on an ordered set
+    list or BitSet
+        created based on an ordered set (a BitSet if individual is a BitSet)
 
     """
     representation = args.get('representation')
@@ -136,7 +146,7 @@ def set_indel(random, individual, args):
         else:
             new_individual.append(random.sample(range(len(representation)), 1)[0])
 
-    return list(OrderedSet(new_individual))
+    return _like(individual, new_individual)
 
 
 @mutator
@@ -27,6 +27,7 @@ from pandas import DataFrame
 
 from cameo.core.result import Result
 from cameo import models, phenotypic_phase_plane
+from cameo.flux_analysis.analysis import effective_bounds
 from cameo.exceptions import SolveError
 from cameo import Model, Metabolite
 from cameo.data import metanetx
@@ -150,6 +151,10 @@ class PathwayPredictor(object):
     mapping : dict, optional
         A dictionary that contains a mapping between metabolite
         identifiers in `model` and `universal_model`
+    tighten_bounds : bool, optional
+        Use effective flux ranges (flux variability analysis) of the universal reactions
+        as coefficients of the on/off switches instead of their (often very loose) bounds.
+        This is a one-time cost that strengthens the MILP relaxation (default: False).
 
     Attributes
     ----------
@@ -165,7 +170,7 @@ class PathwayPredictor(object):
     >>> pathway_predictor.run(product=pathway_predictor.model.metabolites.MNXM2861)
     """
 
-    def __init__(self, model, universal_model=None, mapping=None, compartment_regexp=None):
+    def __init__(self, model, universal_model=None, mapping=None, compartment_regexp=None, tighten_bounds=False):
         """"""
         self.original_model = model
         if compartment_regexp is None:
@@ -204,7 +209,7 @@ class PathwayPredictor(object):
         self.adpater_reactions = util.create_adapter_reactions(model.metabolites, self.universal_model,
                                                                self.mapping, compartment_regexp)
         self.model.add_reactions(self.adpater_reactions)
-        self._add_switches(self.new_reactions)
+        self._add_switches(self.new_reactions, tighten_bounds=tighten_bounds)
 
     def run(self, product=None, max_predictions=float("inf"), min_production=.1, timeout=None, silent=False):
         """Run pathway prediction for a desired product.
@@ -295,8 +300,13 @@ class PathwayPredictor(object):
         # Determined reactions that produce product natively and knock them out
         pass
 
-    def _add_switches(self, reactions):
+    def _add_switches(self, reactions, tighten_bounds=False):
         logger.info("Adding switches.")
+        if tighten_bounds:
+            logger.info("Determining effective bounds of universal reactions.")
+            flux_ranges = effective_bounds(self.model, [r for r in reactions if not r.id.startswith('DM_')])
+        else:
+            flux_ranges = {}
         y_vars = list()
         switches = list()
         self._exchanges = list()
@@ -309,9 +319,14 @@ class PathwayPredictor(object):
             y = self.model.solver.interface.Variable('y_' + reaction.id, lb=0, ub=1, type='binary')
             y_vars.append(y)
 
-            switch_lb = self.model.solver.interface.Constraint(y * reaction.lower_bound - reaction.flux_expression,
+            lower_bound, upper_bound = reaction.lower_bound, reaction.upper_bound
+            if reaction.id in flux_ranges:
+                lower_bound = max(lower_bound, flux_ranges[reaction.id][0])
+                upper_bound = min(upper_bound, flux_ranges[reaction.id][1])
+
+            switch_lb = self.model.solver.interface.Constraint(y * lower_bound - reaction.flux_expression,
                                                                name='switch_lb_' + reaction.id, ub=0)
-            switch_ub = self.model.solver.interface.Constraint(y * reaction.upper_bound - reaction.flux_expression,
+            switch_ub = self.model.solver.interface.Constraint(y * upper_bound - reaction.flux_expression,
                                                                name='switch_ub_' + reaction.id, lb=0)
             switches.extend([switch_lb, switch_ub])
 
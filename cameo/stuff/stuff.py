@@ -15,7 +15,6 @@
 from __future__ import absolute_import, print_function
 
 from functools import partial
-from cobra.manipulation.delete import find_gene_knockout_reactions
 from cobra.core import Reaction
 from cameo.flux_analysis.simulation import fba
 from cameo.exceptions import SolveError
@@ -30,7 +29,7 @@ def gene_knockout_growth(gene_id, model, threshold=10 ** -6, simulation_method=f
     if 'reference' not in kwargs:
         kwargs['reference'] = s.x_dict
     gene = model.genes.get_by_id(gene_id)
-    knockouts = find_gene_knockout_reactions(model, [gene])
+    knockouts = model.gpr_index.knockout_reactions(model, [gene])
     tm = TimeMachine()
 
     for reaction in knockouts:
@@ -18,6 +18,7 @@ import six
 from six.moves import range
 
 import re
+import hashlib
 from collections import OrderedDict
 from uuid import uuid1
 from time import time
@@ -411,6 +412,35 @@ def memoize(function, memo={}):
     return wrapper
 
 
+def model_fingerprint(model):
+    """A digest of a model's structure, bounds and objective.
+
+    The digest is stable across processes and sessions and can be used to key results
+    (e.g. simulations) that are only valid for one particular model state.
+
+    Parameters
+    ----------
+    model : cobra.Model
+
+    Returns
+    -------
+    str
+        A hexadecimal md5 digest.
+    """
+    digest = hashlib.md5()
+    for reaction in model.reactions:
+        stoichiometry = sorted((metabolite.id, coefficient) for metabolite, coefficient in six.iteritems(
+            reaction.metabolites))
+        digest.update(repr((reaction.id, reaction.lower_bound, reaction.upper_bound, stoichiometry)).encode('utf-8'))
+    try:
+        objective = (model.objective.direction, str(model.objective.expression))
+    except AttributeError:
+        objective = sorted((reaction.id, reaction.objective_coefficient) for reaction in model.reactions
+                           if reaction.objective_coefficient != 0)
+    digest.update(repr(objective).encode('utf-8'))
+    return digest.hexdigest()
+
+
 def get_system_info():
     # pip freeze (adapted from http://stackoverflow.com/a/24322465/280182)
     package_info = list()
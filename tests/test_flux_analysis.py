@@ -27,7 +27,8 @@ from cameo.flux_analysis.simulation import fba, pfba, lmoma, room
 from cameo.parallel import SequentialView, MultiprocessingView
 from cameo.io import load_model
 from cameo.flux_analysis.analysis import flux_variability_analysis, phenotypic_phase_plane, _cycle_free_fva, \
-    find_blocked_reactions
+    find_blocked_reactions, effective_bounds
+from cameo.flux_analysis.flux_coupling import flux_coupling_analysis
 
 import pandas
 from pandas.util.testing import assert_frame_equal
@@ -112,6 +113,58 @@ class Wrapper:
                     self.assertAlmostEqual(fva_solution['upper_bound'][key],
                                            REFERENCE_FVA_SOLUTION_ECOLI_CORE['upper_bound'][key], delta=0.0001)
 
+        def test_effective_bounds(self):
+            fva_solution = flux_variability_analysis(self.model, view=SequentialView())
+            flux_ranges = effective_bounds(self.model, view=SequentialView())
+            self.assertEqual(len(flux_ranges), len(self.model.reactions))
+            for key in fva_solution.data_frame.index:
+                self.assertAlmostEqual(flux_ranges[key][0], fva_solution['lower_bound'][key], delta=0.00001)
+                self.assertAlmostEqual(flux_ranges[key][1], fva_solution['upper_bound'][key], delta=0.00001)
+            subset = effective_bounds(self.model, reactions=['PGK', 'GAPD'])
+            self.assertEqual(subset, {'PGK': flux_ranges['PGK'], 'GAPD': flux_ranges['GAPD']})
+
+        def test_effective_bounds_follow_bound_changes(self):
+            flux_ranges = effective_bounds(self.model, reactions=['PGK'])
+            self.assertNotEqual(flux_ranges['PGK'], (0, 0))
+            with TimeMachine() as tm:
+                self.model.reactions.PGK.knock_out(tm)
+                self.assertEqual(effective_bounds(self.model, reactions=['PGK'])['PGK'], (0, 0))
+            self.assertEqual(effective_bounds(self.model, reactions=['PGK']), flux_ranges)
+
+        def test_effective_bounds_follow_constraint_changes(self):
+            constraint = self.model.solver.interface.Constraint(self.model.reactions.PGK.flux_expression, lb=-1, ub=1,
+                                                                name='PGK_limit')
+            self.model.solver.add(constraint)
+            try:
+                self.assertGreaterEqual(effective_bounds(self.model, reactions=['PGK'])['PGK'][0], -1 - 1e-6)
+                constraint.lb = -0.5
+                self.assertGreaterEqual(effective_bounds(self.model, reactions=['PGK'])['PGK'][0], -0.5 - 1e-6)
+            finally:
+                self.model.solver.remove(constraint)
+
+        def test_flux_coupling_analysis(self):
+            with TimeMachine() as tm:
+                self.model.reactions.PGK.knock_out(tm)
+                coupling = flux_coupling_analysis(self.model, view=SequentialView())
+                self.assertIn('PGK', coupling.blocked)
+                self.assertIn('GAPD', coupling.blocked)
+            coupling = flux_coupling_analysis(self.model, view=SequentialView())
+            # blocked under the current medium (cf. find_blocked_reactions, which opens the exchanges)
+            self.assertEqual(sorted(coupling.blocked),
+                             ['EX_fru_LPAREN_e_RPAREN_', 'EX_fum_LPAREN_e_RPAREN_', 'EX_gln_L_LPAREN_e_RPAREN_',
+                              'EX_mal_L_LPAREN_e_RPAREN_', 'FRUpts2', 'FUMt2_2', 'GLNabc', 'MALt2_2'])
+            self.assertEqual(coupling.representative('GLCpts'), coupling.representative('EX_glc_LPAREN_e_RPAREN_'))
+            self.assertAlmostEqual(coupling.ratio('GLCpts') / coupling.ratio('EX_glc_LPAREN_e_RPAREN_'), -1.)
+            fluxes = pfba(self.model).fluxes
+            for coupled_set in coupling.coupled_sets:
+                representative = coupled_set[0]
+                for reaction_id in coupled_set:
+                    self.assertEqual(coupling.representative(reaction_id), representative)
+                    self.assertAlmostEqual(fluxes[reaction_id], coupling.ratio(reaction_id) * fluxes[representative],
+                                           delta=1e-6)
+            groups = coupling.equivalent_reactions(self.model.reactions)
+            self.assertEqual(sum(len(group) for group in groups), len(self.model.reactions))
+
     class AbstractTestPhenotypicPhasePlane(unittest.TestCase):
         @unittest.skipIf(TRAVIS, 'Running in Travis')
         def test_one_variable_parallel(self):
@@ -180,6 +233,26 @@ class Wrapper:
                                    delta=1e-6,
                                    msg="room objective without knockouts must be 0 (was %f)" % solution.objective_value)
 
+        def test_room_with_flux_ranges(self):
+            pfba_solution = pfba(self.model)
+            flux_ranges = effective_bounds(self.model)
+            solution = room(self.model, reference=pfba_solution, flux_ranges=flux_ranges)
+            self.assertAlmostEqual(0, solution.objective_value,
+                                   delta=1e-6,
+                                   msg="room objective without knockouts must be 0 (was %f)" % solution.objective_value)
+
+        def test_room_shlomi_2005_with_flux_ranges(self):
+            reference = {"b1": -10, "v1": 10, "v2": 5, "v3": 0, "v4": 0, "v5": 0, "v6": 5, "b2": 5, "b3": 5}
+            TOY_MODEL_PAPIN_2004.solver = self.model.solver.interface
+            flux_ranges = effective_bounds(TOY_MODEL_PAPIN_2004)
+            with TimeMachine() as tm:
+                TOY_MODEL_PAPIN_2004.reactions.v6.knock_out(tm)
+                result = room(TOY_MODEL_PAPIN_2004, reference=reference, delta=0, epsilon=0, flux_ranges=flux_ranges)
+
+            self.assertEquals(
+                result.fluxes,
+                {'b1': 10.0, 'b2': 5.0, 'b3': 5.0, 'v1': 5.0, 'v2': 5.0, 'v3': 0.0, 'v4': 5.0, 'v5': 5.0, 'v6': 0.0})
+
         def test_room_shlomi_2005(self):
             reference = {"b1": -10, "v1": 10, "v2": 5, "v3": 0, "v4": 0, "v5": 0, "v6": 5, "b2": 5, "b3": 5}
             TOY_MODEL_PAPIN_2004.solver = self.model.solver.interface
@@ -18,9 +18,16 @@ import six.moves.queue
 
 import unittest
 import warnings
-from cameo.parallel import SequentialView
+from cameo.parallel import SequentialView, ManagerQueue, QueueBroker, SocketQueue, new_queue
+from cameo.strain_design.heuristic.multiprocess.migrators import MultiprocessingMigrator
+from cameo.strain_design.heuristic.multiprocess.observers import AbstractParallelObserver
 import subprocess
-from time import sleep
+from time import sleep, time
+from random import Random
+import pickle
+import socket
+import struct
+from inspyred.ec import Individual
 from multiprocessing import cpu_count
 
 try:
@@ -43,6 +50,29 @@ def to_the_power_of_2(arg):
     return arg ** 2
 
 
+class RecordingObserver(AbstractParallelObserver):
+    __name__ = "Recording Observer"
+
+    def __init__(self, *args, **kwargs):
+        self.batches = []
+        super(RecordingObserver, self).__init__(*args, **kwargs)
+
+    def _create_client(self, i):
+        self.clients[i] = self.queue
+
+    def _process_messages(self, messages):
+        self.batches.append(messages)
+
+
+class PutInQueue(object):
+    def __init__(self, queue):
+        self.queue = queue
+
+    def __call__(self, arg):
+        self.queue.put(arg ** 2)
+        return arg
+
+
 class TestSequentialView(unittest.TestCase):
     def setUp(self):
         self.view = SequentialView()
@@ -54,6 +84,178 @@ class TestSequentialView(unittest.TestCase):
         for i in range(100):
             self.assertEqual(self.view.apply(to_the_power_of_2, i), SOLUTION[i])
 
+    def test_apply_async(self):
+        results = [self.view.apply_async(to_the_power_of_2, i) for i in range(100)]
+        self.assertTrue(all(result.ready() for result in results))
+        self.assertEqual([result.get() for result in results], SOLUTION)
+
+
+class TestManagerQueue(unittest.TestCase):
+    def test_queue_size(self):
+        queue = ManagerQueue("test-queue-size-1", maxsize=1)
+        queue.put(1)
+        self.assertRaises(six.moves.queue.Full, queue.put, 1, block=False)
+        self.assertRaises(six.moves.queue.Full, queue.put, 1, timeout=0.01)
+        self.assertRaises(six.moves.queue.Full, queue.put_nowait, 1)
+        queue.get()
+        self.assertRaises(six.moves.queue.Empty, queue.get_nowait)
+        self.assertRaises(six.moves.queue.Empty, queue.get, timeout=0.01)
+
+    def test_queue_objects(self):
+        queue = ManagerQueue("test-queue", maxsize=100)
+        for item in [1, "a", 1., [1, 3, "a", 2.], {"x": "y"}]:
+            queue.put(item)
+            v = queue.get_nowait()
+            self.assertEqual(v, item)
+            self.assertIsInstance(v, type(item))
+
+    def test_queue_len(self):
+        queue = ManagerQueue("test-queue-len")
+        self.assertTrue(queue.empty())
+        for i in range(3):
+            queue.put(i)
+            self.assertEqual(queue.length, i + 1)
+        self.assertEqual([queue.get_nowait() for _ in range(3)], [0, 1, 2])
+        self.assertEqual(len(queue), 0)
+
+    def test_shared_with_workers(self):
+        from cameo.parallel import MultiprocessingView
+        queue = new_queue(maxsize=10)
+        view = MultiprocessingView()
+        self.assertEqual(view.map(PutInQueue(queue), [1, 2, 3]), [1, 2, 3])
+        self.assertEqual(sorted(queue.get(timeout=10) for _ in range(3)), [1, 4, 9])
+
+    def test_new_queue(self):
+        self.assertIsInstance(new_queue(), ManagerQueue)
+        self.assertEqual(new_queue(name="a", transport=lambda **kwargs: kwargs),
+                         {'name': "a", 'maxsize': 0, 'namespace': 'queue'})
+        self.assertRaises(ValueError, new_queue, transport='carrier-pigeon')
+
+
+class TestSocketQueue(unittest.TestCase):
+    def setUp(self):
+        self.broker = QueueBroker(port=0).start()
+
+    def tearDown(self):
+        self.broker.shutdown()
+
+    def test_queue_size(self):
+        queue = SocketQueue("test-queue-size", maxsize=2, address=self.broker.address)
+        queue.put(1)
+        queue.put(2)
+        self.assertRaises(six.moves.queue.Full, queue.put_nowait, 3)
+        self.assertRaises(six.moves.queue.Full, queue.put, 3, timeout=0.01)
+        self.assertEqual(queue.get(), 1)
+        self.assertEqual(queue.get_nowait(), 2)
+        self.assertRaises(six.moves.queue.Empty, queue.get_nowait)
+        self.assertRaises(six.moves.queue.Empty, queue.get, timeout=0.01)
+
+    def test_queue_objects(self):
+        queue = SocketQueue("test-queue", address=self.broker.address)
+        for item in [1, "a", 1., [1, 3, "a", 2.], {"x": "y"}, set(range(1000))]:
+            queue.put(item)
+            v = queue.get_nowait()
+            self.assertEqual(v, item)
+            self.assertIsInstance(v, type(item))
+
+    def test_queue_len(self):
+        queue = SocketQueue("test-queue-len", address=self.broker.address)
+        other = pickle.loads(pickle.dumps(queue))
+        self.assertTrue(queue.empty())
+        for i in range(3):
+            queue.put(i)
+            self.assertEqual(other.length, i + 1)
+        self.assertEqual([other.get_nowait() for _ in range(3)], [0, 1, 2])
+        self.assertEqual(len(queue), 0)
+
+    def test_shared_with_workers(self):
+        from cameo.parallel import MultiprocessingView
+        host, port = self.broker.address
+        queue = new_queue(maxsize=10, transport="tcp://%s:%i" % (host, port))
+        self.assertIsInstance(queue, SocketQueue)
+        view = MultiprocessingView()
+        self.assertEqual(view.map(PutInQueue(queue), [1, 2, 3]), [1, 2, 3])
+        self.assertEqual(sorted(queue.get(timeout=10) for _ in range(3)), [1, 4, 9])
+
+    def test_dead_peers(self):
+        queue = SocketQueue("test-dead-peers", address=self.broker.address)
+        connection = socket.create_connection(self.broker.address)
+        connection.sendall(b'G\x00')
+        connection.close()
+        queue.put(1)
+        self.assertEqual(queue.get(timeout=1), 1)
+        self.broker.shutdown()
+        self.assertRaises(IOError, queue.put, 1)
+
+    def test_unacknowledged_items_are_requeued(self):
+        queue = SocketQueue("test-unacknowledged", address=self.broker.address)
+        key = b"queue:test-unacknowledged"
+        connection = socket.create_connection(self.broker.address)
+        connection.sendall(struct.pack('!cBdIHI', b'G', 1, -1., 0, len(key), 0) + key)
+        queue.put("item")
+        status, length = struct.unpack('!cI', connection.recv(5))
+        self.assertEqual(status, b'O')
+        # the client goes away before acknowledging the item
+        connection.close()
+        self.assertEqual(queue.get(timeout=1), "item")
+        self.assertRaises(six.moves.queue.Empty, queue.get_nowait)
+
+
+class TestMultiprocessingMigrator(unittest.TestCase):
+    def test_batch_migration(self):
+        random = Random(4)
+        migrator = MultiprocessingMigrator(max_migrants=1, batch_size=2)
+        island_1 = ["a%i" % i for i in range(5)]
+        island_2 = ["b%i" % i for i in range(5)]
+        migrator(random, island_1, {})
+        self.assertEqual(len(migrator.migrants), 1)
+        migrator(random, island_2, {})
+        self.assertEqual(sum(individual.startswith("a") for individual in island_2), 2)
+        self.assertEqual(len(migrator.migrants), 1)
+        emigrants = migrator.migrants.get_nowait()
+        self.assertEqual(len(emigrants), 2)
+        self.assertTrue(all(individual.startswith("b") and individual not in island_2 for individual in emigrants))
+
+    def test_socket_transport(self):
+        with QueueBroker(port=0) as broker:
+            host, port = broker.address
+            migrator = MultiprocessingMigrator(max_migrants=2, transport="tcp://%s:%i" % (host, port))
+            other_island = pickle.loads(pickle.dumps(migrator))
+            island_1 = [Individual(set([i]), maximize=True) for i in range(5)]
+            for individual in island_1:
+                individual.fitness = 1.
+            island_2 = [Individual(set([i + 10]), maximize=True) for i in range(5)]
+            migrator(Random(4), island_1, {})
+            other_island(Random(4), island_2, {})
+            immigrants = [individual for individual in island_2 if max(individual.candidate) < 10]
+            self.assertEqual(len(immigrants), 1)
+            self.assertEqual(immigrants[0].fitness, 1.)
+            self.assertIn(immigrants[0], island_1)
+        # the broker is gone, the islands continue without migration
+        self.assertEqual(migrator(Random(4), island_1, {}), island_1)
+
+
+class TestAbstractParallelObserver(unittest.TestCase):
+    def test_batches(self):
+        observer = RecordingObserver(number_of_islands=2, timeout=60, max_messages=3)
+        for i in range(5):
+            observer.clients[i % 2].put({'index': i % 2, 'i': i})
+        observer.start()
+        observer.finish()
+        self.assertIsNone(observer.t)
+        self.assertEqual([[message['i'] for message in batch] for batch in observer.batches], [[0, 1, 2], [3, 4]])
+
+    def test_finish_wakes_listener(self):
+        observer = RecordingObserver(number_of_islands=1, timeout=60)
+        observer.start()
+        sleep(0.1)
+        thread = observer.t
+        start = time()
+        observer.finish()
+        self.assertFalse(thread.is_alive())
+        self.assertLess(time() - start, 10)
+        self.assertEqual(observer.batches, [])
+
 
 try:
     from cameo.parallel import MultiprocessingView
@@ -69,6 +271,10 @@ try:
             for i in range(100):
                 self.assertEqual(self.view.apply(to_the_power_of_2, i), SOLUTION[i])
 
+        def test_apply_async(self):
+            results = [self.view.apply_async(to_the_power_of_2, i) for i in range(100)]
+            self.assertEqual([result.get(timeout=60) for result in results], SOLUTION)
+
         def test_length(self):
             self.assertEqual(len(self.view), cpu_count())
 
@@ -25,6 +25,7 @@ from cobra import Metabolite
 import numpy
 from optlang import Objective
 from cobra.io import read_sbml_model
+from cobra.manipulation.delete import find_gene_knockout_reactions
 import optlang
 import pandas
 from sympy import Eq
@@ -33,6 +34,7 @@ from cameo import load_model, Reaction, Model
 from cameo.config import solvers
 from cameo.exceptions import UndefinedSolution
 from cameo.core.solver_based_model import Reaction
+from cameo.core.gpr import GPRIndex, parse_gpr
 from cameo.util import TimeMachine
 import six
 
@@ -541,6 +543,42 @@ class TestReactionCPLEX(WrappedAbstractTestReaction.AbstractTestReaction):
         self.model.solver = 'cplex'
 
 
+class TestGPR(unittest.TestCase):
+    def test_parse_gpr(self):
+        self.assertEqual(parse_gpr(''), None)
+        self.assertEqual(parse_gpr('b0001'), 'b0001')
+        self.assertEqual(parse_gpr('b0001 and (b0002 or b0003) or b0004'),
+                         ('or', [('and', ['b0001', ('or', ['b0002', 'b0003'])]), 'b0004']))
+        self.assertEqual(parse_gpr('(a AND b) OR c'), ('or', [('and', ['a', 'b']), 'c']))
+        self.assertRaises(ValueError, parse_gpr, '(b0001 and b0002')
+        self.assertRaises(ValueError, parse_gpr, 'b0001 or')
+
+    def test_knockout_reactions(self):
+        model = Model('toy')
+        for reaction_id, rule in [('r1', 'a and (b or c)'), ('r2', 'a or b'), ('r3', ''), ('r4', 'c')]:
+            reaction = Reaction(reaction_id)
+            reaction.add_metabolites({Metabolite('m_' + reaction_id): 1})
+            reaction.gene_reaction_rule = rule
+            model.add_reactions([reaction])
+        index = GPRIndex(model)
+        self.assertEqual(index.clauses['r1'], [index.gene_mask(['a', 'b']), index.gene_mask(['a', 'c'])])
+        self.assertEqual(index.knockout_reaction_ids(['a']), ['r1'])
+        self.assertEqual(index.knockout_reaction_ids(['b']), [])
+        self.assertEqual(index.knockout_reaction_ids(['b', 'c']), ['r1', 'r4'])
+        self.assertEqual(index.knockout_reaction_ids(['a', 'b']), ['r1', 'r2'])
+
+    def test_equivalent_genes(self):
+        model = Model('toy')
+        for reaction_id, rule in [('r1', 'a and b'), ('r2', '(c and d) or e'), ('r3', 'f')]:
+            reaction = Reaction(reaction_id)
+            reaction.add_metabolites({Metabolite('m_' + reaction_id): 1})
+            reaction.gene_reaction_rule = rule
+            model.add_reactions([reaction])
+        index = GPRIndex(model)
+        self.assertEqual(index.equivalent_genes(), [['a', 'b'], ['c', 'd'], ['e'], ['f']])
+        self.assertEqual(index.equivalent_genes(['a', 'b', 'e']), [['a', 'b'], ['e']])
+
+
 class WrappedAbstractTestSolverBasedModel:
     class AbstractTestSolverBasedModel(unittest.TestCase):
         def setUp(self):
@@ -725,6 +763,19 @@ class WrappedAbstractTestSolverBasedModel:
                 self.model.reactions.Biomass_Ecoli_core_N_LPAREN_w_FSLASH_GAM_RPAREN__Nmet2.lower_bound = 999999.
                 self.model.essential_genes()
 
+        def test_gpr_index(self):
+            genes = list(self.model.genes)
+            for gene_combination in [[gene] for gene in genes] + [genes[i:i + 3] for i in range(0, len(genes), 3)]:
+                expected = find_gene_knockout_reactions(self.model, gene_combination)
+                reactions = self.model.gpr_index.knockout_reactions(self.model, gene_combination)
+                self.assertEqual(sorted(r.id for r in reactions), sorted(r.id for r in expected))
+
+        def test_gpr_index_is_rebuilt_after_removing_reactions(self):
+            gene = list(self.model.reactions.PGK.genes)[0]
+            self.assertIn('PGK', self.model.gpr_index.knockout_reaction_ids([gene]))
+            self.model.remove_reactions([self.model.reactions.PGK])
+            self.assertNotIn('PGK', self.model.gpr_index.knockout_reaction_ids([gene]))
+
         def test_essential_reactions(self):
             essential_reactions = [r.id for r in self.model.essential_reactions()]
             self.assertTrue(sorted(essential_reactions) == sorted(ESSENTIAL_REACTIONS))
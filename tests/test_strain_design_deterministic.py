@@ -19,8 +19,12 @@ import six
 import os
 import unittest
 
-from cameo import load_model
+from cameo import load_model, fba
 from cameo.strain_design.deterministic.flux_variability_based import Fseof, FseofResult, DifferentialFVA
+from cameo.strain_design.deterministic.linear_programming import OptKnock, OptKnockResult
+from cameo.strain_design.deterministic.minimal_cut_sets import MinimalCutSets, MinimalCutSetsResult
+from cameo.parallel import SequentialView
+from cameo.util import TimeMachine
 
 from pandas import DataFrame, pandas
 from pandas.util.testing import assert_frame_equal
@@ -55,6 +59,84 @@ class TestFSEOF(unittest.TestCase):
         self.assertIs(fseof_result.model, self.model)
         self.assertEqual(list(fseof_result), list(fseof_result.reactions))
 
+
+class TestOptKnock(unittest.TestCase):
+    def setUp(self):
+        self.model = ECOLICORE.copy()
+        self.model.solver = 'glpk'
+
+    def test_optknock(self):
+        objective = self.model.objective
+        optknock = OptKnock(self.model, reactions=["PTAr", "ACKr", "LDH_D", "ALCD2x", "PFL", "ME1", "ME2", "FUM",
+                                                   "SUCDi", "PYK", "PPC", "PPCK", "FRD7"],
+                            fraction_of_optimum=0.1)
+        self.assertIs(objective, self.model.objective)
+        number_of_constraints = len(optknock.model.solver.constraints)
+        inner_objective = optknock.model.objective
+        result = optknock.run(target="EX_succ_lp_e_rp_", max_knockouts=2, max_results=3)
+        self.assertIsInstance(result, OptKnockResult)
+        self.assertGreater(len(result), 0)
+        self.assertEqual(list(result.data_frame.columns), ['Knockouts', 'Size', 'Objective', 'EX_succ_lp_e_rp_'])
+        knockout_sets = [frozenset(reaction_id for group in solution for reaction_id in group) for solution in result]
+        for i, (knockouts, growth) in enumerate(zip(knockout_sets, result.objective_values)):
+            self.assertLessEqual(len(result.knockouts[i]), 2)
+            # integer cuts exclude earlier solutions and their supersets
+            self.assertFalse(any(earlier <= knockouts for earlier in knockout_sets[:i]))
+            with TimeMachine() as tm:
+                for reaction_id in knockouts:
+                    self.model.reactions.get_by_id(reaction_id).knock_out(time_machine=tm)
+                self.assertAlmostEqual(fba(self.model).objective_value, growth, delta=1e-4)
+        # integer cuts and the target objective are removed after the run
+        self.assertEqual(len(optknock.model.solver.constraints), number_of_constraints)
+        self.assertIs(optknock.model.objective, inner_objective)
+
+
+class TestMinimalCutSets(unittest.TestCase):
+    def setUp(self):
+        self.model = ECOLICORE.copy()
+        self.model.solver = 'glpk'
+        self.biomass = self.model.reactions.Biomass_Ecoli_core_N_lp_w_fsh_GAM_rp__Nmet2
+
+    def _is_cut_set(self, cut_set):
+        with TimeMachine() as tm:
+            for reaction_id in cut_set:
+                self.model.reactions.get_by_id(reaction_id).knock_out(time_machine=tm)
+            try:
+                return fba(self.model).objective_value < 1e-6
+            except Exception:
+                return True
+
+    def test_essential_reactions(self):
+        result = MinimalCutSets(self.model, self.biomass).run(max_size=1)
+        self.assertIsInstance(result, MinimalCutSetsResult)
+        essential = set(reaction.id for reaction in self.model.essential_reactions()) - set([self.biomass.id])
+        self.assertEqual(set(cut_set for cut_set in result), set(frozenset([reaction_id]) for reaction_id in essential))
+        self.assertEqual(list(result.data_frame['Size']), [1] * len(essential))
+
+    def test_pairs(self):
+        # reactions with bounds that exclude zero (ATPM) are only cut sets together with others
+        result = MinimalCutSets(self.model, self.biomass).run(max_size=2)
+        singles = [cut_set for cut_set in result if len(cut_set) == 1]
+        self.assertNotIn(frozenset(["ATPM"]), singles)
+        self.assertGreater(len(result), len(singles))
+        for cut_set in result:
+            self.assertTrue(self._is_cut_set(cut_set))
+            for reaction_id in cut_set:
+                self.assertFalse(self._is_cut_set(cut_set - set([reaction_id])))
+
+    def test_size_classes(self):
+        reactions = ["PGI", "G6PDH2r", "GND", "PFK", "FBA", "TPI", "PTAr", "ACKr", "CS", "ICDHyr",
+                     "PPC", "ME1", "ME2", "MALS", "ICL", "SUCDi", "FUM", "MDH"]
+        mcs = MinimalCutSets(self.model, self.biomass, reactions=reactions)
+        result = mcs.run(max_size=2)
+        self.assertEqual(result.cut_sets, mcs.run(max_size=2, view=SequentialView()).cut_sets)
+        self.assertEqual(sorted(result.cut_sets, key=len), result.cut_sets)
+        for cut_set in result:
+            self.assertTrue(cut_set.issubset(reactions))
+            self.assertTrue(self._is_cut_set(cut_set))
+            for reaction_id in cut_set:
+                self.assertFalse(self._is_cut_set(cut_set - set([reaction_id])))
+
 if six.PY2:  # Make these test cases work with PY3 as well
     class TestDifferentialFVA(unittest.TestCase):
         def setUp(self):
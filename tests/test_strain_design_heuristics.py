@@ -16,16 +16,20 @@ from __future__ import absolute_import, print_function
 from math import sqrt
 
 import os
+import shutil
+import tempfile
 import unittest
 import inspyred
 import pickle
 from ordered_set import OrderedSet
 
 from pandas.util.testing import assert_frame_equal
+import numpy
 import six
 
 from cameo import load_model, fba, config
-from cameo.strain_design.heuristic.genomes import MultipleChromosomeGenome
+from cameo.flux_analysis.simulation import lmoma
+from cameo.strain_design.heuristic.genomes import MultipleChromosomeGenome, BitSet
 from cameo.strain_design.heuristic.metrics import euclidean_distance
 from cameo.strain_design.heuristic.metrics import manhattan_distance
 from cameo.strain_design.heuristic.variators import _do_set_n_point_crossover, set_n_point_crossover, set_mutation, \
@@ -33,13 +37,19 @@ from cameo.strain_design.heuristic.variators import _do_set_n_point_crossover, s
 
 from cameo.util import RandomGenerator as Random
 from cameo.strain_design.heuristic.optimization import HeuristicOptimization, ReactionKnockoutOptimization, \
-    set_distance_function, KnockoutOptimizationResult
+    set_distance_function, similarity_order, KnockoutOptimizationResult, GeneKnockoutOptimization, \
+    KnockoutEvaluator, ScreeningEvaluator
 from cameo.strain_design.heuristic.archivers import SolutionTuple, BestSolutionArchiver
+from cameo.strain_design.heuristic.caches import FitnessCache, SQLiteFitnessStore
+from cameo.strain_design.heuristic.surrogates import KNNSurrogate
+from cameo.strain_design.heuristic import pareto
+from cameo.strain_design.heuristic.enumeration import next_level
+from cameo.strain_design.heuristic.plotters import PlotBuffer
 from cameo.strain_design.heuristic.decoders import ReactionKnockoutDecoder, KnockoutDecoder, GeneKnockoutDecoder
 from cameo.strain_design.heuristic.generators import set_generator, unique_set_generator, \
     multiple_chromosome_set_generator
 from cameo.strain_design.heuristic.objective_functions import biomass_product_coupled_yield, product_yield, \
-    number_of_knockouts
+    number_of_knockouts, batch_fitness
 from cobra.manipulation.delete import find_gene_knockout_reactions
 from cameo.parallel import SequentialView, MultiprocessingView
 from six.moves import range
@@ -199,6 +209,36 @@ class TestBestSolutionArchiver(unittest.TestCase):
         self.assertEqual(sol.candidate, solution, msg="Best solution must be the first (%s)" % sol.candidate)
         self.assertEqual(sol.fitness, fitness, msg="Best fitness must be the first (%s)" % sol.fitness)
 
+    def test_bitset_solutions(self):
+        size = 2
+        pool = BestSolutionArchiver()
+        pool.add(BitSet.of(SOLUTIONS[1][0]), SOLUTIONS[1][1], size)
+        pool.add(BitSet.of(SOLUTIONS[0][0]), SOLUTIONS[0][1], size)
+        pool.add(BitSet.of(SOLUTIONS[0][0]), SOLUTIONS[0][1], size)
+        self.assertEqual(pool.length(), 1)
+        self.assertEqual(pool.get(0).candidate, BitSet.of(SOLUTIONS[0][0]))
+        self.assertEqual(str(pool.get(0)), "[1, 2, 3] - 0.1 sense: max")
+
+    def test_remove_all_supersets(self):
+        pool = BestSolutionArchiver()
+        pool.add([3], 0.4, 10)
+        pool.add([1, 2, 3], 0.5, 10)
+        pool.add([1, 2, 4], 0.5, 10)
+        pool.add([1, 2, 5], 0.5, 10)
+        pool.add([1, 2], 0.5, 10)
+        self.assertEqual([(sorted(s.candidate), s.fitness) for s in pool], [([1, 2], 0.5), ([3], 0.4)])
+        pool.add([1, 2, 6], 0.5, 10)
+        self.assertEqual(pool.length(), 2)
+
+    def test_index_is_rebuilt(self):
+        pool = BestSolutionArchiver()
+        archive = [SolutionTuple([1, 2, 3], 0.5), SolutionTuple([4], 0.1)]
+        pool(Random(SEED), [SolutionTuple([1, 2], 0.5)], archive, {})
+        self.assertEqual([sorted(s.candidate) for s in pool], [[1, 2], [4]])
+        pool = pickle.loads(pickle.dumps(pool))
+        pool.add([1, 2, 7], 0.5, 10)
+        self.assertEqual(pool.length(), 2)
+
     def test_uniqueness_of_solutions(self):
         size = 2
         pool = BestSolutionArchiver()
@@ -337,6 +377,48 @@ class TestObjectiveFunctions(unittest.TestCase):
         f2 = of_min(None, None, [['a', 'b'], ['a', 'b', 'c']])
         self.assertGreater(f1, f2)
 
+    def test_batch_fitness(self):
+        solutions = []
+        for substrate in (-10, 0, -3):
+            solution = self._MockupSolution()
+            solution.set_primal('biomass', 0.6)
+            solution.set_primal('product', 2.0000005)
+            solution.set_primal('substrate', substrate)
+            solutions.append(solution)
+        decoded = [[['a'], ['a']], [['a', 'b'], ['a', 'b']], [['a', 'b'], ['a', 'b', 'c']]]
+        for of in (biomass_product_coupled_yield("biomass", "product", "substrate"),
+                   product_yield("product", "substrate"), number_of_knockouts(sense='max'), number_of_knockouts()):
+            expected = [of(None, solution, d) for solution, d in zip(solutions, decoded)]
+            self.assertEqual(batch_fitness(of, None, solutions, decoded), expected)
+        pareto_fitness = batch_fitness([product_yield("product", "substrate"), number_of_knockouts()], None,
+                                       solutions, decoded)
+        self.assertEqual(pareto_fitness[2], inspyred.ec.emo.Pareto([0.666667, 0.333333]))
+
+    def test_superset_bound(self):
+        bpcy = biomass_product_coupled_yield("biomass", "product", "substrate")
+        ranges = {'biomass': (0.1, 0.5), 'product': (-1, 4), 'substrate': (-10, -8)}
+        self.assertAlmostEqual(bpcy.superset_bound(ranges, 2), 0.5 * 4 / 8)
+        ranges['product'] = (-1, 0)
+        self.assertEqual(bpcy.superset_bound(ranges, 2), 0.0)
+        ranges['product'] = (-1, 4)
+        ranges['substrate'] = (-10, 0)
+        self.assertIsNone(bpcy.superset_bound(ranges, 2))
+
+        yield_ = product_yield("product", "substrate")
+        self.assertAlmostEqual(yield_.superset_bound({'product': (0, 3), 'substrate': (-10, -6)}, 1), 0.5)
+        self.assertEqual(yield_.superset_bound({'product': (-2, 0), 'substrate': (-10, -6)}, 1), 0.0)
+
+        self.assertEqual(number_of_knockouts().superset_bound({}, 4), 0.25)
+        self.assertIsNone(number_of_knockouts(sense='max').superset_bound({}, 4))
+
+
+class TestEnumeration(unittest.TestCase):
+    def test_next_level(self):
+        self.assertEqual(next_level([(0,), (1,), (3,)]), [(0, 1), (0, 3), (1, 3)])
+        self.assertEqual(next_level([(0, 1), (0, 2), (1, 2), (0, 3)]), [(0, 1, 2)])
+        self.assertEqual(next_level([(0, 1), (0, 2)]), [])
+        self.assertEqual(next_level([]), [])
+
 
 class TestDecoders(unittest.TestCase):
     def setUp(self):
@@ -382,6 +464,13 @@ class TestGenerators(unittest.TestCase):
                                                    variable_candidate_size=variable_candidate_size))
             self.assertEqual(candidate, expected[i])
 
+    def test_bitset_generator(self):
+        args = dict(representation=["a", "b", "c", "d", "e", "f"], candidate_size=5,
+                    variable_candidate_size=False, bitset_candidates=True)
+        candidate = set_generator(Random(SEED), args)
+        self.assertIsInstance(candidate, BitSet)
+        self.assertEqual(sorted(set_generator(Random(SEED), dict(args, bitset_candidates=False))), list(candidate))
+
     def test_multiple_chromossome_set_generator(self):
         random = Random(SEED)
         args = dict(keys=["test_key_1", "test_key_2"],
@@ -561,6 +650,13 @@ class TestHeuristicOptimization(unittest.TestCase):
         self.assertEqual(d, 2)
         d = set_distance_function(s3, s2)
         self.assertEqual(d, 1)
+        self.assertEqual(set_distance_function(BitSet.of(s1), BitSet.of(s3)), 2)
+        self.assertEqual(set_distance_function(BitSet.of(s1), s2), 1)
+
+    def test_similarity_order(self):
+        candidates = [{1, 2, 3, 4}, {5}, {1, 2}, {5, 6}, {1, 2, 3}]
+        self.assertEqual(similarity_order(candidates), [1, 3, 2, 4, 0])
+        self.assertEqual(similarity_order([]), [])
 
 
 class TestKnockoutOptimizationResult(unittest.TestCase):
@@ -599,6 +695,30 @@ class TestKnockoutOptimizationResult(unittest.TestCase):
             self.assertEqual(len(row["Knockouts"]), row["Size"])
             self.assertEqual(self.solutions.archive.count(individual), 1, msg="%s is unique in archive" % individual)
 
+    def test_result_reuses_key_fluxes(self):
+        biomass = "Biomass_Ecoli_core_N_LPAREN_w_FSLASH_GAM_RPAREN__Nmet2"
+        product = "EX_ac_LPAREN_e_RPAREN_"
+        kept = self.solutions.archive[0]
+        key_fluxes = {frozenset(kept.candidate): {biomass: 0.123, product: 4.56}}
+        result = KnockoutOptimizationResult(
+            model=self.model,
+            heuristic_method=None,
+            simulation_method=fba,
+            solutions=self.solutions,
+            objective_function=None,
+            ko_type="reaction",
+            decoder=self.decoder,
+            product=product,
+            biomass=biomass,
+            seed=SEED,
+            reference=None,
+            key_fluxes=key_fluxes,
+            view=SequentialView())
+        knockouts = frozenset(self.representation[i] for i in kept.candidate)
+        row = result.solutions[result.solutions["Knockouts"] == knockouts].iloc[0]
+        self.assertEqual(row["Biomass"], 0.123)
+        self.assertEqual(row[product], 4.56)
+
 
 class TestReactionKnockoutOptimization(unittest.TestCase):
     def setUp(self):
@@ -614,6 +734,19 @@ class TestReactionKnockoutOptimization(unittest.TestCase):
         self.assertEqual(rko._ko_type, "reaction")
         self.assertTrue(isinstance(rko._decoder, ReactionKnockoutDecoder))
 
+    def test_collapse_coupled_reactions(self):
+        rko = ReactionKnockoutOptimization(model=self.model, simulation_method=fba,
+                                           essential_reactions=self.essential_reactions,
+                                           collapse_coupled_reactions=True, seed=SEED)
+        self.assertEqual(sorted(rko.representation), sorted(rko.equivalents))
+        uncollapsed = ReactionKnockoutOptimization(model=self.model, simulation_method=fba,
+                                                   essential_reactions=self.essential_reactions, seed=SEED)
+        self.assertIsNone(uncollapsed.equivalents)
+        expanded = [reaction for group in rko.equivalents.values() for reaction in group]
+        self.assertEqual(len(expanded), len(set(expanded)))
+        self.assertTrue(set(expanded).issubset(uncollapsed.representation))
+        self.assertLessEqual(len(rko.representation), len(uncollapsed.representation))
+
     @unittest.skipIf(True, 'Broken ..')
     def test_run_single_objective(self):
         result_file = os.path.join(CURRENT_PATH, "data", "reaction_knockout_single_objective.pkl")
@@ -673,7 +806,437 @@ class TestReactionKnockoutOptimization(unittest.TestCase):
         assert_frame_equal(results.solutions, expected_results.solutions)
 
     def test_evaluator(self):
-        pass
+        objective = biomass_product_coupled_yield(
+            "Biomass_Ecoli_core_N_LPAREN_w_FSLASH_GAM_RPAREN__Nmet2",
+            "EX_ac_LPAREN_e_RPAREN_",
+            "EX_glc_LPAREN_e_RPAREN_")
+        rko = ReactionKnockoutOptimization(model=self.model,
+                                           simulation_method=fba,
+                                           objective_function=objective,
+                                           essential_reactions=self.essential_reactions,
+                                           seed=SEED)
+        evaluator = KnockoutEvaluator(self.model, rko._decoder, objective, fba, {})
+        bounds = [(r.lower_bound, r.upper_bound) for r in self.model.reactions]
+        population = [[0, 1, 2], [3], [0, 1], [3, 4], [0, 2]]
+        fitness = evaluator(population)
+        self.assertEqual([(r.lower_bound, r.upper_bound) for r in self.model.reactions], bounds)
+        for individual, value in zip(population, fitness):
+            self.assertAlmostEqual(evaluator.evaluate_individual(frozenset(individual)), value, delta=1e-6)
+        self.assertEqual([(r.lower_bound, r.upper_bound) for r in self.model.reactions], bounds)
+
+    def test_evaluator_uses_fitness_cache(self):
+        objective = biomass_product_coupled_yield(
+            "Biomass_Ecoli_core_N_LPAREN_w_FSLASH_GAM_RPAREN__Nmet2",
+            "EX_ac_LPAREN_e_RPAREN_",
+            "EX_glc_LPAREN_e_RPAREN_")
+        rko = ReactionKnockoutOptimization(model=self.model,
+                                           simulation_method=fba,
+                                           objective_function=objective,
+                                           essential_reactions=self.essential_reactions,
+                                           seed=SEED)
+        candidates = [[1, 2], [3], [2, 1]]
+        fitness = rko._evaluator(candidates, {'view': SequentialView()})
+        self.assertEqual(fitness[0], fitness[2])
+        self.assertEqual(len(rko.fitness_cache), 2)
+        self.assertEqual(rko.fitness_cache.hits, 0)
+        self.assertEqual(rko._evaluator(candidates, {'view': SequentialView()}), fitness)
+        self.assertEqual(rko.fitness_cache.hits, 3)
+
+    def test_evaluator_merges_duplicates(self):
+        objective = biomass_product_coupled_yield(
+            "Biomass_Ecoli_core_N_LPAREN_w_FSLASH_GAM_RPAREN__Nmet2",
+            "EX_ac_LPAREN_e_RPAREN_",
+            "EX_glc_LPAREN_e_RPAREN_")
+        rko = ReactionKnockoutOptimization(model=self.model,
+                                           simulation_method=fba,
+                                           objective_function=objective,
+                                           essential_reactions=self.essential_reactions,
+                                           zero_flux_shortcut=False,
+                                           seed=SEED)
+        fitness = rko._evaluator([[1, 2], [3], [2, 1], [1, 2]], {'view': SequentialView()})
+        self.assertEqual(fitness[0], fitness[2])
+        self.assertEqual(fitness[0], fitness[3])
+        self.assertEqual(rko.simulations, 2)
+        self.assertEqual(rko.duplicates, 2)
+        self.assertEqual(rko.evaluation_stats['duplicates'], 2)
+
+    def test_screening_evaluator(self):
+        biomass = "Biomass_Ecoli_core_N_LPAREN_w_FSLASH_GAM_RPAREN__Nmet2"
+        objective = biomass_product_coupled_yield(biomass, "EX_ac_LPAREN_e_RPAREN_", "EX_glc_LPAREN_e_RPAREN_")
+        decoder = ReactionKnockoutDecoder([biomass, "FUM"], self.model)
+        screener = ScreeningEvaluator(self.model, decoder, objective, fba)
+        self.assertEqual(screener([[0], [1]]), [(True, 0.0), (True, None)])
+
+    def test_screening_bound_needs_growth_objective(self):
+        biomass = "Biomass_Ecoli_core_N_LPAREN_w_FSLASH_GAM_RPAREN__Nmet2"
+        objective = biomass_product_coupled_yield(biomass, "EX_ac_LPAREN_e_RPAREN_", "EX_glc_LPAREN_e_RPAREN_")
+        model = self.model.copy()
+        model.objective = "EX_ac_LPAREN_e_RPAREN_"
+        decoder = ReactionKnockoutDecoder([biomass, "FUM"], model)
+        screener = ScreeningEvaluator(model, decoder, objective, fba)
+        # the acetate-maximizing screening solution has no growth, which says nothing about simulations
+        self.assertEqual(screener([[0]]), [(True, None)])
+
+    def test_screening_method(self):
+        rko = ReactionKnockoutOptimization(model=self.model,
+                                           simulation_method=lmoma,
+                                           screening_method=fba,
+                                           objective_function=number_of_knockouts(sense='min'),
+                                           essential_reactions=self.essential_reactions,
+                                           zero_flux_shortcut=False,
+                                           seed=SEED)
+        rko.heuristic_method.archiver = BestSolutionArchiver()
+        rko.heuristic_method.archive = [SolutionTuple([4], 0.5)]
+        fitness = rko._evaluator([[0, 1, 2], [3]], {'view': SequentialView(), 'maximize': True})
+        self.assertEqual(rko.screened, 1)
+        # screened candidates are not simulated
+        self.assertEqual(rko.simulations, 1)
+        self.assertEqual(fitness[0], 0)
+        self.assertNotIn((rko._evaluation_scope, frozenset([0, 1, 2])), rko.fitness_cache)
+        self.assertEqual(fitness[1], 1.)
+        self.assertEqual(len(rko.fitness_cache), 1)
+
+    def test_surrogate(self):
+        rko = ReactionKnockoutOptimization(model=self.model,
+                                           simulation_method=fba,
+                                           objective_function=number_of_knockouts(sense='min'),
+                                           essential_reactions=self.essential_reactions,
+                                           surrogate=KNNSurrogate(k=1, min_samples=2),
+                                           zero_flux_shortcut=False,
+                                           seed=SEED)
+        rko.heuristic_method.archiver = BestSolutionArchiver()
+        args = {'view': SequentialView(), 'maximize': True}
+        rko._evaluator([[0], [1, 2, 3]], args)
+        self.assertEqual(len(rko.surrogate), 2)
+        self.assertEqual(rko.predicted, 0)
+
+        rko.heuristic_method.archive = [SolutionTuple([4], 0.4)]
+        fitness = rko._evaluator([[0, 1], [2, 3]], args)
+        self.assertEqual(rko.predicted, 1)
+        self.assertEqual(rko.simulations, 3)
+        self.assertEqual(fitness[0], 0.5)
+        self.assertAlmostEqual(fitness[1], 1 / 3., delta=1e-6)
+        self.assertNotIn((rko._evaluation_scope, frozenset([2, 3])), rko.fitness_cache)
+        self.assertIs(args['surrogate'], rko.surrogate)
+        self.assertEqual(rko.surrogate.mean_absolute_error, 0.5)
+
+    def test_enumerate_knockouts(self):
+        objective = biomass_product_coupled_yield(
+            "Biomass_Ecoli_core_N_LPAREN_w_FSLASH_GAM_RPAREN__Nmet2",
+            "EX_ac_LPAREN_e_RPAREN_",
+            "EX_glc_LPAREN_e_RPAREN_")
+        rko = ReactionKnockoutOptimization(model=self.model,
+                                           simulation_method=fba,
+                                           objective_function=objective,
+                                           essential_reactions=self.essential_reactions,
+                                           seed=SEED)
+        result = rko.enumerate_knockouts(max_size=1, max_solutions=5, view=SequentialView())
+        self.assertIsNone(result.heuristic_method)
+        self.assertLessEqual(len(result.solutions), 5)
+        # all single knockouts are evaluated, so the best ones are found
+        fitness = rko._evaluator([[i] for i in range(len(rko.representation))], {'view': SequentialView()})
+        expected = sorted((value for value in fitness if value > 0), reverse=True)[:5]
+        numpy.testing.assert_allclose(sorted(result.solutions['Fitness'], reverse=True), expected, atol=1e-6)
+        self.assertIsInstance(pickle.loads(pickle.dumps(result)), KnockoutOptimizationResult)
+
+    def test_enumerate_knockout_pairs(self):
+        objective = biomass_product_coupled_yield(
+            "Biomass_Ecoli_core_N_LPAREN_w_FSLASH_GAM_RPAREN__Nmet2",
+            "EX_ac_LPAREN_e_RPAREN_",
+            "EX_glc_LPAREN_e_RPAREN_")
+        # ACKr knockouts cannot secrete acetate, so they are pruned with their supersets
+        reactions = set(["ACKr", "PFL", "LDH_D", "ALCD2x", "PYK", "FUM", "SUCDi", "ME2", "GND", "ATPS4r"])
+        rko = ReactionKnockoutOptimization(model=self.model,
+                                           simulation_method=fba,
+                                           objective_function=objective,
+                                           reactions=reactions,
+                                           essential_reactions=self.essential_reactions,
+                                           seed=SEED)
+        result = rko.enumerate_knockouts(max_size=2, max_solutions=3, view=SequentialView())
+        self.assertGreater(rko.pruned, 0)
+        self.assertEqual(rko.evaluation_stats['pruned'], rko.pruned)
+        self.assertTrue(all(len(knockouts) <= 2 for knockouts in result.solutions['Knockouts']))
+        # brute force: all single and double knockouts
+        size = len(rko.representation)
+        candidates = [[i] for i in range(size)] + [[i, j] for i in range(size) for j in range(i + 1, size)]
+        fitness = rko._evaluator(candidates, {'view': SequentialView()})
+        expected = sorted((value for value in fitness if value > 0), reverse=True)[:3]
+        numpy.testing.assert_allclose(sorted(result.solutions['Fitness'], reverse=True), expected, atol=1e-6)
+
+    def test_zero_flux_shortcut(self):
+        objective = biomass_product_coupled_yield(
+            "Biomass_Ecoli_core_N_LPAREN_w_FSLASH_GAM_RPAREN__Nmet2",
+            "EX_ac_LPAREN_e_RPAREN_",
+            "EX_glc_LPAREN_e_RPAREN_")
+        rko = ReactionKnockoutOptimization(model=self.model,
+                                           simulation_method=fba,
+                                           objective_function=objective,
+                                           essential_reactions=self.essential_reactions,
+                                           seed=SEED)
+        reference = fba(self.model)
+        without_flux = [i for i, r in enumerate(rko.representation) if abs(reference[r]) < 1e-6]
+        with_flux = [i for i, r in enumerate(rko.representation) if abs(reference[r]) > 1e-6]
+        candidates = [without_flux[:2], with_flux[:1]]
+        fitness = rko._evaluator(candidates, {'view': SequentialView()})
+        self.assertEqual(rko.shortcuts, 1)
+        self.assertEqual(rko.simulations, 1)
+        self.assertEqual(rko.evaluation_stats['shortcut_rate'], 0.5)
+
+        rko.zero_flux_shortcut = False
+        rko.fitness_cache.clear()
+        rko._reference_solution = None
+        simulated = rko._evaluator(candidates, {'view': SequentialView()})
+        self.assertAlmostEqual(simulated[0], fitness[0], delta=1e-6)
+        self.assertEqual(simulated[1], fitness[1])
+        self.assertEqual(rko.shortcuts, 1)
+
+    def test_run_asynchronous(self):
+        objective = biomass_product_coupled_yield(
+            "Biomass_Ecoli_core_N_LPAREN_w_FSLASH_GAM_RPAREN__Nmet2",
+            "EX_ac_LPAREN_e_RPAREN_",
+            "EX_glc_LPAREN_e_RPAREN_")
+        rko = ReactionKnockoutOptimization(model=self.model,
+                                           simulation_method=fba,
+                                           objective_function=objective,
+                                           essential_reactions=self.essential_reactions,
+                                           seed=SEED)
+        results = rko.run(max_evaluations=60, pop_size=10, view=SequentialView(), asynchronous=True, batch_size=4)
+        self.assertGreaterEqual(rko.heuristic_method.num_evaluations, 60)
+        self.assertEqual(len(rko.heuristic_method.population), 10)
+        self.assertGreater(len(results.solutions), 0)
+        self.assertTrue(pickle.loads(pickle.dumps(results)).heuristic_method.maximize)
+        results = rko.run(max_evaluations=20, pop_size=10, view=SequentialView(), asynchronous=True, batch_size=4,
+                          maximize=False)
+        self.assertFalse(rko.heuristic_method.maximize)
+        self.assertFalse(pickle.loads(pickle.dumps(results)).heuristic_method.maximize)
+
+    def test_resume_from_checkpoint(self):
+        objective = biomass_product_coupled_yield(
+            "Biomass_Ecoli_core_N_LPAREN_w_FSLASH_GAM_RPAREN__Nmet2",
+            "EX_ac_LPAREN_e_RPAREN_",
+            "EX_glc_LPAREN_e_RPAREN_")
+
+        def optimization():
+            return ReactionKnockoutOptimization(model=self.model, simulation_method=fba, objective_function=objective,
+                                                essential_reactions=self.essential_reactions, seed=SEED)
+
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, 'checkpoint.pkl')
+            interrupted = optimization()
+            interrupted.run(max_evaluations=50, pop_size=10, view=SequentialView(), checkpoint=path,
+                            checkpoint_generations=1)
+            self.assertTrue(os.path.exists(path))
+
+            resumed = optimization()
+            resumed.run(max_evaluations=100, pop_size=10, view=SequentialView(), resume_from=path)
+            uninterrupted = optimization()
+            uninterrupted.run(max_evaluations=100, pop_size=10, view=SequentialView())
+
+            for attribute in ('num_evaluations', 'num_generations'):
+                self.assertEqual(getattr(resumed.heuristic_method, attribute),
+                                 getattr(uninterrupted.heuristic_method, attribute))
+            self.assertEqual([(i.candidate, i.fitness) for i in resumed.heuristic_method.population],
+                             [(i.candidate, i.fitness) for i in uninterrupted.heuristic_method.population])
+            self.assertEqual([(s.candidate, s.fitness) for s in resumed.heuristic_method.archive],
+                             [(s.candidate, s.fitness) for s in uninterrupted.heuristic_method.archive])
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_evaluator_uses_fitness_store(self):
+        objective = biomass_product_coupled_yield(
+            "Biomass_Ecoli_core_N_LPAREN_w_FSLASH_GAM_RPAREN__Nmet2",
+            "EX_ac_LPAREN_e_RPAREN_",
+            "EX_glc_LPAREN_e_RPAREN_")
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, 'fitness.db')
+            rko = ReactionKnockoutOptimization(model=self.model, simulation_method=fba, objective_function=objective,
+                                               essential_reactions=self.essential_reactions, fitness_store=path,
+                                               seed=SEED)
+            fitness = rko._evaluator([[1, 2], [3]], {'view': SequentialView()})
+            self.assertEqual(len(rko.fitness_store), 2)
+            knockouts = [rko.representation[1], rko.representation[2]]
+            self.assertEqual(rko.fitness_store.get(rko._store_scope, knockouts), fitness[0])
+
+            rko2 = ReactionKnockoutOptimization(model=self.model, simulation_method=fba, objective_function=objective,
+                                                essential_reactions=self.essential_reactions, fitness_store=path,
+                                                seed=SEED)
+            self.assertEqual(rko2._evaluator([[1, 2], [3]], {'view': SequentialView()}), fitness)
+            self.assertEqual(rko2._store_scope, rko._store_scope)
+            self.assertEqual(len(rko2.fitness_store), 2)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+
+class TestGeneKnockoutOptimization(unittest.TestCase):
+    def setUp(self):
+        self.model = TEST_MODEL
+        self.essential_genes = set([g.id for g in self.model.essential_genes()])
+
+    def test_collapse_equivalent_genes(self):
+        gko = GeneKnockoutOptimization(model=self.model, simulation_method=fba, essential_genes=self.essential_genes,
+                                       seed=SEED)
+        self.assertEqual(sorted(gko.representation), sorted(gko.equivalents))
+        expanded = [gene for group in gko.equivalents.values() for gene in group]
+        self.assertEqual(len(expanded), len(set(expanded)))
+        for representative, group in six.iteritems(gko.equivalents):
+            reactions = set(self.model.gpr_index.knockout_reaction_ids([representative]))
+            for gene in group:
+                self.assertEqual(set(self.model.gpr_index.knockout_reaction_ids([gene])), reactions)
+        # isozyme genes knock out nothing alone, but group members must act alike together with other genes
+        group = next(group for group in gko.equivalents.values() if 'b0351' in group)
+        reactions = set(self.model.gpr_index.knockout_reaction_ids(['b0351', 'b1241']))
+        self.assertTrue(len(reactions) > 0)
+        for gene in group:
+            self.assertEqual(set(self.model.gpr_index.knockout_reaction_ids([gene, 'b1241'])), reactions)
+
+        gko = GeneKnockoutOptimization(model=self.model, simulation_method=fba, essential_genes=self.essential_genes,
+                                       collapse_equivalent_genes=False, seed=SEED)
+        self.assertIsNone(gko.equivalents)
+        self.assertEqual(sorted(gko.representation), sorted(gko.genes.difference(self.essential_genes)))
+
+
+class TestFitnessCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = FitnessCache(maxsize=2)
+        cache['a'] = 1
+        cache['b'] = 2
+        self.assertEqual(cache['a'], 1)
+        cache['c'] = 3
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn('b', cache)
+        self.assertIn('a', cache)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_statistics(self):
+        cache = FitnessCache()
+        cache[(1, frozenset([1, 2]))] = 0.5
+        self.assertEqual(cache.get((1, frozenset([2, 1]))), 0.5)
+        self.assertEqual(cache.get((1, frozenset([3]))), None)
+        self.assertRaises(KeyError, cache.__getitem__, (2, frozenset([1, 2])))
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 2)
+        self.assertAlmostEqual(cache.hit_rate, 1 / 3.)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.hit_rate, 0.)
+
+
+class TestSQLiteFitnessStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = SQLiteFitnessStore(os.path.join(self.tmp_dir, 'fitness.db'), keep_fluxes=True)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_put_and_get(self):
+        self.store.put_many('scope', [(['b', 'a'], 0.5, {'a': 0., 'b': 1.}), (['c'], 0.1, None)])
+        self.assertEqual(self.store.get('scope', ['a', 'b']), 0.5)
+        self.assertEqual(self.store.get('other', ['a', 'b']), None)
+        self.assertEqual(self.store.get_many('scope', [['c'], ['d']]), {'c': 0.1})
+        self.assertEqual(self.store.fluxes('scope', ['a', 'b']), {'a': 0., 'b': 1.})
+        self.assertEqual(self.store.fluxes('scope', ['c']), None)
+        self.assertEqual(len(self.store), 2)
+
+    def test_pickle(self):
+        self.store.put('scope', ['a'], inspyred.ec.emo.Pareto([1, 2]))
+        store = pickle.loads(pickle.dumps(self.store))
+        self.assertEqual(store.get('scope', ['a']), inspyred.ec.emo.Pareto([1, 2]))
+
+
+class TestKNNSurrogate(unittest.TestCase):
+    def test_predict(self):
+        surrogate = KNNSurrogate(k=1, min_samples=2)
+        surrogate.update([0], 1.)
+        self.assertEqual(surrogate.predict([0]), None)
+        surrogate.update([1, 2, 3], 1 / 3.)
+        self.assertEqual(surrogate.predict([0, 1]), 1.)
+        self.assertAlmostEqual(surrogate.predict([2, 3]), 1 / 3.)
+        surrogate.update([0, 1], 0.5)
+        self.assertEqual(surrogate.mean_absolute_error, 0.5)
+
+    def test_select(self):
+        surrogate = KNNSurrogate(k=1, min_samples=2)
+        self.assertEqual(surrogate.select([[0], [1]], 0.5), ([0, 1], None))
+        surrogate.update([0], 1.)
+        surrogate.update([1, 2, 3], 1 / 3.)
+        selected, predictions = surrogate.select([[2, 3], [0, 1], [1, 2]], 0.5)
+        self.assertEqual(selected, [0, 1])
+        self.assertEqual(predictions[1], 1.)
+        self.assertEqual(surrogate.skipped, 1)
+        self.assertAlmostEqual(surrogate.saved_fraction, 1 / 3.)
+
+    def test_max_samples(self):
+        surrogate = KNNSurrogate(k=1, min_samples=1, max_samples=2)
+        surrogate.update([0], 1.)
+        surrogate.update([1], 0.5)
+        surrogate.update([2], 0.1)
+        self.assertEqual(len(surrogate), 2)
+        self.assertEqual(surrogate.predict([1]), 0.5)
+        self.assertNotEqual(surrogate.predict([0]), 1.)
+        surrogate.clear()
+        self.assertEqual(len(surrogate), 0)
+
+
+class TestPareto(unittest.TestCase):
+    def _individual(self, candidate, values, maximize=True):
+        individual = inspyred.ec.Individual(candidate, maximize=maximize)
+        individual.fitness = inspyred.ec.emo.Pareto(values, maximize=[True, True, False])
+        return individual
+
+    def test_non_dominated_fronts(self):
+        matrix = pareto.fitness_matrix([self._individual([0], [1, 1, 1]), self._individual([1], [2, 2, 0]),
+                                        self._individual([2], [2, 0, 0]), self._individual([3], [1, 1, 2])])
+        self.assertEqual([list(front) for front in pareto.non_dominated_fronts(matrix)], [[1], [0, 2], [3]])
+
+    def test_crowding_distance(self):
+        distance = pareto.crowding_distance(numpy.array([[0., 3.], [1., 2.], [3., 0.], [2., 1.]]))
+        self.assertEqual(list(distance), [float('inf'), 4., float('inf'), 4.])
+
+    def test_nsga_replacement(self):
+        random = Random(SEED)
+        for maximize in (True, False):
+            population = [self._individual(random.sample(range(10), 3), [random.randint(0, 3) for _ in range(3)],
+                                           maximize) for _ in range(30)]
+            offspring = population[:5] + [
+                self._individual(random.sample(range(10), 3), [random.randint(0, 3) for _ in range(3)], maximize)
+                for _ in range(25)]
+            expected = inspyred.ec.replacers.nsga_replacement(random, list(population), [], list(offspring), {})
+            survivors = pareto.nsga_replacement(random, list(population), [], list(offspring), {})
+            self.assertEqual([id(individual) for individual in survivors],
+                             [id(individual) for individual in expected])
+
+    def test_nondominated_archiver(self):
+        archive = pareto.nondominated_archiver(None, [self._individual([0], [1, 1, 1]),
+                                                      self._individual([1], [2, 2, 0])], [], {})
+        self.assertEqual([individual.candidate for individual in archive], [[1]])
+        archive = pareto.nondominated_archiver(None, [self._individual([2], [3, 0, 0]),
+                                                      self._individual([1], [3, 3, 0]),
+                                                      self._individual([3], [1, 1, 1])], archive, {})
+        self.assertEqual([individual.candidate for individual in archive], [[1], [2]])
+
+
+class TestPlotBuffer(unittest.TestCase):
+    def test_ring_buffer(self):
+        history = PlotBuffer(4)
+        for i in range(3):
+            history.append((i, -i))
+        self.assertEqual(history.data.tolist(), [[0, 0], [1, -1], [2, -2]])
+        for i in range(3, 6):
+            history.append((i, -i))
+        self.assertEqual(history.data[:, 0].tolist(), [0, 1, 2, 3, 4, 5])
+
+    def test_decimation(self):
+        history = PlotBuffer(4)
+        for i in range(40):
+            history.append((i, -i))
+        self.assertEqual(history.data[:, 0].tolist(), [0, 16, 32, 36, 37, 38, 39])
+        self.assertLessEqual(len(history), 8)
+        history.clear()
+        self.assertEqual(len(history.data), 0)
 
 
 class VariatorsTestCase(unittest.TestCase):
@@ -712,6 +1275,18 @@ class VariatorsTestCase(unittest.TestCase):
         new_individuals = set_indel(Random(SEED), [individual], args)
         self.assertEqual(new_individuals[0], [5, 3, 9, 1])
 
+    def test_bitset_variators(self):
+        args = {"representation": list(range(10)), "mutation_rate": 1, "indel_rate": 1, "candidate_size": 10}
+        individual = BitSet.of([1, 3, 5, 9])
+        for variator in (set_mutation, set_indel):
+            new_individual = variator(Random(SEED), [individual], args)[0]
+            self.assertIsInstance(new_individual, BitSet)
+            self.assertTrue(new_individual.issubset(range(10)))
+        children = set_n_point_crossover(Random(SEED), [individual, BitSet.of([2, 3, 7, 8])], args)
+        for child in children:
+            self.assertIsInstance(child, BitSet)
+            self.assertTrue(child.issubset([1, 2, 3, 5, 7, 8, 9]))
+
     def test_do_set_n_point_crossover(self):
         representation = ["A", "B", "C", "D", "E", "F", "G", "H", "I", "J", "K", "L", "M", "N"]
         int_representation = [representation.index(v) for v in representation]
@@ -767,6 +1342,21 @@ class VariatorsTestCase(unittest.TestCase):
 
 
 class GenomesTestCase(unittest.TestCase):
+    def test_bitset(self):
+        candidate = BitSet.of([5, 1, 3])
+        self.assertEqual(list(candidate), [1, 3, 5])
+        self.assertEqual(len(candidate), 3)
+        self.assertIn(3, candidate)
+        self.assertNotIn(4, candidate)
+        self.assertEqual(candidate ^ BitSet.of([1, 2]), BitSet.of([2, 3, 5]))
+        self.assertEqual(candidate - [1], BitSet.of([3, 5]))
+        self.assertTrue(BitSet.of([1, 5]).issubset(candidate))
+        self.assertFalse(candidate.issubset([1, 5]))
+        self.assertEqual(candidate.add(0).discard(5), BitSet.of([0, 1, 3]))
+        self.assertEqual(frozenset(candidate), frozenset([1, 3, 5]))
+        self.assertEqual(pickle.loads(pickle.dumps(candidate)), candidate)
+        self.assertIsInstance(pickle.loads(pickle.dumps(candidate)), BitSet)
+
     def test_two_chromosomes(self):
         genome = MultipleChromosomeGenome(["A", "B"])
         self.assertIsInstance(genome["A"], OrderedSet)